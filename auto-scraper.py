@@ -1,149 +1,152 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from urllib.parse import urljoin
-import time
-import os
+import asyncio
+import sys
+from functools import partial
+from fetcher import AsyncFetcher
+from discovery import MAX_PAGES, discover, subject_home_urls
+from crawl_state import CrawlState, content_hash
+from record_sink import shared_sink, close_shared_sinks
+import bs4_extractor
+import lxml_extractor
+from parse_pool import ParsePool
+
+FIELDS = ['url', 'word', 'definition', 'mnemonic', 'highlighted_text', 'images']
 
 class MnemonicScraper:
-    def __init__(self, start_url):
+    def __init__(self, start_url, fetcher=None, state=None):
         self.start_url = start_url
-        self.visited_urls = set()
+        # Share one fetcher between scrapers so chains reuse the same connections
+        self.fetcher = fetcher or AsyncFetcher()
+        # Crawl checkpoints; in-memory unless a persistent store is passed in
+        self.state = state or CrawlState(":memory:")
 
-    def get_page(self, url):
-        try:
-            response = requests.get(url)
-            return response.text
-        except requests.RequestException as e:
-            print(f"Error getting page: {e}")
-            return None
+    async def get_page(self, url):
+        return await self.fetcher.fetch(url)
 
     # Go to next page in list
     def get_next_page_url(self, soup, current_url):
-        next_div = soup.find('div', class_='page-next')
-        if next_div and next_div.find('a'):
-            next_url = next_div.find('a')['href']
-            return urljoin(current_url, next_url)
-        return None
-
-    def get_mnemonic(self, url):
-        content = self.get_page(url)
+        return bs4_extractor.next_page_url(soup, current_url)
+
+    async def get_mnemonic(self, url):
+        content = await self.get_page(url)
         if not content:
             return None
 
-        soup = BeautifulSoup(content, 'html.parser')
-        word = None
-        definition = None
-        
-        # Assume word/concept is the first h1 tag
-        h1_tag = soup.find('h1')
-        if h1_tag:
-            h1_text = h1_tag.text.strip().replace('\xa0', ' ')
-            
-            # Assume – or - seperates word from definition if in first h1 tag
-            if "–" in h1_text:  
-                word, definition = h1_text.split(" – ", 1)
-            elif "-" in h1_text: 
-                word, definition = h1_text.split(" - ", 1)
-            else:
-                # Otherwise, take next tag
-                word = h1_tag.text.strip()
-                if h1_tag.find_next_sibling():
-                    definition = h1_tag.find_next_sibling().text.strip()
-
-        # Look only at main content
-        main_content = soup.find("div", id="mainContent")
-        if main_content == None:
+        return self.parse_page(content, url)[0]
+
+    def parse_page(self, content, url):
+        """
+        Extract (data, next_url) from raw HTML, with the single-pass lxml extractor
+        when lxml is installed and the BeautifulSoup one otherwise.
+        """
+        if lxml_extractor.available:
+            return lxml_extractor.extract_page(content, url)
+        return bs4_extractor.extract_page(content, url)
+
+    async def process_page(self, url):
+        """
+        Fetch and parse a page exactly once, then hand the same document to
+        both the mnemonic extractor and the next-link finder.
+        Returns (data, next_url, page_hash), or None if the page could not be fetched or parsed.
+        """
+        content = await self.get_page(url)
+        if not content:
             return None
-            
-        last_img = None
-        found_after_img = False  
-
-        mnemonics = []
-        highlighted_text = []
-        mnemonic_set = set()
-        images = []
-
-         # Iterate through all tags
-        for tag in main_content.find_all():  
-            if tag.name == "img":
-                src = tag.get('src')
-                if src:
-                    full_url = urljoin(url, src)
-                    images.append(full_url)
-
-                # Since maybe multiple mnemonics per page, reset after each image - assume multiple images with red text means multiple mnemonics
-                last_img = tag 
-                found_after_img = False  
-
-            # red text is marker for mnemonic
-            elif tag.name in ["p", "figcaption"] and not found_after_img:
-                red_text = tag.find_all(lambda el: el.name == "span" and (
-                    "style" in el.attrs and "#ff0000" in el["style"].replace(" ", "").lower()
-                ))
-
-                # Sometimes black text interspersed within red text span - remove it
-                if red_text:
-                    for e in red_text:
-                        nested_black_span = e.find(lambda el: el.name == "span" and (
-                            "style" in el.attrs and "#000000" in el["style"].replace(" ", "").lower()))
-
-                        if not nested_black_span:
-                            if "NOTE" not in e.text.strip():  
-                                highlighted_text.append(e.text.strip())
-
-                if red_text and tag not in mnemonic_set and "NOTE" not in tag.text.strip():
-                    mnemonic_set.add(tag)
-                    mnemonics.append(tag.text.strip())
-                    if last_img:
-                        found_after_img = True  
-
-        return {
-            'url': url,
-            'word': word,
-            'definition': definition,
-            'mnemonic': mnemonics,
-            'highlighted_text': highlighted_text,
-            'images': images
-        }
-
-    def scrape_all_pages(self):
-        current_url = self.start_url
+
+        try:
+            data, next_url = self.parse_page(content, url)
+        except Exception as e:
+            # Recorded as failed like an unreachable page, so the other chains carry on
+            print(f"Error parsing page {url}: {e!r}")
+            return None
+        return data, next_url, content_hash(content)
+
+    def extract_mnemonic(self, soup, url):
+        return bs4_extractor.extract(soup, url)
+
+    async def scrape_all_pages(self):
+        # Resume from the page after the last one completed in a previous run
+        resume = self.state.resume_point(self.start_url)
+        if resume is None:
+            print(f"⏩ Chain already complete: {self.start_url}")
+            return []
+        current_url, position = resume
         all_data = []
+        # Checkpoints land when the sink flushes, so loops within this walk are tracked here
+        walked = set()
 
-        while current_url and current_url not in self.visited_urls:
+        while current_url and current_url not in walked and not self.state.is_done(current_url):
             print(f"Scraping: {current_url}")
-            self.visited_urls.add(current_url)
+            walked.add(current_url)
             
-            content = self.get_page(current_url)
-            if not content:
+            page = await self.process_page(current_url)
+            if not page:
+                self.state.mark_failed(current_url, self.start_url, position)
                 break
 
-            soup = BeautifulSoup(content, 'html.parser')
-            data = self.get_mnemonic(current_url)
-            
+            data, next_url, page_hash = page
             if data:
                 all_data.append(data)
-                self.save_to_csv(data)
+            # Checkpointed only once the row (if any) is on disk
+            self.save_to_csv(data, on_saved=partial(self.state.mark_done, current_url, self.start_url,
+                                                    position, next_url, page_hash))
 
-            current_url = self.get_next_page_url(soup, current_url)
-            
-            time.sleep(0.2)
+            # Politeness delay is handled per host by the fetcher
+            current_url = next_url
+            position += 1
 
         return all_data
 
-    def save_to_csv(self, data, filename="mammoth_memory_auto_data.csv"):
+    async def scrape_frontier(self, frontier, parse_pool=None):
+        """
+        Scrape every page of a discovered frontier in parallel. Pages that were
+        already downloaded during discovery are not fetched again.
+        Parsing runs on `parse_pool` (all cores) when given, in-process otherwise;
+        either way rows are written in frontier order.
+        """
+        urls = []
+        for url in frontier.urls():
+            if self.state.is_done(url):
+                frontier.pop_html(url)
+            else:
+                urls.append(url)
+
+        async def fetch(url):
+            return frontier.pop_html(url) or await self.get_page(url)
+
+        pool = parse_pool or ParsePool(self.parse_page, workers=0, max_in_flight=32)
+        all_data = []
+        async for url, content, page in pool.map_async(urls, fetch):
+            # Unreachable pages and pages the extractor raised on are retried by the next run
+            if not content or page is None:
+                self.state.mark_failed(url)
+                continue
+            data, _ = page
+            if data:
+                all_data.append(data)
+            self.save_to_csv(data, on_saved=partial(self.state.mark_done, url, page_hash=content_hash(content)))
+        return all_data
+
+    def save_to_csv(self, data, filename="mammoth_memory_auto_data.csv", on_saved=None):
+        # Rows go through one buffered sink per file; on_saved runs once they are on disk
+        sink = shared_sink(filename, FIELDS)
         if data:
-            df = pd.DataFrame([data])
-            df.to_csv(filename, mode='a', header=not pd.io.common.file_exists(filename), index=False)
+            sink.write(data, on_saved)
             print(f"Data appended to {filename}")
         else:
+            if on_saved:
+                sink.defer(on_saved)
             print("No data to save")
 
-def main():
-    filename = "mammoth_memory_auto_data.csv"
-    if os.path.exists(filename):
-            os.remove(filename)
+def main(full_site=False):
+    """
+    Walk the chains in url_list, as the scraper always has. With full_site
+    (--full-site on the command line), crawl every content page reachable from
+    the subject home pages as well.
+    """
+    # Progress is checkpointed next to the output, so a rerun resumes where the last one stopped.
+    # Delete both files to start from scratch.
+    state = CrawlState("mammoth_memory_auto_data_state.db")
+    print(f"🧠 {state.count()} pages already scraped")
     url_list = [
                 "https://mammothmemory.net/memory/remembering-months-and-signs-of-the-zodiac/remembering-signs-of-the-zodiac/capricorn.html",
                 "https://mammothmemory.net/chemistry/atomic-structure/protons/protons.html",
@@ -153,9 +156,37 @@ def main():
           
     ]
     
-    for start_url in url_list:
-        scraper = MnemonicScraper(start_url)
-        scraper.scrape_all_pages()
+    with AsyncFetcher(concurrency=8, per_host=4, min_interval=0.2) as fetcher:
+        if full_site:
+            # Build the whole frontier up front from the subject home pages and the chain
+            # starts, then scrape it in parallel over one pooled fetcher
+            print(f"🌐 Crawling all {len(subject_home_urls())} subjects plus {len(url_list)} chains "
+                  f"(up to {MAX_PAGES} pages in discovery)")
+            frontier = fetcher.run(discover(subject_home_urls() + url_list, fetcher, state=state))
+            print(frontier.summary())
+
+            scraper = MnemonicScraper(None, fetcher, state)
+            # Parse on every core when the picklable lxml extractor is available
+            if lxml_extractor.available:
+                with ParsePool() as parse_pool:
+                    fetcher.run(scraper.scrape_frontier(frontier, parse_pool))
+            else:
+                fetcher.run(scraper.scrape_frontier(frontier))
+        else:
+            fetcher.run(scrape_chains(url_list, fetcher, state))
+        print(f"Fetched {fetcher.total_fetches()} pages for {len(fetcher.fetch_counts)} unique URLs "
+              f"({fetcher.fetches_per_url():.2f} fetches per URL)")
+
+    # Flush the remaining rows (and their checkpoints) before the state is closed
+    close_shared_sinks()
+    state.close()
+
+async def scrape_chains(url_list, fetcher, state=None):
+    """
+    Walk each chain from its start page along the page-next links, all chains concurrently.
+    """
+    scrapers = [MnemonicScraper(start_url, fetcher, state) for start_url in url_list]
+    return await asyncio.gather(*(scraper.scrape_all_pages() for scraper in scrapers))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(full_site="--full-site" in sys.argv[1:])
\ No newline at end of file
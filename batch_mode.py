@@ -0,0 +1,454 @@
+"""
+Offline batch mode for full rebuilds, using the OpenAI Batch API.
+
+Instead of thousands of synchronous calls, the pending extraction prompts
+(extract_mnemonic_with_llm) or question prompts (generate_question) are written
+to a Batch-API JSONL file, submitted, and merged back by custom_id once the
+batch has finished. Results arrive within the 24h completion window, at a
+fraction of the synchronous cost and outside the RPM/TPM limits.
+
+    python batch_mode.py extract --corpus corpus [--prompt main|vocab]
+    python batch_mode.py questions mammoth_memory_elements.csv elements_questions.csv
+    python batch_mode.py poll [--wait]
+
+`extract` works on pages archived with `bench_extractors.py --archive`. Pages
+the red-span rules handle, and pages whose chunks are all in the LLM cache, are
+written straight away. The rest are split into chunks exactly as
+ChunkedExtractor splits them, and each uncached chunk is one request, with the
+same structured output schema as the scripts. Finished chunks go into the LLM
+cache under the key ChunkedExtractor looks up, so a later synchronous run
+reuses them. The mnemonics CSV is written once every batch of the job is in.
+`questions` templates what it can and batches the remaining questions; `poll`
+writes the output CSV once they are answered. Point LLM_BASE_URL at a local
+OpenAI-compatible server to try it without the real API.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from bench_extractors import DEFAULT_CORPUS, load_corpus
+from extraction_schema import MNEMONIC, parse_items
+from html_chunker import MAX_TOKENS, item_key, split_html
+from html_pruner import HtmlPruner
+from llm_cache import LLMCache, cache_key
+from llm_client import LLMError
+from prompts import MAIN_CONTENT_EXTRACTION, VOCAB_EXTRACTION, QUESTION_INSTRUCTIONS, question_input
+from question_batch import clean_question
+from record_sink import shared_sink, close_shared_sinks
+from rule_extractor import RuleExtractor, to_llm_format
+
+load_dotenv()
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_DIR = os.path.join(SCRIPT_DIR, "batches")
+REGISTRY = os.path.join(BATCH_DIR, "batches.json")
+ENDPOINT = "/v1/responses"
+MODEL = "gpt-4o"
+# Batch API limit per input file
+MAX_REQUESTS = 50000
+# Chunk size of the scripts' ChunkedExtractor; the chunks, and so the cache keys, must match
+CHUNK_TOKENS = MAX_TOKENS
+
+# Extraction prompt and structured output schema
+PROMPTS = {"main": (MAIN_CONTENT_EXTRACTION, MNEMONIC), "vocab": (VOCAB_EXTRACTION, MNEMONIC)}
+FIELDS = ["url", "concept_and_mnemonic"]
+
+
+def make_client():
+    return OpenAI(api_key=os.getenv("API_KEY"), base_url=os.getenv("LLM_BASE_URL"))
+
+
+def request_line(custom_id, instructions, input, model=MODEL, text_format=None):
+    body = {"model": model, "instructions": instructions, "input": input}
+    if text_format:
+        body["text"] = text_format
+    return {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}
+
+
+def output_text(body):
+    """
+    The text of a /v1/responses body, as response.output_text gives it.
+    """
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", []) if item.get("type") == "message"
+        for part in item.get("content", []) if part.get("type") == "output_text"
+    )
+
+
+def load_registry():
+    if not os.path.exists(REGISTRY):
+        return {}
+    with open(REGISTRY, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_registry(registry):
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    tmp = REGISTRY + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2, sort_keys=True)
+    os.replace(tmp, REGISTRY)
+
+
+def submit(client, kind, lines, meta, job):
+    """
+    Write `lines` as Batch-API JSONL and submit them, MAX_REQUESTS per batch.
+    `meta` maps custom_id -> what ingestion needs to merge the result; `job`
+    holds kind-specific settings (output paths). All the batches of one call
+    share a job_id. Returns the batch ids.
+    """
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    registry = load_registry()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    job_id = f"{kind}-{stamp}"
+    batch_ids = []
+    for start in range(0, len(lines), MAX_REQUESTS):
+        chunk = lines[start:start + MAX_REQUESTS]
+        name = f"{kind}-{stamp}-{start // MAX_REQUESTS}"
+        input_path = os.path.join(BATCH_DIR, name + ".jsonl")
+        meta_path = os.path.join(BATCH_DIR, name + ".meta.json")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            for line in chunk:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({line["custom_id"]: meta[line["custom_id"]] for line in chunk}, f, ensure_ascii=False)
+
+        with open(input_path, 'rb') as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(input_file_id=uploaded.id, endpoint=ENDPOINT,
+                                      completion_window="24h", metadata={"kind": kind, "name": name})
+        registry[batch.id] = dict(job, kind=kind, job_id=job_id, name=name, batch_file=input_path, meta=meta_path,
+                                  requests=len(chunk), status=batch.status, ingested=False,
+                                  submitted_at=time.time())
+        save_registry(registry)
+        batch_ids.append(batch.id)
+        print(f"📤 Submitted batch {batch.id} ({len(chunk)} requests, {input_path})")
+    return batch_ids
+
+
+def read_results(client, file_id):
+    """
+    {custom_id: output text or None} from a batch output or error file
+    """
+    results = {}
+    if not file_id:
+        return results
+    for line in client.files.content(file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or response.get("body", {}).get("error")
+            print(f"  ❌ {record['custom_id']}: {error}")
+            results[record["custom_id"]] = None
+            continue
+        results[record["custom_id"]] = output_text(response["body"])
+    return results
+
+
+# Extraction
+
+def prepare_extraction(client, corpus_dir, prompt="main", output=None):
+    instructions, schema = PROMPTS[prompt]
+    text_format = schema.text_format()
+    output = output or os.path.join(SCRIPT_DIR, "mammoth_memory_main_mnemonics.csv")
+    rules = RuleExtractor()
+    pruner = HtmlPruner()
+    llm_cache = LLMCache()
+    sink = shared_sink(output, FIELDS)
+
+    lines, meta, pages = [], {}, []
+    for _, url, html in load_corpus(corpus_dir):
+        soup = BeautifulSoup(html, "html.parser")
+        main_content = soup.find("div", id="mainContent")
+        mnemonic_json = rules.extract(soup, url, lambda: None)
+        if mnemonic_json is not None:
+            sink.write({"url": url, "concept_and_mnemonic": mnemonic_json})
+            continue
+
+        input = pruner.prune(main_content, url)
+        chunks = split_html(input, CHUNK_TOKENS, MODEL)
+        keys = [cache_key(MODEL, instructions, chunk, text_format) for chunk in chunks]
+        items = page_items(schema, llm_cache, keys)
+        if items is not None:
+            sink.write({"url": url, "concept_and_mnemonic": to_llm_format(items, url)})
+            continue
+        pages.append({"url": url, "keys": keys})
+        for chunk, key in zip(chunks, keys):
+            custom_id = f"x-{key[:40]}"
+            # A chunk shared with another page, or already cached, is not requested again
+            if custom_id in meta or cached_items(schema, llm_cache, key) is not None:
+                continue
+            meta[custom_id] = {"key": key}
+            lines.append(request_line(custom_id, instructions, chunk, text_format=text_format))
+
+    close_shared_sinks()
+    print(rules.summary())
+    print(pruner.summary())
+    print(f"{len(lines)} extraction prompts pending for {len(pages)} pages, {llm_cache.hits} answered from the cache")
+    llm_cache.close()
+    if not lines:
+        return []
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    pages_path = os.path.join(BATCH_DIR, f"extract-{time.strftime('%Y%m%d-%H%M%S')}.pages.json")
+    with open(pages_path, 'w', encoding='utf-8') as f:
+        json.dump(pages, f, ensure_ascii=False)
+    return submit(client, "extract", lines, meta, {"output": output, "prompt": prompt, "pages": pages_path})
+
+
+def valid_items(schema, output):
+    """
+    The valid items of a structured response, canonical and in order. There is no
+    re-ask here; invalid items are reported and left out.
+    """
+    items = []
+    for item in parse_items(output):
+        if isinstance(item, dict) and schema.is_empty(item):
+            continue
+        problems = schema.problems(item)
+        if problems:
+            print(f"  ⚠️ Invalid item left out: {problems}")
+            continue
+        items.append(schema.normalize(item))
+    return items
+
+
+def cached_items(schema, llm_cache, key):
+    """
+    The valid items of one chunk's cached response, or None if it has no usable one.
+    """
+    output = llm_cache.get(key)
+    if output is None:
+        return None
+    try:
+        return valid_items(schema, output)
+    except ValueError:
+        return None
+
+
+def page_items(schema, llm_cache, keys):
+    """
+    A page's items from its chunks' cached responses, merged in page order with
+    duplicates removed as ChunkedExtractor merges them, or None while any chunk
+    has no usable response.
+    """
+    merged, seen = [], set()
+    for key in keys:
+        items = cached_items(schema, llm_cache, key)
+        if items is None:
+            return None
+        for item in items:
+            if item_key(item) not in seen:
+                seen.add(item_key(item))
+                merged.append(item)
+    return merged
+
+
+def ingest_extraction(registry, job, meta, results):
+    """
+    Cache one batch's chunk results, and write the pages to the mnemonics CSV
+    once every batch of the job is in: a page's chunks can be in different batches.
+    """
+    _, schema = PROMPTS[job.get("prompt", "main")]
+    llm_cache = LLMCache()
+    for custom_id, text in results.items():
+        if custom_id not in meta or text is None:
+            continue
+        try:
+            valid_items(schema, text)
+        except ValueError as e:
+            print(f"  ❌ {custom_id}: {e}")
+            continue
+        # Cached under the same per-chunk key the synchronous scripts use
+        llm_cache.put(meta[custom_id]["key"], MODEL, text)
+    job["ingested"] = True
+
+    job_id = job.get("job_id", job["name"])
+    batches = [other for other in registry.values() if other.get("job_id", other["name"]) == job_id]
+    if not all(other["ingested"] for other in batches):
+        print(f"  {sum(1 for other in batches if other['ingested'])}/{len(batches)} batches of {job_id} in, "
+              f"writing {job['output']} once all are")
+        llm_cache.close()
+        return
+    with open(job["pages"], encoding='utf-8') as f:
+        pages = json.load(f)
+    sink = shared_sink(job["output"], FIELDS)
+    written = 0
+    for page in pages:
+        items = page_items(schema, llm_cache, page["keys"])
+        if items is None:
+            print(f"  ❌ {page['url']}: a chunk has no usable result, left for a synchronous run")
+            continue
+        sink.write({"url": page["url"], "concept_and_mnemonic": to_llm_format(items, page["url"])})
+        written += 1
+    close_shared_sinks()
+    llm_cache.close()
+    print(f"📁 {written} of {len(pages)} pages saved to {job['output']}")
+
+
+# Questions
+
+def question_id(term, definition, mnemonic):
+    payload = json.dumps([term, definition, mnemonic or ""], ensure_ascii=False)
+    return "q-" + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:40]
+
+
+def read_rows(input_file):
+    csv.field_size_limit(sys.maxsize)
+    with open(input_file, 'r', encoding='utf-8') as file:
+        return list(csv.reader(file))
+
+
+def prepare_questions(client, input_file, output_file):
+    from question import FlashcardProcessor
+
+    lines, meta = [], {}
+
+    async def collect(term, definition, mnemonic=""):
+        custom_id = question_id(term, definition, mnemonic)
+        if custom_id not in meta:
+            meta[custom_id] = {"term": term}
+            lines.append(request_line(custom_id, QUESTION_INSTRUCTIONS, question_input(term, definition, mnemonic)))
+        return ""
+
+    processor = FlashcardProcessor(batch=False, ask=collect)
+
+    async def walk():
+        for row in read_rows(input_file):
+            if len(row) >= 2 and row[1].strip():
+                await processor.process_json_entry_async(row[1], row[0])
+
+    asyncio.run(walk())
+    print(processor.templates.summary())
+    print(f"{len(lines)} question prompts pending")
+    if not lines:
+        # Everything was templated; nothing to wait for
+        write_questions({"input": input_file, "output": output_file}, {})
+        return []
+    return submit(client, "questions", lines, meta, {"input": input_file, "output": output_file})
+
+
+def write_questions(job, answers):
+    from question import FlashcardProcessor
+
+    async def answer(term, definition, mnemonic=""):
+        question = answers.get(question_id(term, definition, mnemonic))
+        if not question:
+            raise LLMError("no answer in the batch results")
+        return clean_question(question)
+
+    processor = FlashcardProcessor(batch=False, ask=answer)
+    processor.process_csv_file(job["input"], job["output"])
+
+
+def ingest_questions(registry, job, results):
+    """
+    Keep one batch's answers, and write the output CSV once every batch of its
+    job is in: a job split over several batches is written from all of them.
+    """
+    answers_path = os.path.join(BATCH_DIR, job["name"] + ".answers.json")
+    with open(answers_path, 'w', encoding='utf-8') as f:
+        json.dump({k: v for k, v in results.items() if v}, f, ensure_ascii=False)
+    job["answers"] = answers_path
+    job["ingested"] = True
+
+    job_id = job.get("job_id", job["name"])
+    batches = [other for other in registry.values() if other.get("job_id", other["name"]) == job_id]
+    if not all(other["ingested"] for other in batches):
+        print(f"  {sum(1 for other in batches if other['ingested'])}/{len(batches)} batches of {job_id} in, "
+              f"writing {job['output']} once all are")
+        return
+    answers = {}
+    for other in batches:
+        with open(other["answers"], encoding='utf-8') as f:
+            answers.update(json.load(f))
+    write_questions(job, answers)
+
+
+# Polling
+
+def poll(client, wait=False, interval=30):
+    """
+    Check every submitted batch and ingest the ones that have finished.
+    With wait=True, keep polling until none are outstanding.
+    """
+    while True:
+        registry = load_registry()
+        outstanding = 0
+        for batch_id, job in registry.items():
+            if job["ingested"]:
+                continue
+            batch = client.batches.retrieve(batch_id)
+            job["status"] = batch.status
+            if batch.status in ("validating", "in_progress", "finalizing"):
+                outstanding += 1
+                counts = batch.request_counts
+                done = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+                print(f"⏳ {batch_id} ({job['kind']}): {batch.status}, {done}")
+                continue
+            if batch.status != "completed":
+                # failed, expired or cancelled: whatever finished is still merged
+                print(f"⚠️ {batch_id} ({job['kind']}): {batch.status}")
+
+            results = read_results(client, batch.output_file_id)
+            results.update({k: v for k, v in read_results(client, batch.error_file_id).items() if k not in results})
+            with open(job["meta"], encoding='utf-8') as f:
+                meta = json.load(f)
+            answered = sum(1 for text in results.values() if text is not None)
+            print(f"📥 {batch_id} ({job['kind']}): {answered}/{job['requests']} answered")
+            if job["kind"] == "extract":
+                ingest_extraction(registry, job, meta, results)
+            else:
+                ingest_questions(registry, job, results)
+            job["ingested"] = True
+            job["answered"] = answered
+            save_registry(registry)
+        save_registry(registry)
+
+        if not wait or not outstanding:
+            return outstanding
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-API mode for extraction and question generation")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser("extract", help="batch the extraction prompts for an archived corpus")
+    extract.add_argument("--corpus", default=DEFAULT_CORPUS)
+    extract.add_argument("--prompt", choices=sorted(PROMPTS), default="main")
+    extract.add_argument("--output", help="mnemonics CSV the results are appended to")
+
+    questions = commands.add_parser("questions", help="batch the question prompts for a mnemonics CSV")
+    questions.add_argument("input_file")
+    questions.add_argument("output_file")
+
+    poll_parser = commands.add_parser("poll", help="ingest finished batches")
+    poll_parser.add_argument("--wait", action="store_true", help="keep polling until every batch is ingested")
+    poll_parser.add_argument("--interval", type=float, default=30)
+
+    args = parser.parse_args()
+    client = make_client()
+    if args.command == "extract":
+        prepare_extraction(client, args.corpus, args.prompt, args.output)
+    elif args.command == "questions":
+        prepare_questions(client, args.input_file, args.output_file)
+    else:
+        outstanding = poll(client, args.wait, args.interval)
+        print(f"{outstanding} batches still running")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Check and time the lxml extractor against the original BeautifulSoup one.
+
+    python bench_extractors.py --archive backup.csv      # download the pages of a CSV into the corpus
+    python bench_extractors.py                           # compare and time both extractors on it
+    python bench_extractors.py --workers 16              # also time the multi-core ParsePool on it
+    python bench_extractors.py --corpus tests/fixtures/pages   # the committed fixture pages
+
+Every page must produce byte-identical (data, next_url) output from both; the
+mismatching pages are listed and the exit status is 1 if there are any.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+
+import bs4_extractor
+import lxml_extractor
+from fetcher import AsyncFetcher
+from parse_pool import ParsePool
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(SCRIPT_DIR, "corpus")
+MANIFEST = "manifest.json"
+
+
+def archive(csv_path, corpus_dir):
+    csv.field_size_limit(sys.maxsize)
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        urls = list(dict.fromkeys(row["url"] for row in csv.DictReader(f) if row.get("url")))
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    manifest_path = os.path.join(corpus_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    with AsyncFetcher(concurrency=8, per_host=4, min_interval=0.2) as fetcher:
+        pages = fetcher.get_all(urls)
+    for url, html in zip(urls, pages):
+        if not html:
+            continue
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()[:16] + ".html"
+        with open(os.path.join(corpus_dir, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+        manifest[name] = url
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Archived {len(manifest)} pages in {corpus_dir}")
+
+
+def load_corpus(corpus_dir):
+    with open(os.path.join(corpus_dir, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for name, url in sorted(manifest.items()):
+        with open(os.path.join(corpus_dir, name), encoding='utf-8') as f:
+            yield name, url, f.read()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def describe(label, durations):
+    durations = sorted(durations)
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    return (f"{label}: mean {statistics.mean(durations) * 1000:.2f} ms, median {statistics.median(durations) * 1000:.2f} ms, "
+            f"p95 {p95 * 1000:.2f} ms, total {sum(durations):.2f}s")
+
+
+def compare(corpus_dir):
+    if not lxml_extractor.available:
+        print("lxml is not installed: pip install lxml")
+        return 1
+
+    bs4_times, lxml_times, mismatches = [], [], []
+    for name, url, html in load_corpus(corpus_dir):
+        expected, bs4_time = timed(bs4_extractor.extract_page, html, url)
+        actual, lxml_time = timed(lxml_extractor.extract_page, html, url)
+        bs4_times.append(bs4_time)
+        lxml_times.append(lxml_time)
+        if json.dumps(expected, ensure_ascii=False) != json.dumps(actual, ensure_ascii=False):
+            mismatches.append((name, url))
+
+    if not bs4_times:
+        print(f"No pages in {corpus_dir}, archive some with --archive first")
+        return 1
+
+    print(f"{len(bs4_times)} pages")
+    print(describe("bs4 + html.parser", bs4_times))
+    print(describe("lxml single pass ", lxml_times))
+    print(f"Speedup: {sum(bs4_times) / sum(lxml_times):.1f}x")
+    if mismatches:
+        print(f"❌ {len(mismatches)} pages differ:")
+        for name, url in mismatches:
+            print(f"  - {name}: {url}")
+        return 1
+    print("✅ Output identical on every page")
+    return 0
+
+
+def scaling(corpus_dir, workers):
+    """
+    Throughput of the ParsePool with `workers` processes against a single in-process parser.
+    """
+    pages = [(html, url) for _, url, html in load_corpus(corpus_dir)]
+    with ParsePool(workers=0) as serial:
+        _, serial_time = timed(lambda: list(serial.map(pages)))
+    with ParsePool(workers=workers) as pool:
+        # Start the workers before timing
+        list(pool.map(pages[:workers]))
+        results, pool_time = timed(lambda: list(pool.map(pages)))
+    print(f"ParsePool: {len(results)} pages, 1 process {serial_time:.2f}s, {workers} processes {pool_time:.2f}s "
+          f"({serial_time / pool_time:.1f}x, {len(pages) / pool_time:.0f} pages/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory of archived pages")
+    parser.add_argument("--archive", metavar="CSV", help="download the urls of this CSV into the corpus first")
+    parser.add_argument("--workers", type=int, help="also measure ParsePool scaling with this many processes")
+    args = parser.parse_args()
+
+    if args.archive:
+        archive(args.archive, args.corpus)
+    status = compare(args.corpus)
+    if args.workers and lxml_extractor.available:
+        scaling(args.corpus, args.workers)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
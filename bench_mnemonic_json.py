@@ -0,0 +1,120 @@
+"""
+Time mnemonic_json.decode against the hand-written decoders it replaced.
+
+    python bench_mnemonic_json.py                              # backup.csv and mammoth_memory_elements.csv
+    python bench_mnemonic_json.py some.csv --repeat 20
+
+Each decoder runs over every concept_and_mnemonic payload of the CSVs. For each
+old code path the number of payloads it decodes, its time, and the payloads
+where its result differs from decode() are reported (counter-help.py's
+.replace('json', '') for example corrupts entries containing "json").
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+import mnemonic_json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSVS = [os.path.join(SCRIPT_DIR, "backup.csv"), os.path.join(SCRIPT_DIR, "mammoth_memory_elements.csv")]
+
+
+def _as_items(data):
+    return data if isinstance(data, list) else [data]
+
+
+def category_split_decoder(payload):
+    # category_split.py process_csv_file / csv_to_json_array
+    cleaned = payload.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    return _as_items(json.loads(cleaned.strip()))
+
+
+def question_decoder(payload):
+    # question.py process_json_entry
+    cleaned = payload.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:].strip()
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3].strip()
+    if not (cleaned.startswith('[') or cleaned.startswith('{')):
+        raise ValueError("doesn't start with [ or {")
+    return json.loads(cleaned)
+
+
+def helper_decoder(payload):
+    # helper.py clean_json_field
+    cleaned = re.sub(r"^```json\s*|\s*```$", "", payload.strip(), flags=re.IGNORECASE)
+    return _as_items(json.loads(cleaned.replace('""', '"')))
+
+
+def counter_help_decoder(payload):
+    # counter-help.py add_mnemonic_counts
+    return json.loads(payload.strip().strip('```').replace('json', '').strip())
+
+
+OLD_DECODERS = {
+    "category_split": category_split_decoder,
+    "question": question_decoder,
+    "helper": helper_decoder,
+    "counter-help": counter_help_decoder,
+}
+
+
+def load_payloads(paths):
+    csv.field_size_limit(sys.maxsize)
+    payloads = []
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as f:
+            payloads.extend(row["concept_and_mnemonic"] for row in csv.DictReader(f) if row.get("concept_and_mnemonic"))
+    return payloads
+
+
+def run(decoder, payloads, repeat):
+    results = []
+    start = time.perf_counter()
+    for i in range(repeat):
+        for payload in payloads:
+            try:
+                result = decoder(payload)
+            except ValueError:
+                result = None
+            if i == 0:
+                results.append(result)
+    return results, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csvs", nargs="*", default=DEFAULT_CSVS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.csvs)
+    print(f"{len(payloads)} payloads from {', '.join(os.path.basename(p) for p in args.csvs)} "
+          f"(backend: {'orjson' if mnemonic_json.orjson else 'json'})")
+
+    expected, new_time = run(mnemonic_json.decode_items, payloads, args.repeat)
+    decoded = sum(1 for result in expected if result is not None)
+    print(f"{'mnemonic_json':>15}: {decoded} decoded, {new_time * 1000:.1f} ms")
+
+    for name, decoder in OLD_DECODERS.items():
+        results, old_time = run(decoder, payloads, args.repeat)
+        ok = sum(1 for result in results if result is not None)
+        differs = sum(1 for result, new in zip(results, expected) if result is not None and result != new)
+        print(f"{name:>15}: {ok} decoded, {old_time * 1000:.1f} ms ({old_time / new_time:.1f}x slower), "
+              f"{differs} decoded differently")
+
+
+if __name__ == "__main__":
+    main()
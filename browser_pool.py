@@ -0,0 +1,191 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def headless_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    return options
+
+
+class PooledBrowser:
+    """
+    One warm headless Chrome owned by a BrowserPool.
+    Each lease gets a fresh tab which is closed again on release.
+    """
+
+    def __init__(self, options):
+        self.driver = webdriver.Chrome(options=options)
+        self.home_handle = self.driver.current_window_handle
+        self.pages = 0
+        self.broken = False
+
+    def get(self, url):
+        self.driver.get(url)
+        self.pages += 1
+
+    def open_tab(self):
+        self.driver.switch_to.new_window('tab')
+
+    def close_tab(self):
+        if self.driver.current_window_handle != self.home_handle:
+            self.driver.close()
+        self.driver.switch_to.window(self.home_handle)
+
+    def memory_mb(self):
+        """
+        Resident memory of chromedriver and all Chrome processes under it, or None without psutil.
+        """
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(self.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except (psutil.Error, AttributeError):
+            return None
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Error closing browser: {e}")
+
+
+class BrowserPool:
+    """
+    Pool of `size` warm headless Chrome instances shared by the Selenium scrapers.
+
+    A WebDriver session can only drive one tab at a time, so each walker leases a
+    whole browser and works in its own tab. Browsers are recycled on release once
+    they have loaded `max_pages` pages or grown past `max_memory_mb`.
+    """
+
+    def __init__(self, size=2, max_pages=200, max_memory_mb=1500, options=None, warm=True):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.options = options or headless_options()
+        self.recycled = 0
+
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+        if not warm:
+            # Browsers are started on first demand, e.g. when most pages are fetched statically
+            return
+
+        # Start all browsers up front in parallel so the first lease doesn't pay the cold start
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            for browser in executor.map(lambda _: PooledBrowser(self.options), range(size)):
+                self._all.append(browser)
+                self._idle.put(browser)
+
+    def _acquire(self):
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    start_new = len(self._all) < self.size
+                    if start_new:
+                        # Reserve the slot before the slow Chrome start-up
+                        self._all.append(None)
+                browser = self._start() if start_new else self._idle.get()
+            if browser is not None:
+                return browser
+            # None is a freed slot (a browser failed to start): go round and start one in it
+
+    def _start(self):
+        """
+        Start a browser in a slot reserved as None in _all. If Chrome fails to
+        start the slot is freed again, so the pool never shrinks for good.
+        """
+        try:
+            browser = PooledBrowser(self.options)
+        except Exception:
+            with self._lock:
+                self._all.remove(None)
+            # Wake a walker blocked waiting for an idle browser, to claim the slot
+            self._idle.put(None)
+            raise
+        with self._lock:
+            self._all[self._all.index(None)] = browser
+        return browser
+
+    def _needs_recycle(self, browser):
+        if browser.broken:
+            return True
+        if self.max_pages and browser.pages >= self.max_pages:
+            return True
+        memory = browser.memory_mb()
+        return bool(self.max_memory_mb and memory and memory >= self.max_memory_mb)
+
+    def _release(self, browser):
+        if not self._needs_recycle(browser):
+            self._idle.put(browser)
+            return
+
+        print(f"♻️ Recycling browser after {browser.pages} pages")
+        browser.quit()
+        with self._lock:
+            # The old browser's slot is reserved for its replacement
+            self._all[self._all.index(browser)] = None
+            self.recycled += 1
+        try:
+            replacement = self._start()
+        except Exception as e:
+            print(f"⚠️ Could not start a replacement browser, the next lease will retry: {e}")
+            return
+        self._idle.put(replacement)
+
+    @contextmanager
+    def tab(self):
+        """
+        Lease a browser from the pool, blocking until one is free, and yield it with a fresh tab open.
+        """
+        browser = self._acquire()
+        try:
+            browser.open_tab()
+            yield browser
+        finally:
+            try:
+                browser.close_tab()
+            except Exception as e:
+                # Broken session, force a recycle rather than handing it out again
+                print(f"⚠️ Error closing tab: {e}")
+                browser.broken = True
+            self._release(browser)
+
+    def map(self, func, items):
+        """
+        Run func(item) for every item with up to `size` walkers in parallel.
+        Results are returned in input order.
+        """
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(func, items))
+
+    def close(self):
+        with self._lock:
+            for browser in self._all:
+                if browser is not None:
+                    browser.quit()
+            self._all = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
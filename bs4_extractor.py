@@ -0,0 +1,118 @@
+"""
+The original BeautifulSoup + html.parser mnemonic extractor (MnemonicScraper in
+auto-scraper.py). It is the reference output for lxml_extractor, which falls
+back to it for pages that libxml2 would parse into a different tree.
+"""
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+
+# Spaced dashes that separate the word from its definition in the h1, in order of preference
+HEADING_DASHES = (" – ", " - ")
+
+
+def split_heading(h1_text):
+    """
+    (word, definition) from an h1 like "Proton – a positively charged particle",
+    or None when it has no spaced dash. Hyphens inside words ("Eth-", "X-ray")
+    don't split.
+    """
+    for dash in HEADING_DASHES:
+        if dash in h1_text:
+            word, _, definition = h1_text.partition(dash)
+            return word, definition
+    return None
+
+
+# Go to next page in list
+def next_page_url(soup, current_url):
+    next_div = soup.find('div', class_='page-next')
+    if next_div and next_div.find('a'):
+        next_url = next_div.find('a')['href']
+        return urljoin(current_url, next_url)
+    return None
+
+
+def extract(soup, url):
+    word = None
+    definition = None
+
+    # Assume word/concept is the first h1 tag
+    h1_tag = soup.find('h1')
+    if h1_tag:
+        h1_text = h1_tag.text.strip().replace('\xa0', ' ')
+
+        # Assume – or - seperates word from definition if in first h1 tag
+        split = split_heading(h1_text)
+        if split:
+            word, definition = split
+        else:
+            # Otherwise, take next tag
+            word = h1_tag.text.strip()
+            if h1_tag.find_next_sibling():
+                definition = h1_tag.find_next_sibling().text.strip()
+
+    # Look only at main content
+    main_content = soup.find("div", id="mainContent")
+    if main_content == None:
+        return None
+
+    last_img = None
+    found_after_img = False  
+
+    mnemonics = []
+    highlighted_text = []
+    mnemonic_set = set()
+    images = []
+
+     # Iterate through all tags
+    for tag in main_content.find_all():  
+        if tag.name == "img":
+            src = tag.get('src')
+            if src:
+                full_url = urljoin(url, src)
+                images.append(full_url)
+
+            # Since maybe multiple mnemonics per page, reset after each image - assume multiple images with red text means multiple mnemonics
+            last_img = tag 
+            found_after_img = False  
+
+        # red text is marker for mnemonic
+        elif tag.name in ["p", "figcaption"] and not found_after_img:
+            red_text = tag.find_all(lambda el: el.name == "span" and (
+                "style" in el.attrs and "#ff0000" in el["style"].replace(" ", "").lower()
+            ))
+
+            # Sometimes black text interspersed within red text span - remove it
+            if red_text:
+                for e in red_text:
+                    nested_black_span = e.find(lambda el: el.name == "span" and (
+                        "style" in el.attrs and "#000000" in el["style"].replace(" ", "").lower()))
+
+                    if not nested_black_span:
+                        if "NOTE" not in e.text.strip():  
+                            highlighted_text.append(e.text.strip())
+
+            if red_text and tag not in mnemonic_set and "NOTE" not in tag.text.strip():
+                mnemonic_set.add(tag)
+                mnemonics.append(tag.text.strip())
+                if last_img:
+                    found_after_img = True  
+
+    return {
+        'url': url,
+        'word': word,
+        'definition': definition,
+        'mnemonic': mnemonics,
+        'highlighted_text': highlighted_text,
+        'images': images
+    }
+
+
+def extract_page(content, url):
+    """
+    Parse once and return (data, next_url), like MnemonicScraper.process_page.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    return extract(soup, url), next_page_url(soup, url)
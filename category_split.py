@@ -1,9 +1,13 @@
 import csv
+import gzip
+import hashlib
 import json
 import os
-import re
+import sys
 from urllib.parse import urlparse
-from collections import defaultdict
+
+from extraction_schema import with_ids
+from mnemonic_json import FIELD, iter_rows
 
 def extract_subject_from_url(url):
     """
@@ -24,175 +28,289 @@ def extract_subject_from_url(url):
         print(f"Error parsing URL {url}: {e}")
         return 'unknown'
 
-def process_csv_file(csv_filename):
+class JsonArrayWriter:
     """
-    Process the CSV file and organize JSON data by subject.
+    Writes a JSON array one item at a time. The file is byte-identical to
+    json.dump(items, f, indent=2, ensure_ascii=False), without holding the items.
+    It is written to a .tmp file that only replaces `path` on close().
     """
-    # Dictionary to store data organized by subject
-    subjects_data = defaultdict(list)
-    
-    try:
-        with open(csv_filename, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                url = row.get('url', '').strip()
-                concept_json = row.get('concept_and_mnemonic', '').strip()
-                
-                if not url or not concept_json:
-                    print(f"Skipping row with missing data: {row}")
-                    continue
-                
-                # Extract subject from URL
-                subject = extract_subject_from_url(url)
-                
-                try:
-                    # Clean the JSON data - remove markdown code block markers
-                    cleaned_json = concept_json.strip()
-                    
-                    # Remove ```json and ``` markers if present
-                    if cleaned_json.startswith('```json'):
-                        cleaned_json = cleaned_json[7:]  # Remove ```json
-                    elif cleaned_json.startswith('```'):
-                        cleaned_json = cleaned_json[3:]   # Remove ```
-                    
-                    if cleaned_json.endswith('```'):
-                        cleaned_json = cleaned_json[:-3]  # Remove trailing ```
-                    
-                    cleaned_json = cleaned_json.strip()
-                    
-                    # Parse the cleaned JSON data
-                    json_data = json.loads(cleaned_json)
-                    
-                    # Handle both single objects and arrays
-                    if isinstance(json_data, list):
-                        # Add all items in the list to the subject
-                        subjects_data[subject].extend(json_data)
-                    else:
-                        # Single object, add it to the list
-                        subjects_data[subject].append(json_data)
-                        
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON for URL {url}: {e}")
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.file = open(path + '.tmp', 'w', encoding='utf-8')
+
+    def write(self, item):
+        text = json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+        self.file.write(("[\n  " if self.count == 0 else ",\n  ") + text)
+        self.count += 1
+
+    def close(self, commit=True):
+        if commit:
+            self.file.write("\n]" if self.count else "[]")
+        self.file.close()
+        _finish(self.path, commit)
+
+
+class JsonLinesWriter:
+    """
+    Compact JSON, one item per line; gzip-compressed when the path ends in .gz.
+    Written atomically like JsonArrayWriter.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.file = _open_text(path + '.tmp', 'w', gzipped=path.endswith('.gz'))
+
+    def write(self, item):
+        self.file.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.count += 1
+
+    def close(self, commit=True):
+        self.file.close()
+        _finish(self.path, commit)
+
+
+def _open_text(path, mode, gzipped=None):
+    if gzipped if gzipped is not None else path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _finish(path, commit):
+    if commit:
+        os.replace(path + '.tmp', path)
+    else:
+        os.remove(path + '.tmp')
+
+
+FORMATS = {"json": JsonArrayWriter, "jsonl": JsonLinesWriter, "jsonl.gz": JsonLinesWriter}
+
+
+def open_writer(path_without_extension, fmt):
+    return FORMATS[fmt](f"{path_without_extension}.{fmt}")
+
+
+def subject_path(categories_dir, subject, fmt):
+    return os.path.join(categories_dir, f"{subject}.{fmt}")
+
+
+def write_all_subjects(categories_dir, subjects, fmt="json"):
+    """
+    all_subjects, assembled line by line from the per-subject files (in `subjects`
+    order) so no subject is ever loaded whole. In JSON it is {subject: [items]}
+    with indent=2; in JSON lines every line is {"subject": ..., "item": ...}.
+    Returns the path written.
+    """
+    path = subject_path(categories_dir, 'all_subjects', fmt)
+    with _open_text(path + '.tmp', 'w', gzipped=path.endswith('.gz')) as out:
+        for i, subject in enumerate(subjects):
+            with _open_text(subject_path(categories_dir, subject, fmt), 'r') as f:
+                if fmt != "json":
+                    prefix = f'{{"subject":{json.dumps(subject, ensure_ascii=False)},"item":'
+                    for line in f:
+                        out.write(prefix + line.rstrip("\n") + "}\n")
                     continue
-    
+                out.write(("{\n" if i == 0 else ",\n") + f"  {json.dumps(subject, ensure_ascii=False)}: ")
+                for n, line in enumerate(f):
+                    # The opening [ follows the key; everything after it moves in one level
+                    out.write(line if n == 0 else "  " + line)
+        if fmt == "json":
+            out.write("\n}" if subjects else "{}")
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def split_csv(csv_filename, categories_dir='categories', combined_filename=None, fmt="json", categories=True,
+              subjects=None):
+    """
+    Read the CSV once and stream its entries into every output as it goes: one file
+    per subject and all_subjects (with `categories`), and the combined array of
+    all entries (with `combined_filename`, given without extension). Memory
+    stays flat whatever the input size.
+
+    fmt "json" writes the same pretty JSON as before; "jsonl" and "jsonl.gz" write
+    compact JSON lines, where all_subjects lines are {"subject": ..., "item": ...}.
+    With `subjects`, only those subject files are rewritten (rows of other
+    subjects aren't even decoded) and all_subjects is left to the caller.
+    Every file replaces the old one only once it is complete.
+    Returns {subject: item count}, or None if the CSV couldn't be read.
+    """
+    subject_writers = {}
+    combined = open_writer(combined_filename, fmt) if combined_filename else None
+    if categories:
+        # Create categories directory if it doesn't exist
+        os.makedirs(categories_dir, exist_ok=True)
+    where = None
+    if subjects is not None:
+        def where(row):
+            return extract_subject_from_url((row.get('url') or '').strip()) in subjects
+
+    ok = False
+    try:
+        # Each row is read and decoded once, streaming
+        for row, items, error in iter_rows(csv_filename, where=where):
+            url = (row.get('url') or '').strip()
+
+            if not url or (items is None and error is None):
+                print(f"Skipping row with missing data: {row}")
+                continue
+
+            if error is not None:
+                print(f"Error parsing JSON for URL {url}: {error}")
+                continue
+
+            # Extract subject from URL; single objects were already wrapped in a list
+            subject = extract_subject_from_url(url)
+            if categories and subject not in subject_writers:
+                subject_writers[subject] = open_writer(os.path.join(categories_dir, subject), fmt)
+
+            # Entries keep the stable id given at extraction; older rows get theirs here
+            for item in with_ids(url, items):
+                if categories:
+                    subject_writers[subject].write(item)
+                if combined:
+                    combined.write(item)
+        ok = True
+
     except FileNotFoundError:
         print(f"Error: Could not find CSV file '{csv_filename}'")
-        return
+        return None
     except Exception as e:
         print(f"Error reading CSV file: {e}")
-        return
-    
-    # Create categories directory if it doesn't exist
-    categories_dir = 'categories'
-    os.makedirs(categories_dir, exist_ok=True)
-    
-    # Write JSON files for each subject
-    for subject, data in subjects_data.items():
-        filename = f"{subject}.json"
-        filepath = os.path.join(categories_dir, filename)
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as jsonfile:
-                json.dump(data, jsonfile, indent=2, ensure_ascii=False)
-            
-            print(f"Created {filepath} with {len(data)} items")
-            
-        except Exception as e:
-            print(f"Error writing file {filepath}: {e}")
-    
-    # Create the all_subjects.json file organized by category
-    all_subjects_data = dict(subjects_data)  # Convert defaultdict to regular dict
-    
+        return None
+    finally:
+        # A failed run leaves the previous files in place
+        for writer in [*subject_writers.values(), combined]:
+            if writer:
+                writer.close(commit=ok)
+
+    counts = {subject: writer.count for subject, writer in subject_writers.items()}
+    if categories:
+        for subject, writer in subject_writers.items():
+            print(f"Created {writer.path} with {writer.count} items")
+        if subjects is None:
+            all_subjects_filepath = write_all_subjects(categories_dir, list(counts), fmt)
+            print(f"Created {all_subjects_filepath} with all {sum(counts.values())} items organized by category")
+            print(f"\nProcessing complete! Created {len(counts)} category files:")
+            for subject, count in counts.items():
+                print(f"  - {subject}: {count} items")
+    if combined:
+        print(f"Successfully converted CSV to JSON!")
+        print(f"Created {combined.path} with {combined.count} total items")
+    return counts
+
+
+def _manifest_path(categories_dir):
+    # A dotfile, so globs over categories/*.json don't pick it up
+    return os.path.join(categories_dir, '.manifest.json')
+
+
+def scan_csv(csv_filename):
+    """
+    Hash the CSV without decoding it: a content hash per source URL, and per
+    subject a digest of its rows' hashes in order, plus the subjects in order
+    of first appearance. A subject's digest changes exactly when its file would.
+    """
+    csv.field_size_limit(sys.maxsize)
+    urls, digests = {}, {}
+    with open(csv_filename, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            url = (row.get('url') or '').strip()
+            payload = (row.get(FIELD) or '').strip()
+            if not url or not payload:
+                continue
+            row_hash = hashlib.sha256(f"{url}\0{payload}".encode()).hexdigest()
+            # A URL scraped twice keeps both rows
+            urls[url] = row_hash if url not in urls else hashlib.sha256((urls[url] + row_hash).encode()).hexdigest()
+            digests.setdefault(extract_subject_from_url(url), hashlib.sha256()).update(row_hash.encode())
+    return urls, {subject: digest.hexdigest() for subject, digest in digests.items()}
+
+
+def update_categories(csv_filename, categories_dir='categories', fmt="json"):
+    """
+    Incremental process_csv_file: rebuild only the subjects whose source rows
+    changed since the last run, going by the per-URL content hashes stored in
+    categories/.manifest.json. Files of untouched subjects are not rewritten,
+    so they stay byte-identical. Without a manifest (or after a format change)
+    every subject is rebuilt once.
+    """
     try:
-        all_subjects_filepath = os.path.join(categories_dir, 'all_subjects.json')
-        with open(all_subjects_filepath, 'w', encoding='utf-8') as jsonfile:
-            json.dump(all_subjects_data, jsonfile, indent=2, ensure_ascii=False)
-        
-        total_items = sum(len(data) for data in subjects_data.values())
-        print(f"Created {all_subjects_filepath} with all {total_items} items organized by category")
-        
-    except Exception as e:
-        print(f"Error writing all_subjects.json file: {e}")
-    
-    print(f"\nProcessing complete! Created {len(subjects_data)} category files:")
-    for subject, data in subjects_data.items():
-        print(f"  - {subject}: {len(data)} items")
+        urls, digests = scan_csv(csv_filename)
+    except FileNotFoundError:
+        print(f"Error: Could not find CSV file '{csv_filename}'")
+        return None
+
+    manifest_path = _manifest_path(categories_dir)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+    if manifest.get('format') != fmt:
+        manifest = {}
+    old_urls, old_digests = manifest.get('urls', {}), manifest.get('subjects', {})
+
+    changed_urls = [url for url, row_hash in urls.items() if old_urls.get(url) != row_hash]
+    removed_urls = [url for url in old_urls if url not in urls]
+    # A subject that only had undecodable rows has no file, and never needs one
+    changed = {subject for subject, digest in digests.items() if old_digests.get(subject) != digest}
+    removed = [subject for subject in old_digests if subject not in digests]
+    print(f"{len(changed_urls)} new or changed and {len(removed_urls)} removed URLs; "
+          f"{len(changed)} of {len(digests)} subjects to rebuild")
+
+    if changed:
+        counts = split_csv(csv_filename, categories_dir, fmt=fmt, subjects=changed)
+        if counts is None:
+            return None
+        # Changed subjects whose rows all failed to decode keep no stale file
+        removed += [subject for subject in changed if subject not in counts]
+    for subject in removed:
+        path = subject_path(categories_dir, subject, fmt)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"Removed {path}")
+
+    if changed or removed:
+        present = [subject for subject in digests if os.path.exists(subject_path(categories_dir, subject, fmt))]
+        print(f"Created {write_all_subjects(categories_dir, present, fmt)} from {len(present)} category files")
+    else:
+        print("Categories are up to date")
+
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({"csv": os.path.basename(csv_filename), "format": fmt, "subjects": digests, "urls": urls}, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return sorted(changed)
+
+
+def process_csv_file(csv_filename, fmt="json"):
+    """
+    Process the CSV file and organize JSON data by subject.
+    """
+    return split_csv(csv_filename, fmt=fmt)
+
+
+def combined_name(csv_filename, output_filename=None):
+    if output_filename is None:
+        # Create output filename based on input filename
+        return f"{os.path.splitext(csv_filename)[0]}_converted"
+    for fmt in FORMATS:
+        if output_filename.endswith("." + fmt):
+            return output_filename[:-len(fmt) - 1]
+    return output_filename
 
-def csv_to_json_array(csv_filename, output_filename=None):
+
+def csv_to_json_array(csv_filename, output_filename=None, fmt="json"):
     """
     Convert CSV file to a single JSON file containing an array of all JSON objects.
     
     Args:
         csv_filename (str): Path to the input CSV file
         output_filename (str): Path to the output JSON file (optional)
+        fmt (str): "json", "jsonl" or "jsonl.gz"
     """
-    if output_filename is None:
-        # Create output filename based on input filename
-        base_name = os.path.splitext(csv_filename)[0]
-        output_filename = f"{base_name}_converted.json"
-    
-    all_items = []
-    
-    try:
-        with open(csv_filename, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
-                url = row.get('url', '').strip()
-                concept_json = row.get('concept_and_mnemonic', '').strip()
-                
-                if not url or not concept_json:
-                    print(f"Skipping row with missing data: {row}")
-                    continue
-                
-                try:
-                    # Clean the JSON data - remove markdown code block markers
-                    cleaned_json = concept_json.strip()
-                    
-                    # Remove ```json and ``` markers if present
-                    if cleaned_json.startswith('```json'):
-                        cleaned_json = cleaned_json[7:]  # Remove ```json
-                    elif cleaned_json.startswith('```'):
-                        cleaned_json = cleaned_json[3:]   # Remove ```
-                    
-                    if cleaned_json.endswith('```'):
-                        cleaned_json = cleaned_json[:-3]  # Remove trailing ```
-                    
-                    cleaned_json = cleaned_json.strip()
-                    
-                    # Parse the cleaned JSON data
-                    json_data = json.loads(cleaned_json)
-                    
-                    # Handle both single objects and arrays
-                    if isinstance(json_data, list):
-                        # Add all items in the list
-                        all_items.extend(json_data)
-                    else:
-                        # Single object, add it to the list
-                        all_items.append(json_data)
-                        
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON for URL {url}: {e}")
-                    continue
-    
-    except FileNotFoundError:
-        print(f"Error: Could not find CSV file '{csv_filename}'")
-        return
-    except Exception as e:
-        print(f"Error reading CSV file: {e}")
-        return
-    
-    # Write the JSON array to file
-    try:
-        with open(output_filename, 'w', encoding='utf-8') as jsonfile:
-            json.dump(all_items, jsonfile, indent=2, ensure_ascii=False)
-        
-        print(f"Successfully converted CSV to JSON!")
-        print(f"Created {output_filename} with {len(all_items)} total items")
-        
-    except Exception as e:
-        print(f"Error writing JSON file {output_filename}: {e}")
+    split_csv(csv_filename, combined_filename=combined_name(csv_filename, output_filename), fmt=fmt, categories=False)
 
 def main():
     """
@@ -205,25 +323,33 @@ def main():
     print("1. Convert CSV to categorized JSON files")
     print("2. Convert CSV to single JSON array")
     print("3. Do both")
+    print("4. Update categorized JSON files (only subjects whose rows changed)")
     
-    choice = input("Enter your choice (1, 2, or 3): ").strip()
-    
+    choice = input("Enter your choice (1, 2, 3, or 4): ").strip()
+    fmt = input("Output format (json, jsonl or jsonl.gz) [json]: ").strip() or "json"
+    if fmt not in FORMATS:
+        print("Invalid format. Please run again and choose json, jsonl or jsonl.gz.")
+        return
+
     if choice == '1':
         print(f"Processing CSV file: {csv_filename}")
         print("="*50)
-        process_csv_file(csv_filename)
+        process_csv_file(csv_filename, fmt)
     elif choice == '2':
         print(f"Converting CSV to JSON array: {csv_filename}")
         print("="*50)
-        csv_to_json_array(csv_filename)
+        csv_to_json_array(csv_filename, fmt=fmt)
     elif choice == '3':
+        # One pass over the CSV writes the categories and the combined array together
         print(f"Processing CSV file: {csv_filename}")
         print("="*50)
-        process_csv_file(csv_filename)
-        print("\n" + "="*50)
-        csv_to_json_array(csv_filename)
+        split_csv(csv_filename, combined_filename=combined_name(csv_filename), fmt=fmt)
+    elif choice == '4':
+        print(f"Updating categories from CSV file: {csv_filename}")
+        print("="*50)
+        update_categories(csv_filename, fmt=fmt)
     else:
-        print("Invalid choice. Please run again and select 1, 2, or 3.")
+        print("Invalid choice. Please run again and select 1, 2, 3, or 4.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
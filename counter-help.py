@@ -1,31 +1,27 @@
 import csv
-import json
 import os
-def add_mnemonic_counts(input_csv, output_csv):
-    count = 1  # Start counting from 1
+
+from extraction_schema import canonical, with_ids
+from mnemonic_json import iter_rows
+
+def add_mnemonic_ids(input_csv, output_csv):
+    count = 0
     updated_rows = []
 
-    with open(input_csv, newline='', encoding='utf-8') as infile:
-        reader = csv.DictReader(infile)
-        for row in reader:
-            json_blob = row['concept_and_mnemonic']
-            try:
-                # Strip triple backticks and optional 'json'
-                cleaned = json_blob.strip().strip('```').replace('json', '').strip()
-                data = json.loads(cleaned)
+    # Rows are streamed and each payload decoded once; fenced, bare and doubled-quote JSON all work
+    for row, data, error in iter_rows(input_csv):
+        if error is not None or data is None:
+            print(f"❌ Failed to parse JSON at {row['url']}: {error or 'empty payload'}")
+            updated_rows.append(row)  # Optionally keep row untouched
+            continue
 
-                if isinstance(data, list):
-                    for item in data:
-                        item['count'] = count
-                        count += 1
-                    # Rewrap JSON with code fence
-                    row['concept_and_mnemonic'] = f'```json\n{json.dumps(data, indent=4)}\n```'
-                    updated_rows.append(row)
-                else:
-                    print(f"⚠️ Unexpected JSON format at {row['url']}")
-            except Exception as e:
-                print(f"❌ Failed to parse JSON at {row['url']}: {e}")
-                updated_rows.append(row)  # Optionally keep row untouched
+        # Stable ids from (url, term, mnemonic) instead of a running count: inserting or
+        # reordering rows leaves every other id as it was. Ids set at extraction are kept
+        data = with_ids(row['url'], data)
+        count += len(data)
+        # Stored as canonical compact JSON, like the scrapers write it
+        row['concept_and_mnemonic'] = canonical(data)
+        updated_rows.append(row)
 
     # Write updated rows to a new CSV
     with open(output_csv, mode='w', newline='', encoding='utf-8') as outfile:
@@ -35,9 +31,9 @@ def add_mnemonic_counts(input_csv, output_csv):
         for row in updated_rows:
             writer.writerow(row)
 
-    print(f"\n✅ Done! {count - 1} mnemonics indexed and written to: {output_csv}")
+    print(f"\n✅ Done! {count} mnemonics identified and written to: {output_csv}")
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 filename = os.path.join(script_dir, "mammoth_memory_main_mnemonics.csv")
 # Example usage
-add_mnemonic_counts(filename, "mammoth_memory_with_counts.csv")
\ No newline at end of file
+add_mnemonic_ids(filename, "mammoth_memory_with_ids.csv")
\ No newline at end of file
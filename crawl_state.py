@@ -0,0 +1,128 @@
+import csv
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+
+DONE = "done"
+FAILED = "failed"
+
+
+def content_hash(text):
+    return hashlib.sha256((text or "").encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    """
+    On-disk crawl checkpoint store (SQLite).
+
+    One row per URL with its status, content hash, timestamps, and the chain it
+    belongs to with its position and next link. Skip checks are single primary-key
+    lookups, and a chain interrupted mid-way resumes from the page after the last
+    one that completed.
+    """
+
+    def __init__(self, path="crawl_state.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                chain TEXT,
+                position INTEGER,
+                next_url TEXT,
+                content_hash TEXT,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_chain ON pages (chain, position)")
+        self.conn.commit()
+
+    def _upsert(self, url, status, chain, position, next_url, page_hash):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO pages (url, status, chain, position, next_url, content_hash, first_seen, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    status = excluded.status,
+                    chain = COALESCE(excluded.chain, pages.chain),
+                    position = COALESCE(excluded.position, pages.position),
+                    next_url = excluded.next_url,
+                    content_hash = COALESCE(excluded.content_hash, pages.content_hash),
+                    updated_at = excluded.updated_at
+            """, (url, status, chain, position, next_url, page_hash, now, now))
+            self.conn.commit()
+
+    def mark_done(self, url, chain=None, position=None, next_url=None, page_hash=None):
+        self._upsert(url, DONE, chain, position, next_url, page_hash)
+
+    def mark_failed(self, url, chain=None, position=None):
+        self._upsert(url, FAILED, chain, position, None, None)
+
+    def status(self, url):
+        with self._lock:
+            row = self.conn.execute("SELECT status FROM pages WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url):
+        return self.status(url) == DONE
+
+    def next_url(self, url):
+        with self._lock:
+            row = self.conn.execute("SELECT next_url FROM pages WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def resume_point(self, chain):
+        """
+        Where to continue walking a chain that starts at `chain`.
+        Returns (url, position), or None if the chain was already walked to its end.
+        A start URL that is done but has no chain rows (seeded from an old CSV by
+        seed_from_csv) counts as walked: there is nothing recorded to resume from.
+        """
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT url, position, next_url FROM pages
+                WHERE chain = ? AND status = ?
+                ORDER BY position DESC LIMIT 1
+            """, (chain, DONE)).fetchone()
+        if row is None:
+            return None if self.is_done(chain) else (chain, 0)
+        url, position, next_url = row
+        if not next_url:
+            return None
+        return next_url, (position or 0) + 1
+
+    def count(self, status=DONE):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages WHERE status = ?", (status,)).fetchone()[0]
+
+    def seed_from_csv(self, csv_path, url_column="url"):
+        """
+        One-off migration: mark the URLs of an existing output CSV as done.
+        Only the url column is kept in memory. Does nothing if the state already has entries.
+        """
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM pages LIMIT 1").fetchone():
+                return 0
+
+        # Output rows carry large multi-line JSON cells
+        csv.field_size_limit(sys.maxsize)
+        now = time.time()
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            rows = ((row[url_column], DONE, now, now) for row in csv.DictReader(f) if row.get(url_column))
+            with self._lock:
+                cursor = self.conn.executemany(
+                    "INSERT OR IGNORE INTO pages (url, status, first_seen, updated_at) VALUES (?, ?, ?, ?)", rows)
+                self.conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
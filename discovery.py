@@ -0,0 +1,190 @@
+from collections import defaultdict
+from urllib.parse import parse_qs, urldefrag, urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from category_split import extract_subject_from_url
+
+BASE_URL = "https://mammothmemory.net"
+
+# Subject home pages, one per categories/*.json file
+SUBJECTS = [
+    "art", "biology", "business", "chemistry", "english", "geography", "history",
+    "languages", "maths", "memory", "music", "physics", "rs", "sports",
+]
+
+# Links that may lead to further index pages, so they are fetched during discovery
+INDEX_LINK_SELECTORS = [".grid-menu a"]
+# Links that always point at content pages, so they go straight into the frontier
+LEAF_LINK_SELECTORS = [".word-grid a"]
+
+# Upper bound on pages downloaded by one discovery walk
+MAX_PAGES = 5000
+# Upper bound on discovery HTML kept for the scheduler; pages past it are fetched again
+MAX_HTML = 1000
+
+
+def subject_home_urls(subjects=SUBJECTS):
+    return [f"{BASE_URL}/{subject}.html" for subject in subjects]
+
+
+def normalize_url(url):
+    return urldefrag(url)[0]
+
+
+def pagination_links(soup, page_url):
+    """
+    Links to other pages of the same listing, e.g. word-list.html?p=3&order=alpha
+    """
+    page_path = urlparse(page_url).path
+    links = []
+    for a in soup.find_all('a', href=True):
+        link = urljoin(page_url, a['href'])
+        parsed = urlparse(link)
+        if parsed.path == page_path and 'p' in parse_qs(parsed.query):
+            links.append(link)
+    return links
+
+
+def is_index_page(soup):
+    return bool(soup.select_one(".grid-menu") or soup.select_one(".word-grid"))
+
+
+class Frontier:
+    """
+    Deduplicated set of content-page URLs grouped by subject, in discovery order.
+    Pages that were already downloaded during discovery keep their HTML so the
+    scheduler doesn't fetch them again, up to `max_html` pages; the scheduler
+    pops each page's HTML once it has been parsed.
+    """
+
+    def __init__(self, max_html=MAX_HTML):
+        self.by_subject = defaultdict(list)
+        self.html = {}
+        self.max_html = max_html
+        # Queued pages that discovery never fetched because it hit max_pages
+        self.unexplored = 0
+        self._seen = set()
+
+    def add(self, url, html=None):
+        url = normalize_url(url)
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self.by_subject[extract_subject_from_url(url)].append(url)
+        if html is not None and len(self.html) < self.max_html:
+            self.html[url] = html
+        return True
+
+    def pop_html(self, url):
+        return self.html.pop(url, None)
+
+    def take_html(self):
+        """
+        Hand all kept HTML to the caller, e.g. HybridFetcher.add_prefetched(), so it isn't held twice.
+        """
+        html, self.html = self.html, {}
+        return html
+
+    def urls(self, subject=None):
+        if subject is not None:
+            return list(self.by_subject.get(subject, []))
+        return [url for urls in self.by_subject.values() for url in urls]
+
+    def __contains__(self, url):
+        return normalize_url(url) in self._seen
+
+    def __len__(self):
+        return len(self._seen)
+
+    def summary(self):
+        lines = [f"Frontier: {len(self)} pages in {len(self.by_subject)} subjects"]
+        for subject, urls in self.by_subject.items():
+            lines.append(f"  - {subject}: {len(urls)} pages")
+        return "\n".join(lines)
+
+
+async def discover(seed_urls, fetcher, follow_next=True, max_pages=MAX_PAGES, state=None, max_html=MAX_HTML):
+    """
+    Breadth-first walk from the seed pages (subject home pages, word lists or chain
+    starts) that builds the complete frontier up front.
+
+    Each level is fetched concurrently. Index pages contribute their .grid-menu,
+    .word-grid and pagination links. Content pages go into the frontier together
+    with their HTML, and with follow_next their page-next link is walked too.
+    Pages already done in the CrawlState `state` are not downloaded again; their
+    recorded next link is followed instead.
+
+    At most `max_pages` pages are downloaded. If the walk stops there, a warning
+    is printed and frontier.unexplored counts the queued pages left behind.
+    """
+    frontier = Frontier(max_html)
+    host = urlparse(BASE_URL).netloc
+    queued = set()
+    level = []
+    fetched = 0
+
+    def enqueue(url, next_level):
+        url = normalize_url(url)
+        if url not in queued and urlparse(url).netloc == host:
+            queued.add(url)
+            next_level.append(url)
+
+    for url in seed_urls:
+        enqueue(url, level)
+
+    while level and fetched < max_pages:
+        batch = level[:max_pages - fetched]
+        # Only non-empty once the budget is used up, so the walk stops after this level
+        unfetched = level[len(batch):]
+        next_level = []
+
+        if state is not None:
+            done = {url for url in batch if state.is_done(url)}
+            for url in [url for url in batch if url in done]:
+                frontier.add(url)
+                if follow_next and state.next_url(url):
+                    enqueue(state.next_url(url), next_level)
+            batch = [url for url in batch if url not in done]
+
+        pages = await fetcher.fetch_all(batch)
+        fetched += len(batch)
+
+        for url, html in zip(batch, pages):
+            if not html:
+                continue
+            soup = BeautifulSoup(html, 'html.parser')
+
+            if not is_index_page(soup) and soup.find("div", id="mainContent") is not None:
+                frontier.add(url, html)
+
+            for selector in INDEX_LINK_SELECTORS:
+                for a in soup.select(selector):
+                    if a.has_attr("href"):
+                        enqueue(urljoin(url, a["href"]), next_level)
+
+            for link in pagination_links(soup, url):
+                enqueue(link, next_level)
+
+            for selector in LEAF_LINK_SELECTORS:
+                for a in soup.select(selector):
+                    if a.has_attr("href"):
+                        leaf = normalize_url(urljoin(url, a["href"]))
+                        if leaf not in queued:
+                            queued.add(leaf)
+                            frontier.add(leaf)
+
+            if follow_next:
+                next_div = soup.find('div', class_='page-next')
+                next_link = next_div.find('a') if next_div else None
+                if next_link and next_link.get('href'):
+                    enqueue(urljoin(url, next_link['href']), next_level)
+
+        print(f"🔎 Discovery level done: {len(batch)} pages fetched, {len(frontier)} in frontier")
+        level = next_level + unfetched
+
+    if level:
+        frontier.unexplored = len(level)
+        print(f"⚠️ Discovery stopped at max_pages={max_pages}: {len(level)} queued pages were not fetched "
+              f"and only pages linked from the fetched ones are in the frontier")
+    return frontier
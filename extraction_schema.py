@@ -0,0 +1,125 @@
+import hashlib
+import json
+
+
+def canonical(items):
+    """
+    The stored form of extracted items: compact JSON, no code fence, so every
+    consumer can json.loads the field as it is.
+    """
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+
+# The field that names an entry, by prompt: term, name (get-name) or concept (get-trees)
+TERM_FIELDS = ("term", "name", "concept")
+
+
+def _squash(text):
+    return " ".join(str(text or "").split())
+
+
+def entry_id(url, item):
+    """
+    Stable id of an extracted entry, derived from its source URL, term and
+    mnemonic (whitespace-insensitive). It doesn't depend on the entry's
+    position, so shards can be processed separately and merged, and reruns
+    give unchanged entries the same id.
+    """
+    term = next((item.get(field) for field in TERM_FIELDS if item.get(field)), "")
+    payload = json.dumps([_squash(url), _squash(term), _squash(item.get("mnemonic"))], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def with_ids(url, items):
+    """
+    `items` with an "id" first in every entry; ids already present are kept.
+    """
+    return [{"id": item.get("id") or entry_id(url, item), **item} if isinstance(item, dict) else item
+            for item in items]
+
+
+def parse_items(output):
+    """
+    Items from a structured-output response ({"items": [...]}). A bare array is
+    accepted too. Raises ValueError if the output is neither.
+    """
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"response is not JSON: {e}") from e
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list):
+        raise ValueError("response has no items array")
+    return data
+
+
+class ItemSchema:
+    """
+    JSON schema for one extraction prompt's items, used as a strict structured
+    output format for the responses API.
+
+    Every field is a string or null, except `arrays`, which are lists of
+    strings. `required` fields must be non-empty for an item to be valid; an
+    item with no content at all is a page without a mnemonic and is dropped.
+    """
+
+    def __init__(self, name, fields, required, arrays=()):
+        self.name = name
+        self.fields = list(fields)
+        self.required = list(required)
+        self.arrays = set(arrays)
+
+    def json_schema(self):
+        properties = {
+            field: {"type": "array", "items": {"type": "string"}} if field in self.arrays
+            else {"type": ["string", "null"]}
+            for field in self.fields
+        }
+        item = {"type": "object", "properties": properties, "required": self.fields, "additionalProperties": False}
+        # Strict mode needs an object at the top level
+        return {
+            "type": "object",
+            "properties": {"items": {"type": "array", "items": item}},
+            "required": ["items"],
+            "additionalProperties": False,
+        }
+
+    def text_format(self):
+        return {"format": {"type": "json_schema", "name": self.name, "schema": self.json_schema(), "strict": True}}
+
+    def is_empty(self, item):
+        return not any(item.get(field) for field in self.fields)
+
+    def problems(self, item):
+        """
+        What is wrong with `item`, as a list of messages (empty when it is valid).
+        """
+        if not isinstance(item, dict):
+            return ["not an object"]
+        problems = []
+        for field in self.fields:
+            value = item.get(field)
+            if field in self.arrays:
+                if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                    problems.append(f'"{field}" must be a list of strings')
+            elif value is not None and not isinstance(value, str):
+                problems.append(f'"{field}" must be a string or null')
+        problems.extend(f'"{field}" is empty' for field in self.required
+                        if isinstance(item.get(field), (str, type(None))) and not (item.get(field) or "").strip())
+        return problems
+
+    def normalize(self, item):
+        # Field order and missing fields as in the schema, so stored rows are canonical
+        return {field: item.get(field, [] if field in self.arrays else None) for field in self.fields}
+
+
+# get-main-content.py, get-vocab-mnemonics.py, get-elements-mnemonic.py
+MNEMONIC = ItemSchema("mnemonics", ["term", "definition", "mnemonic", "image", "keywords"],
+                      required=["term", "mnemonic"], arrays=["keywords"])
+# get-multiple-mnemonics.py
+TERM = ItemSchema("mnemonics", ["term", "definition", "mnemonic"], required=["term", "mnemonic"])
+# get-name-mnemonics.py
+NAME = ItemSchema("names", ["name", "mnemonic"], required=["name", "mnemonic"])
+# get-trees-mnemonics.py
+TREE = ItemSchema("trees", ["concept", "definition", "mnemonic"], required=["concept", "mnemonic"])
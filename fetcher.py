@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class AsyncFetcher:
+    """
+    Shared HTTP fetch engine for the scrapers.
+
+    Keeps one requests.Session with pooled keep-alive connections per host and
+    runs up to `concurrency` requests in parallel on an asyncio loop. Each host
+    is limited to `per_host` requests in flight and at most one request start
+    every `min_interval` seconds, which is the politeness budget. The blocking
+    get() path is called from several threads (e.g. BrowserPool.map workers)
+    while the loop may be fetching too, so the host bookkeeping is shared under
+    a threading lock and both paths take permits from the same per-host
+    threading semaphore.
+    """
+
+    def __init__(self, concurrency=8, per_host=4, min_interval=0.2, timeout=20, headers=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._loop = None
+        self._semaphore = None
+        self._host_semaphores = {}
+        self._host_locks = {}
+        self._host_last_start = {}
+        # Per-host limit shared by fetch() and get(); thread-safe, so kept across loops
+        self._host_limits = {}
+        self._bookkeeping = threading.Lock()
+
+        # Number of network fetches per URL
+        self.fetch_counts = Counter()
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one loop, so rebuild them if asyncio.run() is called again
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._host_semaphores = {}
+            self._host_locks = {}
+
+    def _claim_start(self, host):
+        # Reserve the next start slot for this host and return how long to wait for it.
+        # Reserving before sleeping keeps concurrent callers min_interval apart.
+        with self._bookkeeping:
+            now = time.monotonic()
+            start = max(now, self._host_last_start.get(host, 0) + self.min_interval)
+            self._host_last_start[host] = start
+            return start - now
+
+    async def _wait_for_turn(self, host):
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self._claim_start(host)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    def _host_limit(self, host):
+        with self._bookkeeping:
+            return self._host_limits.setdefault(host, threading.Semaphore(self.per_host))
+
+    async def _acquire_host(self, host):
+        """
+        Take one of the host's per_host permits without blocking the loop; a
+        wait for a permit held by get() runs in a worker thread.
+        """
+        limit = self._host_limit(host)
+        if limit.acquire(blocking=False):
+            return limit
+        acquired = self._loop.run_in_executor(None, limit.acquire)
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The permit still arrives; hand it back once it does
+            acquired.add_done_callback(lambda _: limit.release())
+            raise
+        return limit
+
+    def _get(self, url):
+        with self._bookkeeping:
+            self.fetch_counts[url] += 1
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    async def fetch(self, url):
+        """
+        Fetch a URL and return its body text, or None on error.
+        """
+        self._bind_loop()
+        host = urlparse(url).netloc
+        # Queues the loop's own requests, so at most per_host of them wait on the shared limit
+        host_semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+
+        async with self._semaphore, host_semaphore:
+            limit = await self._acquire_host(host)
+            try:
+                await self._wait_for_turn(host)
+                return await self._loop.run_in_executor(self._executor, self._get, url)
+            except requests.RequestException as e:
+                print(f"Error getting page {url}: {e}")
+                return None
+            finally:
+                limit.release()
+
+    async def fetch_all(self, urls):
+        """
+        Fetch many URLs concurrently. Results are returned in the same order as `urls`.
+        """
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def get(self, url):
+        """
+        Blocking fetch for callers outside the event loop. Still uses the pooled session.
+        """
+        host = urlparse(url).netloc
+        with self._host_limit(host):
+            wait = self._claim_start(host)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                return self._get(url)
+            except requests.RequestException as e:
+                print(f"Error getting page {url}: {e}")
+                return None
+
+    def get_all(self, urls):
+        """
+        Blocking wrapper around fetch_all().
+        """
+        return asyncio.run(self.fetch_all(urls))
+
+    def run(self, coro):
+        """
+        Run a coroutine that uses this fetcher to completion.
+        """
+        return asyncio.run(coro)
+
+    def total_fetches(self):
+        return sum(self.fetch_counts.values())
+
+    def fetches_per_url(self):
+        """
+        Average number of network fetches per unique URL. Should stay at 1.0
+        for a crawl that never downloads the same page twice.
+        """
+        if not self.fetch_counts:
+            return 0.0
+        return self.total_fetches() / len(self.fetch_counts)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
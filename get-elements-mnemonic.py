@@ -1,72 +1,72 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException
 from bs4 import BeautifulSoup
-import pandas as pd
 import os
-import time
 from urllib.parse import urljoin
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import LLMExecutor
+from browser_pool import BrowserPool
+from record_sink import shared_sink
+from llm_cache import LLMCache
+from html_pruner import HtmlPruner
+from html_chunker import ChunkedExtractor
+from extraction_schema import MNEMONIC
+from prompts import ELEMENT_EXTRACTION
+from page_waits import PageWaiter, main_content_html
 import hashlib
 from selenium.common.exceptions import ElementClickInterceptedException
 load_dotenv()
 api_key = os.getenv("API_KEY")
-client = OpenAI(
-    # This is the default and can be omitted
-    api_key=api_key
-)
+# Shared rate-limited LLM executor; the walkers' requests run concurrently within its RPM/TPM budget
+llm = LLMExecutor(api_key=api_key)
 
 
+# Readiness-based waits shared by all walkers
+waits = PageWaiter()
+
+# Persistent LLM response cache shared by all walkers
+llm_cache = LLMCache()
+
+# Compacts #mainContent before it is sent to the LLM
+pruner = HtmlPruner()
+
+# Schema-enforced structured output stored as canonical JSON
+chunked = ChunkedExtractor(llm_cache, llm, schema=MNEMONIC)
+
 class SeleniumContentScraper:
-    def __init__(self, start_url):
+    def __init__(self, start_url, pool):
         self.start_url = start_url
         self.visited_urls = set()
 
-        # Set up headless Chrome
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        self.driver = webdriver.Chrome(options=options)
-
-    def extract_mnemonic_with_llm(self, main_content_text):
-
-        response = client.responses.create(
-            model="gpt-4o",
-            instructions=f"""
-            This is the html file of a website that contains a mnemonic. Your task is to find:
-            - The main term being taught 
-            - The definition or defining features of the term
-            - The mnemonic used to remember it, which is usually a full sentence with the term and/or definitions in red.
-            - An image to aid in the memory of the mnemonic IF APPLICABLE
-            - Key words that rhyme or sound similar to the term which can be used to remember it. These are usually in red. Note that sometimes part of the keyword is highlighted in red, make sure that the keyword is always a full English word
-
-            If there is no mnemonic, keep the elements of the array empty or null. 
-
-            Respond with a JSON array, where each item is an object with:
-                - "term": The term being remembered
-                - "definition": If applicable, a definition of the term
-                - "mnemonic": the mnemonic used to remember the term and definition if applicable
-                - "image": Link to image source used to remember mnemonic if applicable
-                - "keywords": key words that sound similar to the term or definition that are used in the mnemonic if applicable""",
-        
+        # Browsers are leased from a shared warm pool instead of starting Chrome per scraper
+        self.pool = pool
+        self.browser = None
+
+    @property
+    def driver(self):
+        return self.browser.driver
+
+    def extract_mnemonic_with_llm(self, main_content_text, url=None):
+
+        # Cached on (model, prompt, page HTML), so unchanged pages cost no API call on reruns
+        return chunked.complete(
+            instructions=ELEMENT_EXTRACTION,
             input=main_content_text,
+            url=url,
         )
-        return response.output_text
 
         
     
     def get_content(self, url):
         try:
-            self.driver.get(url)
-            time.sleep(2)
+            self.browser.get(url)
+            waits.wait_for_main_content(self.driver)
             soup = BeautifulSoup(self.driver.page_source, 'html.parser')
             main_content = soup.find("div", id="mainContent")
-            main_text = str(main_content) if main_content else ""
+            main_text = pruner.prune(main_content, url)
             #print(main_text)
             # Extract mnemonic using LLM
-            mnemonic_json = self.extract_mnemonic_with_llm(main_text)
+            mnemonic_json = self.extract_mnemonic_with_llm(main_text, url)
 
             return {
                 'url': url,
@@ -84,64 +84,64 @@ class SeleniumContentScraper:
         try:
             next_button = self.driver.find_element(By.CLASS_NAME, 'pt-controls-next')
             if next_button.is_enabled():
+                previous_html = main_content_html(self.driver)
                 next_button.click()
-                time.sleep(1.5)  # wait for content to update
-                return True
+                # Returns as soon as the slide has actually changed, False if it never does
+                return waits.wait_for_slide_change(self.driver, previous_html)
         except (NoSuchElementException, ElementClickInterceptedException) as e:
             print(f"Next button issue: {e}")
         return False
 
     def scrape_all_pages(self):
-        current_url = self.start_url
-        all_data = []
-        seen_hashes = set()
-        count = 1
+        with self.pool.tab() as browser:
+            self.browser = browser
+            current_url = self.start_url
+            all_data = []
+            seen_hashes = set()
+            count = 1
 
-        self.driver.get(current_url)
-        time.sleep(2)
+            self.browser.get(current_url)
+            waits.wait_for_main_content(self.driver)
 
-        while True:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            main_content = soup.find("div", id="mainContent")
-            main_html = str(main_content) if main_content else ""
-            content_hash = hashlib.md5(main_html.encode('utf-8')).hexdigest()
+            while True:
+                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+                main_content = soup.find("div", id="mainContent")
+                main_html = str(main_content) if main_content else ""
+                content_hash = hashlib.md5(main_html.encode('utf-8')).hexdigest()
 
-            if content_hash in seen_hashes:
-                print("🔁 Page already seen. Stopping to prevent infinite loop.")
-                break
+                if content_hash in seen_hashes:
+                    print("🔁 Page already seen. Stopping to prevent infinite loop.")
+                    break
 
-            seen_hashes.add(content_hash)
+                seen_hashes.add(content_hash)
 
-            # Extract with LLM
-            mnemonic_json = self.extract_mnemonic_with_llm(main_html)
+                # Extract with LLM
+                mnemonic_json = self.extract_mnemonic_with_llm(pruner.prune(main_content, self.driver.current_url), self.driver.current_url)
 
-            data = {
-                'url': self.driver.current_url,
-                'mainContent': main_html,
-                'concept_and_mnemonic': mnemonic_json
-            }
+                data = {
+                    'url': self.driver.current_url,
+                    'mainContent': main_html,
+                    'concept_and_mnemonic': mnemonic_json
+                }
 
-            print(f"✅ Scraped page {count}: {self.driver.current_url}")
-            count += 1
-            all_data.append(data)
-            self.save_to_csv(data)
+                print(f"✅ Scraped page {count}: {self.driver.current_url}")
+                count += 1
+                all_data.append(data)
+                self.save_to_csv(data)
 
-            if not self.get_next_page():
-                print("⛔️ No more next pages.")
-                break
+                if not self.get_next_page():
+                    print("⛔️ No more next pages.")
+                    break
 
-        self.driver.quit()
-        return all_data
+            return all_data
 
-    def save_to_csv(self, data, filename="mammoth_memory_elements.csv"):
+    def save_to_csv(self, data, filename="mammoth_memory_elements.csv", on_saved=None):
         if data:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             file_path = os.path.join(script_dir, filename)
-            df = pd.DataFrame([{
-                "url": data["url"],
-                "concept_and_mnemonic": data["concept_and_mnemonic"]
-            }])
-            df.to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=False)
+            # One buffered, thread-safe sink per output file, shared by all walkers.
+            # on_saved runs once the row is on disk
+            shared_sink(file_path, ["url", "concept_and_mnemonic"]).write(data, on_saved)
             print(f"📁 Data saved to {file_path}")
         else:
             print("⚠️ No data to save")
@@ -163,9 +163,15 @@ def main():
         #"https://mammothmemory.net/chemistry/periodic-table/elements-of-the-periodic-table/elements-of-the-periodic-table.html"
     ]
 
-    for start_url in url_list:
-        scraper = SeleniumContentScraper(start_url)
-        scraper.scrape_all_pages()
+    with BrowserPool(size=1) as pool:
+        for start_url in url_list:
+            scraper = SeleniumContentScraper(start_url, pool)
+            scraper.scrape_all_pages()
+    print(waits.stats.summary())
+    print(llm_cache.summary())
+    print(llm.summary())
+    print(pruner.summary())
+    print(chunked.summary())
 
 if __name__ == "__main__":
     main()
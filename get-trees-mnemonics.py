@@ -1,46 +1,54 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
-import time
 from urllib.parse import urljoin
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import LLMExecutor
+from browser_pool import BrowserPool
+from record_sink import shared_sink, close_shared_sinks
+from llm_cache import LLMCache
+from html_pruner import HtmlPruner
+from html_chunker import ChunkedExtractor
+from extraction_schema import TREE
+from prompts import TREE_EXTRACTION
+from page_waits import PageWaiter
+from hybrid_fetcher import HybridFetcher
+from fetcher import AsyncFetcher
 
 load_dotenv()
 api_key = os.getenv("API_KEY")
-client = OpenAI(
-    # This is the default and can be omitted
-    api_key=api_key
-)
+# Shared rate-limited LLM executor; the walkers' requests run concurrently within its RPM/TPM budget
+llm = LLMExecutor(api_key=api_key)
 
 
+# Shared pooled HTTP fetcher
+fetcher = AsyncFetcher(concurrency=8, per_host=4, min_interval=0.2)
+
+# Readiness-based waits shared by all walkers
+waits = PageWaiter()
+
+# Persistent LLM response cache shared by all walkers
+llm_cache = LLMCache()
+
+# Compacts #mainContent before it is sent to the LLM
+pruner = HtmlPruner()
+
+# Schema-enforced structured output stored as canonical JSON
+chunked = ChunkedExtractor(llm_cache, llm, schema=TREE)
+
 class SeleniumContentScraper:
-    def __init__(self, start_url):
+    def __init__(self, start_url, hybrid):
         self.start_url = start_url
         self.visited_urls = set()
+        self.next_url = None
 
-        # Set up headless Chrome
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        self.driver = webdriver.Chrome(options=options)
-
-    def get_next_page_url(self):
-        try:
-            # Look for the 'page-next' div and then find the anchor inside it
-            next_div = self.driver.find_element(By.CLASS_NAME, 'page-next')
-            next_link = next_div.find_element(By.TAG_NAME, 'a')
-            next_url = next_link.get_attribute('href')
-            
-            if next_url:
-                return urljoin(self.driver.current_url, next_url)
-        except NoSuchElementException:
-            return None
+        # Static HTTP first, pooled headless browser only when the static page lacks #mainContent
+        self.hybrid = hybrid
 
+    def get_next_page_url(self, soup, current_url):
+        # Look for the 'page-next' div and then find the anchor inside it
+        next_div = soup.find('div', class_='page-next')
+        next_link = next_div.find('a') if next_div else None
+        if next_link and next_link.get('href'):
+            return urljoin(current_url, next_link['href'])
         return None
 
     def scrape_all_pages(self):
@@ -59,21 +67,17 @@ class SeleniumContentScraper:
                 all_data.append(data)
                 self.save_to_csv(data)
 
-            current_url = self.get_next_page_url()
-            time.sleep(0.5)
+            current_url = self.next_url
 
-        self.driver.quit()
         return all_data
 
-    def save_to_csv(self, data, filename="mammoth_memory_tree_mnemonics.csv"):
+    def save_to_csv(self, data, filename="mammoth_memory_tree_mnemonics.csv", on_saved=None):
         if data:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             file_path = os.path.join(script_dir, filename)
-            df = pd.DataFrame([{
-                "url": data["url"],
-                "concept_and_mnemonic": data["concept_and_mnemonic"]
-            }])
-            df.to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=False)
+            # One buffered, thread-safe sink per output file, shared by all walkers.
+            # on_saved runs once the row is on disk
+            shared_sink(file_path, ["url", "concept_and_mnemonic"]).write(data, on_saved)
             print(f"📁 Data saved to {file_path}")
         else:
             print("⚠️ No data to save")
@@ -81,29 +85,21 @@ class SeleniumContentScraper:
     
     def get_name_mnemonics(self, url):
         try:
-            self.driver.get(url)
-            time.sleep(2)
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            self.next_url = None
+            soup = self.hybrid.get_soup(url)
+            if soup is None:
+                return None
+            self.next_url = self.get_next_page_url(soup, url)
             main_content = soup.find("div", id="mainContent")
-            main_text = str(main_content) if main_content else ""
+            main_text = pruner.prune(main_content, url)
             #print(main_text)
             # Extract mnemonic using LLM
-            response = client.responses.create(
-                model="gpt-4o",
-                instructions= f"""
-                This is the HTML content of a webpage that contains mnemonics for trees. These mnemonics are somewhat complex. 
-               
-
-                Your task is to extract every tree the mnemonic is about, the defining features of the tree, and the mnemonic that ties them together.
-                Respond in this JSON format:
-                {{ "concept": "...", "definition": "...", "mnemonic": "..." }}""",
-                
-                
+            # Cached on (model, prompt, page HTML), so unchanged pages cost no API call on reruns
+            mnemonic_json = chunked.complete(
+                instructions=TREE_EXTRACTION,
                 input=main_text,
+                url=url,
             )
-    
-
-            mnemonic_json = response.output_text
 
             return {
                 'url': url,
@@ -123,9 +119,21 @@ def main():
     url_list_multiple = [
         "https://mammothmemory.net/memory/remembering-distinctive-tree-features/remembering-distinctive-tree-features/ash-tree.html"
     ]
-    for start_url in url_list_multiple:
-        scraper = SeleniumContentScraper(start_url)
-        scraper.scrape_all_pages()
+    # Chrome is only started if a page can't be read statically
+    with BrowserPool(size=1, warm=False) as pool:
+        hybrid = HybridFetcher(fetcher, pool, waits, routes_file=os.path.join(script_dir, "fetch_routes.json"))
+        for start_url in url_list_multiple:
+            scraper = SeleniumContentScraper(start_url, hybrid)
+            scraper.scrape_all_pages()
+        hybrid.save_routes()
+    # Flush the remaining rows rather than leaving them to the atexit hook
+    close_shared_sinks()
+    print(hybrid.summary())
+    print(waits.stats.summary())
+    print(llm_cache.summary())
+    print(llm.summary())
+    print(pruner.summary())
+    print(chunked.summary())
 
 
 
@@ -1,78 +1,78 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
-import time
+from functools import partial
 from urllib.parse import urljoin
 from dotenv import load_dotenv
-from openai import OpenAI
-import requests
+from llm_client import LLMExecutor
+from browser_pool import BrowserPool
+from record_sink import shared_sink, close_shared_sinks
+from llm_cache import LLMCache
+from prompts import VOCAB_EXTRACTION
+from html_pruner import HtmlPruner
+from html_chunker import ChunkedExtractor
+from extraction_schema import MNEMONIC
+from rule_extractor import RuleExtractor
+from page_waits import PageWaiter
+from hybrid_fetcher import HybridFetcher
+from fetcher import AsyncFetcher
+from discovery import discover
+from crawl_state import CrawlState, content_hash
 
 load_dotenv()
 api_key = os.getenv("API_KEY")
-client = OpenAI(
-    # This is the default and can be omitted
-    api_key=api_key
-)
+# Shared rate-limited LLM executor; the walkers' requests run concurrently within its RPM/TPM budget
+llm = LLMExecutor(api_key=api_key)
 
-class SeleniumContentScraper:
-    def __init__(self, start_url, driver=None):
-        self.start_url = start_url
-        self.visited_urls = set()
+# Shared pooled HTTP fetcher for index pages
+fetcher = AsyncFetcher(concurrency=8, per_host=4, min_interval=0.2)
 
-        if driver:
-            self.driver = driver  # Reuse shared driver
-            self._owns_driver = False
-        else:
-            # Create a new headless Chrome if no driver is passed
-            options = Options()
-            options.add_argument("--headless")
-            options.add_argument("--disable-gpu")
-            self.driver = webdriver.Chrome(options=options)
-            self._owns_driver = True
+# Readiness-based waits shared by all walkers
+waits = PageWaiter()
 
-    def close(self):
-        if self._owns_driver:
-            self.driver.quit()
+# Persistent LLM response cache shared by all walkers
+llm_cache = LLMCache()
 
-    def extract_mnemonic_with_llm(self, main_content_text):
+# Compacts #mainContent before it is sent to the LLM
+pruner = HtmlPruner()
 
-        response = client.responses.create(
-            model="gpt-4o",
-            instructions=f"""
-            This is the html file of a website that contains one or multiple mnemonics for remembering words from a different language. For each mnemonic, your task is to find:
-            - The main term being taught in the foreign language
-            - The definition of the term in English
-            - The mnemonic used to remember it, which is usually a full sentence with the term and/or definitions in red.
-            - An image to aid in the memory of the mnemonic IF APPLICABLE
-            - Key words that rhyme or sound similar to the term which can be used to remember it. These are usually in red. Note that sometimes part of the keyword is highlighted in red, make sure that the keyword is always a full English word
+# Splits very large pages into chunks that are extracted concurrently, with
+# schema-enforced structured output stored as canonical JSON
+chunked = ChunkedExtractor(llm_cache, llm, schema=MNEMONIC)
 
-            Respond with a JSON array, where each item is an object with:
-                - "term": The term being remembered
-                - "definition": The definition of the term
-                - "mnemonic": the mnemonic used to remember the term and definition if applicable
-                - "image": Link to image source used to remember mnemonic if applicable
-                - "keywords": key words that sound similar to the term or definition that are used in the mnemonic if applicable""",
-        
+# Deterministic red-span extraction tried before the LLM
+rules = RuleExtractor()
+
+class SeleniumContentScraper:
+    def __init__(self, start_url, hybrid, state):
+        self.start_url = start_url
+        self.next_url = None
+        # Persistent crawl checkpoints shared by all walkers
+        self.state = state
+
+        # Static HTTP first, pooled headless browser only when the static page lacks #mainContent
+        self.hybrid = hybrid
+
+    def extract_mnemonic_with_llm(self, main_content_text, url=None):
+
+        # Cached on (model, prompt, page HTML), so unchanged pages cost no API call on reruns
+        return chunked.complete(
+            instructions=VOCAB_EXTRACTION,
             input=main_content_text,
+            url=url,
         )
-        return response.output_text
 
         
     
     def get_content(self, url):
         try:
-            self.driver.get(url)
-            time.sleep(2)
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            self.next_url = None
+            soup = self.hybrid.get_soup(url)
+            if soup is None:
+                return None
+            self.next_url = self.get_next_page_url(soup, url)
             main_content = soup.find("div", id="mainContent")
-            main_text = str(main_content) if main_content else ""
-            #print(main_text)
-            # Extract mnemonic using LLM
-            mnemonic_json = self.extract_mnemonic_with_llm(main_text)
+            # Extract mnemonic with the red-span rules, using the LLM only when they aren't confident
+            mnemonic_json = rules.extract(
+                soup, url, lambda: self.extract_mnemonic_with_llm(pruner.prune(main_content, url), url))
 
             return {
                 'url': url,
@@ -84,18 +84,12 @@ class SeleniumContentScraper:
             return None
         
 
-    def get_next_page_url(self):
-        try:
-            # Look for the 'page-next' div and then find the anchor inside it
-            next_div = self.driver.find_element(By.CLASS_NAME, 'page-next')
-            next_link = next_div.find_element(By.TAG_NAME, 'a')
-            next_url = next_link.get_attribute('href')
-            
-            if next_url:
-                return urljoin(self.driver.current_url, next_url)
-        except NoSuchElementException:
-            return None
-
+    def get_next_page_url(self, soup, current_url):
+        # Look for the 'page-next' div and then find the anchor inside it
+        next_div = soup.find('div', class_='page-next')
+        next_link = next_div.find('a') if next_div else None
+        if next_link and next_link.get('href'):
+            return urljoin(current_url, next_link['href'])
         return None
 
     def scrape_all_pages(self):
@@ -103,61 +97,46 @@ class SeleniumContentScraper:
         all_data = []
         count = 1
 
-        while current_url and current_url not in self.visited_urls:
+        if current_url and not self.state.is_done(current_url):
             print(f"Scraping: {current_url}")
-            self.visited_urls.add(current_url)
             data = self.get_content(current_url)
 
             if data:
                 print(f"✅ Scraped page {count}")
                 count += 1
                 all_data.append(data)
-                self.save_to_csv(data)
+                # Checkpointed only once the row is on disk
+                self.save_to_csv(data, on_saved=partial(self.state.mark_done, current_url, page_hash=content_hash(data['mainContent'])))
+            else:
+                self.state.mark_failed(current_url)
 
-            #current_url = self.get_next_page_url()
-            time.sleep(0.5)
+            #current_url = self.next_url
 
         return all_data
 
-    def save_to_csv(self, data, filename="mammoth_memory_main_mnemonics.csv"):
+    def save_to_csv(self, data, filename="mammoth_memory_main_mnemonics.csv", on_saved=None):
         if data:
             script_dir = os.path.dirname(os.path.abspath(__file__))
             file_path = os.path.join(script_dir, filename)
-            df = pd.DataFrame([{
-                "url": data["url"],
-                "concept_and_mnemonic": data["concept_and_mnemonic"]
-            }])
-            df.to_csv(file_path, mode='a', header=not os.path.exists(file_path), index=False)
+            # One buffered, thread-safe sink per output file, shared by all walkers.
+            # on_saved runs once the row is on disk
+            shared_sink(file_path, ["url", "concept_and_mnemonic"]).write(data, on_saved)
             print(f"📁 Data saved to {file_path}")
         else:
             print("⚠️ No data to save")
 
-def get_div(url):
-    try:
-        time.sleep(1)  # Small delay for politeness
-        response = requests.get(url)
-        response.raise_for_status()  # Raise exception if HTTP error
-        soup = BeautifulSoup(response.text, 'html.parser')
-        main_content = soup.find("div", class_="word-grid")
-        main_text = str(main_content) if main_content else ""
-        return main_text
-    except Exception as e:
-        print(f"❌ Error fetching or parsing {url}: {e}")
-        return ""  
-    
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     filename = os.path.join(script_dir, "mammoth_memory_main_mnemonics.csv")
 
-    # Step 1: Load previously scraped URLs from existing CSV (if it exists)
-    already_scraped_urls = set()
+    # Step 1: Open the crawl checkpoint store. The first time, it is seeded from the existing CSV's urls
+    state = CrawlState(os.path.splitext(filename)[0] + "_state.db")
     if os.path.exists(filename):
         try:
-            df_existing = pd.read_csv(filename)
-            already_scraped_urls = set(df_existing["url"].dropna().tolist())
-            print(f"🧠 Found {len(already_scraped_urls)} previously scraped URLs.")
+            state.seed_from_csv(filename)
         except Exception as e:
             print(f"⚠️ Error reading existing CSV: {e}")
+    print(f"🧠 Found {state.count()} previously scraped URLs.")
 
 
     # url_list = [
@@ -202,67 +181,44 @@ def main():
     # ]
 
     #for start_url in url_list:
-    #    if start_url in already_scraped_urls:
+    #    if state.is_done(start_url):
     #        print(f"⏩ Skipping already scraped URL: {start_url}")
     #        continue
     #    scraper = SeleniumContentScraper(start_url)
     #    scraper.scrape_all_pages()
-    num = 2
-    
-    visited_urls = set()
-    total_urls = []
-    
-    def find_next_page_link_from_url(url):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise error for bad status
-        except requests.RequestException as e:
-            print(f"Error fetching page: {e}")
-            return None
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        next_div = soup.find('div', class_='page-next')
-
-        if not next_div:
-            print("No div with class 'page-next' found.")
-            return None
 
-        link = next_div.find('a')
-        if link and 'href' in link.attrs:
-            base_url = "https://mammothmemory.net/"
-            return urljoin(base_url, link['href'])
+    # Discover every word page from the paginated word list
+    word_list_urls = [
+        "https://mammothmemory.net/languages/mandarin-chinese/mandarin-chinese/vocabulary/mandarin-chinese-word-list.html?order=alpha"
+    ]
+    frontier = fetcher.run(discover(word_list_urls, fetcher, follow_next=False))
+    print(frontier.summary())
+    total_urls = frontier.urls()
 
-        print("No link found inside 'page-next' div.")
-        return None
-    
-    for num in range(2, 27):
-        current_url = f"https://mammothmemory.net/languages/mandarin-chinese/mandarin-chinese/vocabulary/mandarin-chinese-word-list.html?p={num}&order=alpha"
-        html_content = get_div(current_url)
-
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Find all <a> tags inside the grid-menu
-        links = soup.select(".word-grid a")
-
-        # Extract href attributes and store in a list
-        url_lists = [a["href"] for a in links if a.has_attr("href")]
-
-        base_url = "https://mammothmemory.net/languages/mandarin-chinese/mandarin-chinese/vocabulary/"
-        full_urls = [urljoin(base_url, url) for url in url_lists]
-        total_urls += full_urls
-        visited_urls.add(current_url)
-        current_url = find_next_page_link_from_url(current_url)
-        #print(current_url)
-    
-    driver = webdriver.Chrome() 
-    #print(total_urls)
-    #print(full_urls)
+    pending_urls = []
     for start_url in total_urls:
-        if start_url in already_scraped_urls:
+        if state.is_done(start_url):
             print(f"⏩ Skipping already scraped URL: {start_url}")
             continue
-        scraper = SeleniumContentScraper(start_url, driver=driver)
-        scraper.scrape_all_pages()
-    driver.quit()
+        pending_urls.append(start_url)
+
+    # Scrape the word pages in parallel, one pooled browser per walker
+    # Chrome is only started if a page can't be read statically
+    with BrowserPool(size=4, warm=False) as pool:
+        hybrid = HybridFetcher(fetcher, pool, waits, routes_file=os.path.join(script_dir, "fetch_routes.json"))
+        hybrid.add_prefetched(frontier.take_html())
+        pool.map(lambda start_url: SeleniumContentScraper(start_url, hybrid, state).scrape_all_pages(), pending_urls)
+        hybrid.save_routes()
+    # Flush the remaining rows (and their checkpoints) before the state is closed
+    close_shared_sinks()
+    state.close()
+    print(hybrid.summary())
+    print(waits.stats.summary())
+    print(llm_cache.summary())
+    print(llm.summary())
+    print(pruner.summary())
+    print(chunked.summary())
+    print(rules.summary())
+
 if __name__ == "__main__":
     main()
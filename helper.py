@@ -1,18 +1,16 @@
 import csv
-import json
-import re
 import os
+
+from extraction_schema import canonical
+from mnemonic_json import DecodeError, decode
+
 def clean_json_field(json_str):
-    # Remove triple backtick code block and 'json' marker if present
-    cleaned = re.sub(r"^```json\s*|\s*```$", "", json_str.strip(), flags=re.IGNORECASE)
-    # Replace double double-quotes with single double-quotes
-    cleaned = cleaned.replace('""', '"')
-    # Optional: Validate that it's valid JSON
+    # Fenced, bare or doubled-quote JSON becomes canonical compact JSON
     try:
-        json.loads(cleaned)
-    except json.JSONDecodeError as e:
+        return canonical(decode(json_str))
+    except DecodeError as e:
         print("⚠️ Invalid JSON detected:", e)
-    return cleaned
+        return json_str.strip()
 
 def reformat_csv(input_path, output_path):
     with open(input_path, newline='', encoding='utf-8') as infile, \
@@ -0,0 +1,292 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup, Tag
+
+from html_pruner import RED_MARKER, count_tokens
+from json_stream import JsonArrayStream
+from extraction_schema import parse_items
+from llm_cache import cache_key, normalize
+from llm_client import LLMError
+from prompts import REASK_INSTRUCTIONS
+from rule_extractor import to_llm_format
+
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Default chunk size; batch_mode.py splits with the same value so its cache keys match
+MAX_TOKENS = 1500
+
+
+def _has(node, name):
+    if not isinstance(node, Tag):
+        return False
+    return node.name == name or node.find(name) is not None
+
+
+def _blocks(root):
+    # Skip single-child wrapper divs down to the level that holds the content
+    while True:
+        children = [child for child in root.children
+                    if isinstance(child, Tag) or str(child).strip()]
+        if len(children) == 1 and isinstance(children[0], Tag) and children[0].name == "div":
+            root = children[0]
+            continue
+        return children
+
+
+def _groups(blocks):
+    """
+    Group blocks into units that are never split: a heading starts a new unit, and
+    so does an image once the current unit already has an image or red text (the
+    image + red paragraph pattern of one mnemonic).
+    """
+    groups, current, has_mnemonic = [], [], False
+    for block in blocks:
+        starts = isinstance(block, Tag) and block.name in HEADINGS
+        if _has(block, "img") and has_mnemonic:
+            starts = True
+        if starts and current:
+            groups.append(current)
+            current, has_mnemonic = [], False
+        current.append(block)
+        has_mnemonic = has_mnemonic or _has(block, "img") or _has(block, RED_MARKER)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _markup(blocks):
+    return "".join(block.decode() if isinstance(block, Tag) else block.output_ready() for block in blocks)
+
+
+def _units(root, max_tokens, model):
+    for group in _groups(_blocks(root)):
+        markup = _markup(group)
+        tokens = count_tokens(markup, model)
+        if tokens <= max_tokens:
+            yield markup, tokens
+            continue
+        # Oversized unit: split inside its containers instead
+        for block in group:
+            if isinstance(block, Tag) and len(_blocks(block)) > 1:
+                yield from _units(block, max_tokens, model)
+            else:
+                markup = _markup([block])
+                yield markup, count_tokens(markup, model)
+
+
+def split_html(compact, max_tokens=MAX_TOKENS, model="gpt-4o"):
+    """
+    Split pruned #mainContent markup (html_pruner.prune_html) into chunks of at most
+    about `max_tokens` tokens, on structural boundaries. Small pages come back as
+    one chunk, unchanged. Later chunks start with the page's <h1> for context.
+    """
+    if count_tokens(compact, model) <= max_tokens:
+        return [compact]
+    soup = BeautifulSoup(compact, "html.parser")
+    title = soup.find("h1")
+    title = str(title) if title else ""
+
+    chunks, current, size = [], [], 0
+    for group, tokens in _units(soup, max_tokens, model):
+        if current and size + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(group)
+        size += tokens
+    if current:
+        chunks.append("".join(current))
+    return [chunk if i == 0 or title in chunk else title + chunk for i, chunk in enumerate(chunks)]
+
+
+def item_key(item):
+    return normalize(json.dumps(item, sort_keys=True, ensure_ascii=False)).lower()
+
+
+class ChunkedExtractor:
+    """
+    Runs extraction prompts over large pages chunk by chunk.
+
+    A page over `max_tokens` is split on structural boundaries, the chunks go
+    through the (cached) LLM concurrently, and their JSON arrays are merged back
+    in page order with duplicates removed. A large page then takes as long as its
+    largest chunk rather than one huge request, and no single response is long
+    enough to get truncated.
+
+    With a `schema` (extraction_schema.ItemSchema) requests use JSON-schema
+    structured outputs and the result is stored as canonical compact JSON. Items
+    that fail validation are sent back once, on their own, to be corrected; the
+    ones still invalid after that are dropped. Without one, pages that fit in one
+    chunk are sent and returned exactly as before.
+    """
+
+    def __init__(self, llm_cache, llm, model="gpt-4o", max_tokens=MAX_TOKENS, schema=None):
+        self.llm_cache = llm_cache
+        self.llm = llm
+        self.model = model
+        self.max_tokens = max_tokens
+        self.schema = schema
+        self.pages = 0
+        self.chunked = 0
+        self.chunks = 0
+        self.duplicates = 0
+        self.malformed = 0
+        self.reasked = 0
+        self.fixed = 0
+        self.dropped = 0
+
+    def _valid(self, item):
+        return self.schema is None or not self.schema.problems(item)
+
+    def _complete(self, instructions, input, on_delta=None):
+        text_format = self.schema.text_format() if self.schema else None
+        return self.llm_cache.complete(self.llm, model=self.model, instructions=instructions, input=input,
+                                       on_delta=on_delta, text_format=text_format)
+
+    def _structured(self, instructions, input):
+        output = self._complete(instructions, input)
+        try:
+            return parse_items(output)
+        except ValueError:
+            # A truncated or refused response: drop it from the cache and ask once more
+            self.llm_cache.delete(cache_key(self.model, instructions, input, self.schema.text_format()))
+            try:
+                return parse_items(self._complete(instructions, input))
+            except ValueError as e:
+                raise LLMError(f"unusable structured output: {e}") from e
+
+    def _ask(self, instructions, chunk, on_item):
+        parser = JsonArrayStream()
+        if on_item is None:
+            if self.schema:
+                items = self._structured(instructions, chunk)
+            else:
+                items = parser.feed(self._complete(instructions, chunk))
+                self.malformed += parser.errors
+            return self._validate(instructions, chunk, items, on_item)
+        items = []
+
+        def on_delta(text):
+            for item in parser.feed(text):
+                items.append(item)
+                if self._valid(item):
+                    on_item(self.schema.normalize(item) if self.schema else item)
+
+        try:
+            self._complete(instructions, chunk, on_delta)
+        finally:
+            self.malformed += parser.errors
+        return self._validate(instructions, chunk, items, on_item)
+
+    def _validate(self, instructions, chunk, items, on_item):
+        """
+        Items in order with empty ones removed and invalid ones re-asked; the
+        corrected items are passed to on_item, the valid ones already were.
+        """
+        if self.schema is None:
+            return items
+        results, failing = [], []
+        for item in items:
+            if isinstance(item, dict) and self.schema.is_empty(item):
+                # A page or chunk without a mnemonic
+                continue
+            if self.schema.problems(item):
+                failing.append(len(results))
+            results.append(item)
+
+        if failing:
+            fixes = self._reask(instructions, chunk, [results[i] for i in failing])
+            for position, i in enumerate(failing):
+                fix = fixes[position] if position < len(fixes) else None
+                if fix is not None and not self.schema.problems(fix):
+                    self.fixed += 1
+                    results[i] = fix
+                    if on_item is not None:
+                        on_item(self.schema.normalize(fix))
+                else:
+                    self.dropped += 1
+                    print(f"⚠️ Dropped invalid item: {self.schema.problems(results[i])} {json.dumps(results[i], ensure_ascii=False)[:120]}")
+                    results[i] = None
+        return [self.schema.normalize(item) for item in results if item is not None]
+
+    def _reask(self, instructions, chunk, failing):
+        """
+        Corrections for just the failing items, in order, or [] if the re-ask fails.
+        """
+        self.reasked += len(failing)
+        problems = [{"item": item, "problems": self.schema.problems(item)} for item in failing]
+        input = f"{chunk}\n\nItems to correct:\n{json.dumps(problems, ensure_ascii=False)}"
+        try:
+            return self._structured(instructions + "\n\n" + REASK_INSTRUCTIONS, input)
+        except LLMError as e:
+            print(f"⚠️ Re-ask for {len(failing)} items failed: {e}")
+            return []
+
+    def _split(self, input, url):
+        chunks = split_html(input, self.max_tokens, self.model)
+        self.pages += 1
+        self.chunks += len(chunks)
+        if len(chunks) > 1:
+            self.chunked += 1
+            print(f"🧩 Split {url or 'page'} into {len(chunks)} chunks")
+        return chunks
+
+    def _merge(self, instructions, chunks, on_item=None):
+        delivered = set()
+        lock = threading.Lock()
+
+        def deliver(item):
+            key = item_key(item)
+            with lock:
+                if key in delivered:
+                    return
+                delivered.add(key)
+            on_item(item)
+
+        def run(chunk):
+            try:
+                return self._ask(instructions, chunk, deliver if on_item else None), None
+            except LLMError as e:
+                return [], e
+
+        with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+            results = list(pool.map(run, chunks))
+
+        errors = [error for _, error in results if error is not None]
+        if errors:
+            raise LLMError(f"{len(errors)} of {len(chunks)} chunks failed: {errors[0]}")
+        merged, seen = [], set()
+        for items, _ in results:
+            for item in items:
+                key = item_key(item)
+                if key in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(key)
+                merged.append(item)
+        return merged
+
+    def items(self, instructions, input, url=None, on_item=None):
+        """
+        The merged items for a page. With `on_item`, responses are streamed and every
+        new (not duplicate) item is passed to on_item as soon as it is complete, in
+        arrival order. Raises LLMError if any chunk failed; items already passed
+        to on_item stay delivered.
+        """
+        return self._merge(instructions, self._split(input, url), on_item)
+
+    def complete(self, instructions, input, url=None):
+        """
+        Drop-in for llm_cache.complete(...): the merged items as stored JSON, with
+        their ids when `url` is given. Without a schema, one-chunk pages return
+        the LLM output unchanged.
+        """
+        chunks = self._split(input, url)
+        if len(chunks) == 1 and self.schema is None:
+            return self._complete(instructions, input)
+        return to_llm_format(self._merge(instructions, chunks), url)
+
+    def summary(self):
+        return (f"Chunking: {self.chunked} of {self.pages} pages split, {self.chunks} chunks, "
+                f"{self.duplicates} duplicate items merged, {self.malformed} malformed items skipped, "
+                f"{self.reasked} items re-asked ({self.fixed} fixed, {self.dropped} dropped)")
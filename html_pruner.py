@@ -0,0 +1,106 @@
+import html
+import re
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Dropped together with everything inside them
+DROP_TAGS = {"script", "style", "noscript", "nav", "iframe", "form", "button", "svg", "head", "link", "meta"}
+# Kept, without attributes, because they carry the page structure
+KEEP_TAGS = {"div", "p", "br", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li",
+             "table", "tr", "th", "td", "b", "strong", "i", "em"}
+# Red text marks the mnemonic keywords; it is rewritten to <red>...</red>
+RED_MARKER = "red"
+
+
+def is_red(tag):
+    style = tag.get("style", "") if isinstance(tag, Tag) else ""
+    return "#ff0000" in style.replace(" ", "").lower()
+
+
+def count_tokens(text, model="gpt-4o"):
+    """
+    Token count with tiktoken when it is installed, otherwise the usual ~4 chars per token estimate.
+    """
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _compact(node):
+    if isinstance(node, Comment):
+        return ""
+    if isinstance(node, NavigableString):
+        return re.sub(r'\s+', ' ', str(node))
+    if not isinstance(node, Tag) or node.name in DROP_TAGS:
+        return ""
+
+    if node.name == "img":
+        return f'<img src="{html.escape(node["src"], quote=True)}">' if node.get("src") else ""
+    if node.name == "br":
+        return "<br>"
+
+    inner = "".join(_compact(child) for child in node.children)
+    if is_red(node):
+        text = inner.strip()
+        return f"<{RED_MARKER}>{text}</{RED_MARKER}>" if text else inner
+    if node.name not in KEEP_TAGS:
+        # span, a, font, section, ... add nothing the extraction needs
+        return inner
+    if not inner.strip():
+        return ""
+    return f"<{node.name}>{inner.strip()}</{node.name}>"
+
+
+def prune_html(main_content):
+    """
+    Rewrite #mainContent (a parsed tag or an HTML string) into compact markup for the
+    LLM: text, bare structural tags, <red>...</red> for red #ff0000 spans, and image
+    src values. Styles, classes, scripts, navigation and other attributes are dropped.
+    """
+    if main_content is None:
+        return ""
+    if isinstance(main_content, str):
+        soup = BeautifulSoup(main_content, 'html.parser')
+        main_content = soup.find("div", id="mainContent") or soup
+    compact = _compact(main_content) if isinstance(main_content, Tag) else ""
+    # Collapse the doubled spaces left behind where tags were unwrapped
+    compact = re.sub(r' {2,}', ' ', compact)
+    return re.sub(r'\s*(</?(?:div|p|br|h\d|ul|ol|li|table|tr|th|td)>)\s*', r'\1', compact).strip()
+
+
+class HtmlPruner:
+    """
+    Prunes pages before they are sent to the LLM and keeps per-page token counts.
+    """
+
+    def __init__(self, model="gpt-4o", verbose=True):
+        self.model = model
+        self.verbose = verbose
+        self.pages = []
+
+    def prune(self, main_content, url=None):
+        original = str(main_content) if main_content is not None else ""
+        compact = prune_html(main_content)
+        before = count_tokens(original, self.model)
+        after = count_tokens(compact, self.model)
+        self.pages.append((url, before, after))
+        if self.verbose and before:
+            print(f"✂️ Pruned {url or 'page'}: {before} -> {after} tokens ({1 - after / before:.0%} smaller)")
+        return compact
+
+    def summary(self):
+        before = sum(page[1] for page in self.pages)
+        after = sum(page[2] for page in self.pages)
+        if not before:
+            return "HTML pruning: no pages"
+        return (f"HTML pruning: {len(self.pages)} pages, {before} -> {after} input tokens "
+                f"({1 - after / before:.0%} smaller){'' if tiktoken else ' (estimated)'}")
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+STATIC = "static"
+BROWSER = "browser"
+
+
+def url_pattern(url):
+    """
+    Group pages by host and parent directory, e.g.
+    https://mammothmemory.net/chemistry/atomic-structure/protons/protons.html
+    -> mammothmemory.net/chemistry/atomic-structure/protons/
+    """
+    parsed = urlparse(url)
+    directory = parsed.path.rsplit('/', 1)[0] + '/'
+    return parsed.netloc + directory
+
+
+def has_main_content(soup):
+    """
+    True if the parsed page contains a non-empty #mainContent.
+    """
+    if soup is None:
+        return False
+    main_content = soup.find("div", id="mainContent")
+    return bool(main_content and (main_content.get_text(strip=True) or main_content.find("img")))
+
+
+def parse(html):
+    return BeautifulSoup(html, 'html.parser') if html else None
+
+
+class HybridFetcher:
+    """
+    Static-first page loader.
+
+    Tries a plain HTTP GET through the pooled AsyncFetcher and only escalates to a
+    headless browser from the BrowserPool when the static HTML lacks #mainContent.
+    The path that worked is remembered per URL pattern (optionally across runs in
+    `routes_file`), so later pages under the same pattern go straight to it.
+    """
+
+    def __init__(self, fetcher, pool, waiter, routes_file=None):
+        self.fetcher = fetcher
+        self.pool = pool
+        self.waiter = waiter
+        self.routes_file = routes_file
+        self.routes = {}
+        self.stats = Counter()
+        self.prefetched = {}
+        self._lock = threading.Lock()
+
+        if routes_file and os.path.exists(routes_file):
+            with open(routes_file, 'r', encoding='utf-8') as f:
+                self.routes = json.load(f)
+
+    def _remember(self, url, route):
+        pattern = url_pattern(url)
+        with self._lock:
+            self.routes[pattern] = route
+
+    def _count(self, key):
+        # get_soup() runs on BrowserPool.map threads, and Counter updates aren't atomic
+        with self._lock:
+            self.stats[key] += 1
+
+    def _browser_get(self, url):
+        with self.pool.tab() as browser:
+            browser.get(url)
+            self.waiter.wait_for_main_content(browser.driver)
+            return browser.driver.page_source
+
+    def add_prefetched(self, pages):
+        """
+        Seed HTML that was already downloaded, e.g. by discovery, so it isn't fetched again.
+        """
+        with self._lock:
+            self.prefetched.update(pages)
+
+    def get_soup(self, url):
+        """
+        Load a page and return it parsed, or None if neither path could load it.
+        """
+        with self._lock:
+            html = self.prefetched.pop(url, None)
+        soup = parse(html)
+        if has_main_content(soup):
+            self._count("prefetched")
+            return soup
+
+        with self._lock:
+            route = self.routes.get(url_pattern(url))
+        if route != BROWSER:
+            soup = parse(self.fetcher.get(url))
+            if has_main_content(soup):
+                self._count(STATIC)
+                self._remember(url, STATIC)
+                return soup
+            self._count("static_miss")
+
+        soup = parse(self._browser_get(url))
+        self._count(BROWSER)
+        if has_main_content(soup):
+            self._remember(url, BROWSER)
+        return soup
+
+    def save_routes(self):
+        if not self.routes_file:
+            return
+        with self._lock:
+            with open(self.routes_file, 'w', encoding='utf-8') as f:
+                json.dump(self.routes, f, indent=2, sort_keys=True)
+
+    def summary(self):
+        return (f"{self.stats['prefetched']} pages prefetched, {self.stats[STATIC]} static, {self.stats[BROWSER]} via browser "
+                f"({self.stats['static_miss']} static misses), {len(self.routes)} URL patterns learned")
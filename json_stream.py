@@ -0,0 +1,74 @@
+import json
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for a JSON array that arrives in pieces (a streamed LLM response).
+
+    feed() returns the array elements that were completed by the new text, so each
+    one can be stored as soon as it closes. Anything before the opening '[' (a
+    ```json fence, a sentence of prose) and after the closing ']' is ignored. An
+    element that isn't valid JSON is counted in `errors` and skipped.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.items = 0
+        self.errors = 0
+
+        self._element = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        completed = []
+        for char in text:
+            if self.done:
+                break
+            if not self.started:
+                self.started = char == '['
+                continue
+
+            if self._in_string:
+                self._element.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+                self._element.append(char)
+            elif char in '[{':
+                self._depth += 1
+                self._element.append(char)
+            elif char in ']}':
+                if self._depth == 0:
+                    # End of the array itself
+                    self._close(completed)
+                    self.done = True
+                    continue
+                self._depth -= 1
+                self._element.append(char)
+                if self._depth == 0:
+                    # An object or array element is complete once its bracket closes
+                    self._close(completed)
+            elif char == ',' and self._depth == 0:
+                self._close(completed)
+            else:
+                self._element.append(char)
+        return completed
+
+    def _close(self, completed):
+        text = "".join(self._element).strip()
+        self._element = []
+        if not text:
+            return
+        try:
+            completed.append(json.loads(text))
+            self.items += 1
+        except json.JSONDecodeError:
+            self.errors += 1
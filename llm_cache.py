@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.db")
+
+
+def normalize(text):
+    """
+    Collapse whitespace so re-serialised but otherwise identical HTML (or a re-indented
+    prompt) maps to the same cache entry.
+    """
+    return re.sub(r'\s+', ' ', text or "").strip()
+
+
+def cache_key(model, instructions, input_text, text_format=None):
+    parts = [model, normalize(instructions), normalize(input_text)]
+    if text_format:
+        # Structured outputs get their own entries; plain prompts keep their old keys
+        parts.append(json.dumps(text_format, sort_keys=True))
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent content-addressed cache for LLM responses (SQLite).
+
+    Entries are keyed on sha256(model, prompt, normalized input), so reruns over
+    unchanged pages with an unchanged prompt cost no API calls. When the stored
+    responses grow past `max_bytes` the least recently used ones are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                output TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute("SELECT output FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, model, output):
+        now = time.time()
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses (key, model, output, size, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (key, model, output, len(output.encode('utf-8')), now, now))
+            self._evict()
+            self.conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def complete(self, llm, model, instructions, input, on_delta=None, text_format=None):
+        """
+        Cached llm.complete_blocking(...) for an llm_client.LLMExecutor.
+        With `on_delta` the response is streamed; a cached one is passed to it whole.
+        Only complete responses are stored.
+        """
+        key = cache_key(model, instructions, input, text_format)
+        output = self.get(key)
+        if output is None:
+            output = llm.complete_blocking(instructions, input, model=model, on_delta=on_delta, text_format=text_format)
+            self.put(key, model, output)
+        elif on_delta is not None:
+            on_delta(output)
+        return output
+
+    def size(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def summary(self):
+        entries, total = self.size()
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        return (f"LLM cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+                f"{entries} entries, {total / 1024 / 1024:.1f} MB")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import random
+import statistics
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI
+
+from html_pruner import count_tokens
+
+DEFAULT_MODEL = "gpt-4o"
+
+
+class LLMError(Exception):
+    """
+    An LLM request that failed for good: a non-retryable error, or retries exhausted.
+    """
+
+
+class TokenBucket:
+    """
+    Allows `per_minute` units per minute, refilled continuously, with bursts up to a full minute's worth.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount):
+        """
+        Correct an earlier estimate: positive gives tokens back, negative takes more.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _retryable(error):
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+class LLMExecutor:
+    """
+    Shared concurrent LLM client.
+
+    Requests run on one background event loop with up to `max_concurrency` in
+    flight, inside RPM and TPM token-bucket budgets. 429, 5xx and connection
+    errors are retried with jittered exponential backoff (honouring Retry-After).
+    Usable from coroutines on any loop (complete) and from plain threads
+    (complete_blocking). Point `base_url` (or LLM_BASE_URL) at any
+    OpenAI-compatible server, e.g. a local stub.
+    """
+
+    def __init__(self, api_key=None, base_url=None, model=DEFAULT_MODEL, rpm=500, tpm=30000,
+                 max_concurrency=16, max_retries=5, timeout=60, expected_output_tokens=300):
+        self.model = model
+        self.max_retries = max_retries
+        self.expected_output_tokens = expected_output_tokens
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.tokens_used = 0
+        self.latencies = []
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-executor", daemon=True)
+        self._thread.start()
+
+        async def setup():
+            # Everything loop-bound is created on the executor's own loop
+            self._client = AsyncOpenAI(api_key=api_key or os.getenv("API_KEY"),
+                                       base_url=base_url or os.getenv("LLM_BASE_URL"),
+                                       max_retries=0, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+            self._rpm = TokenBucket(rpm)
+            self._tpm = TokenBucket(tpm)
+
+        asyncio.run_coroutine_threadsafe(setup(), self._loop).result()
+
+    async def _call(self, kwargs, on_delta, received):
+        if on_delta is None:
+            response = await self._client.responses.create(**kwargs)
+            return response.output_text, getattr(response, "usage", None)
+        completed = None
+        stream = await self._client.responses.create(stream=True, **kwargs)
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                received.append(event.delta)
+                on_delta(event.delta)
+            elif event.type == "response.completed":
+                completed = event.response
+            elif event.type in ("response.failed", "response.incomplete", "error"):
+                raise LLMError(f"stream ended with {event.type}")
+        if completed is None:
+            raise LLMError("stream closed before the response completed")
+        return "".join(received), getattr(completed, "usage", None)
+
+    async def _request(self, instructions, input, model, max_output_tokens, on_delta=None, text_format=None):
+        estimate = count_tokens(f"{instructions}\n{input}", model) + (max_output_tokens or self.expected_output_tokens)
+        kwargs = {"model": model, "instructions": instructions, "input": input}
+        if max_output_tokens:
+            kwargs["max_output_tokens"] = max_output_tokens
+        if text_format:
+            kwargs["text"] = text_format
+
+        self.waiting += 1
+        async with self._semaphore:
+            await self._rpm.acquire()
+            await self._tpm.acquire(estimate)
+            self.waiting -= 1
+            self.in_flight += 1
+            start = time.monotonic()
+            try:
+                for attempt in range(self.max_retries + 1):
+                    received = []
+                    try:
+                        output, usage = await self._call(kwargs, on_delta, received)
+                        break
+                    except Exception as e:
+                        # A stream that already delivered text can't be retried without repeating it
+                        if received or not _retryable(e) or attempt == self.max_retries:
+                            self.failed += 1
+                            raise LLMError(f"{type(e).__name__}: {e}") from e
+                        self.retries += 1
+                        delay = _retry_after(e) or min(30, 2 ** attempt) * random.uniform(0.5, 1.5)
+                        print(f"⏳ LLM request failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        # Every attempt is a new request against both budgets
+                        await self._rpm.acquire()
+                        await self._tpm.acquire(estimate)
+            finally:
+                self.in_flight -= 1
+
+            self.latencies.append(time.monotonic() - start)
+            self.completed += 1
+            used = getattr(usage, "total_tokens", None) or estimate
+            self.tokens_used += used
+            # Only the attempt that succeeded is corrected; the failed ones stay charged
+            self._tpm.adjust(estimate - used)
+            return output
+
+    async def complete(self, instructions, input, model=None, max_output_tokens=None, on_delta=None, text_format=None):
+        """
+        Run one request and return its output text. Raises LLMError if it fails for good.
+        With `on_delta`, the response is streamed and each piece of text is passed to
+        on_delta (on the executor's thread) as it arrives. `text_format` is the
+        responses API text setting, e.g. a JSON-schema structured output format.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(instructions, input, model or self.model, max_output_tokens, on_delta, text_format),
+            self._loop)
+        return await asyncio.wrap_future(future)
+
+    def complete_blocking(self, instructions, input, model=None, max_output_tokens=None, on_delta=None,
+                          text_format=None):
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(instructions, input, model or self.model, max_output_tokens, on_delta, text_format),
+            self._loop)
+        return future.result()
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "tokens": self.tokens_used,
+            "latency_mean": statistics.mean(latencies) if latencies else 0.0,
+            "latency_p50": statistics.median(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        }
+
+    def summary(self):
+        m = self.metrics()
+        return (f"LLM: {m['completed']} requests, {m['failed']} failed, {m['retries']} retries, {m['tokens']} tokens, "
+                f"latency mean {m['latency_mean']:.2f}s / p50 {m['latency_p50']:.2f}s / p95 {m['latency_p95']:.2f}s")
+
+    def close(self):
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
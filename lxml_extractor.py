@@ -0,0 +1,221 @@
+"""
+Single-pass lxml implementation of MnemonicScraper.extract_mnemonic (auto-scraper.py).
+
+The BeautifulSoup version runs a find_all with a style-parsing lambda for every
+<p>, a second find per red span, and recomputes tag.text over and over. This one
+walks #mainContent once: span styles are classified as they are met, text is
+materialised once per node bottom-up, and the mnemonic state machine runs in
+document order.
+
+libxml2 closes an open <p> when a block element starts inside it (and nested
+<p>s become siblings); html.parser keeps the markup as written. Pages with such
+markup are handed to the original extractor (bs4_extractor) so the output stays
+identical. tests/test_extractors.py checks this on the fixture pages, and
+bench_extractors.py on an archived corpus.
+"""
+import re
+from urllib.parse import urljoin
+
+import bs4_extractor
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = lxml_html = None
+
+available = lxml_html is not None
+
+RED = "#ff0000"
+BLACK = "#000000"
+# BeautifulSoup's .text leaves out strings inside these tags (and comments)
+NON_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+# Start tags that make libxml2 close an open <p>
+P_CLOSERS = {
+    "address", "article", "aside", "blockquote", "center", "dd", "details", "dialog", "dir", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup",
+    "hr", "li", "listing", "main", "menu", "nav", "ol", "p", "pre", "section", "summary", "table", "ul", "xmp",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)")
+
+
+def _style_color(el, color):
+    style = el.get("style")
+    return style is not None and color in style.replace(" ", "").lower()
+
+
+def parse(content):
+    return lxml_html.document_fromstring(content)
+
+
+def node_texts(root):
+    """
+    Text of every element under `root` (itself included), as BeautifulSoup's .text
+    would give it, computed in one post-order walk.
+    """
+    texts = {}
+
+    def visit(el):
+        parts = []
+        if el.tag not in NON_TEXT_TAGS and el.text:
+            parts.append(el.text)
+        for child in el:
+            if isinstance(child.tag, str):
+                child_text = visit(child)
+                if el.tag not in NON_TEXT_TAGS:
+                    parts.append(child_text)
+            if child.tail and el.tag not in NON_TEXT_TAGS:
+                parts.append(child.tail)
+        text = "".join(parts)
+        texts[el] = text
+        return text
+
+    visit(root)
+    return texts
+
+
+def _text(el):
+    return node_texts(el)[el]
+
+
+def _next_element_sibling(el):
+    sibling = el.getnext()
+    while sibling is not None and not isinstance(sibling.tag, str):
+        sibling = sibling.getnext()
+    return sibling
+
+
+def heading(doc):
+    word = None
+    definition = None
+
+    # Assume word/concept is the first h1 tag
+    h1_tag = next(doc.iter("h1"), None)
+    if h1_tag is not None:
+        h1_full = _text(h1_tag)
+        h1_text = h1_full.strip().replace('\xa0', ' ')
+
+        # Assume – or - seperates word from definition if in first h1 tag
+        split = bs4_extractor.split_heading(h1_text)
+        if split:
+            word, definition = split
+        else:
+            # Otherwise, take next tag
+            word = h1_full.strip()
+            sibling = _next_element_sibling(h1_tag)
+            if sibling is not None:
+                definition = _text(sibling).strip()
+    return word, definition
+
+
+def extract(doc, url):
+    word, definition = heading(doc)
+
+    # Look only at main content
+    main_content = next((div for div in doc.iter("div") if div.get("id") == "mainContent"), None)
+    if main_content is None:
+        return None
+
+    texts = node_texts(main_content)
+
+    # One pass over the subtree: classify spans, and note which ones contain a black span
+    red_spans = set()
+    has_black = set()
+    for el in main_content.iter("span"):
+        if _style_color(el, RED):
+            red_spans.add(el)
+        if _style_color(el, BLACK):
+            for ancestor in el.iterancestors("span"):
+                if ancestor in has_black:
+                    break
+                has_black.add(ancestor)
+
+    last_img = None
+    found_after_img = False
+
+    mnemonics = []
+    highlighted_text = []
+    mnemonic_set = set()
+    images = []
+
+    for tag in main_content.iterdescendants():
+        if not isinstance(tag.tag, str):
+            continue
+        if tag.tag == "img":
+            src = tag.get('src')
+            if src:
+                images.append(urljoin(url, src))
+
+            # Since maybe multiple mnemonics per page, reset after each image
+            last_img = tag
+            found_after_img = False
+
+        elif tag.tag in ("p", "figcaption") and not found_after_img:
+            red_text = [span for span in tag.iter("span") if span in red_spans and span is not tag]
+
+            # Sometimes black text interspersed within red text span - remove it
+            for e in red_text:
+                if e not in has_black:
+                    e_text = texts[e].strip()
+                    if "NOTE" not in e_text:
+                        highlighted_text.append(e_text)
+
+            tag_text = texts[tag].strip()
+            # Same markup counts as the same mnemonic, like the bs4 Tag equality it replaces
+            key = etree.tostring(tag, with_tail=False)
+            if red_text and key not in mnemonic_set and "NOTE" not in tag_text:
+                mnemonic_set.add(key)
+                mnemonics.append(tag_text)
+                if last_img is not None:
+                    found_after_img = True
+
+    return {
+        'url': url,
+        'word': word,
+        'definition': definition,
+        'mnemonic': mnemonics,
+        'highlighted_text': highlighted_text,
+        'images': images
+    }
+
+
+def next_page_url(doc, current_url):
+    for div in doc.iter("div"):
+        if "page-next" in (div.get("class") or "").split():
+            link = next(div.iter("a"), None)
+            if link is not None and link.get("href") is not None:
+                return urljoin(current_url, link.get("href"))
+            return None
+    return None
+
+
+def restructured_by_lxml(content):
+    """
+    Whether libxml2 would build a different tree than html.parser for `content`:
+    a block-level start tag while a <p> is open. A quick scan of the tags with
+    html.parser's nesting (an end tag closes everything opened after its start
+    tag); when unsure (e.g. markup inside scripts or comments) it says yes.
+    """
+    stack = []
+    for match in TAG.finditer(content):
+        closing, name = match.group(1), match.group(2).lower()
+        if closing:
+            if name in stack:
+                del stack[len(stack) - 1 - stack[::-1].index(name):]
+        else:
+            if name in P_CLOSERS and "p" in stack:
+                return True
+            if name not in VOID_TAGS:
+                stack.append(name)
+    return False
+
+
+def extract_page(content, url):
+    """
+    Parse once and return (data, next_url), like MnemonicScraper.process_page.
+    """
+    if restructured_by_lxml(content):
+        return bs4_extractor.extract_page(content, url)
+    doc = parse(content)
+    return extract(doc, url), next_page_url(doc, url)
@@ -0,0 +1,102 @@
+"""
+Decoding for the concept_and_mnemonic column.
+
+The column holds JSON in several historical shapes: fenced (```json ... ```),
+bare compact JSON (structured outputs), a single object instead of an array,
+and payloads whose quotes were doubled ("") by a CSV round trip done by hand.
+decode() reads all of them in one pass, with orjson when it is installed.
+"""
+
+import csv
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FIELD = "concept_and_mnemonic"
+
+
+class DecodeError(ValueError):
+    """
+    A concept_and_mnemonic payload that isn't JSON in any known shape.
+    """
+
+
+def loads(text):
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_span(text):
+    text = text.strip()
+    if text[:1] in ('[', '{'):
+        # Bare JSON (structured outputs): nothing to cut
+        return text
+    # From the first [ or { to the last ] or }: drops fences and any text around the JSON
+    starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+    if not starts:
+        return None
+    end = max(text.rfind(']'), text.rfind('}'))
+    start = min(starts)
+    return text[start:end + 1] if end > start else None
+
+
+def decode(payload):
+    """
+    The JSON value in a concept_and_mnemonic payload. Raises DecodeError.
+    """
+    if not payload or not payload.strip():
+        raise DecodeError("empty payload")
+    span = _json_span(payload)
+    if span is None:
+        raise DecodeError(f"no JSON found: {payload.strip()[:100]}")
+    try:
+        return loads(span)
+    except ValueError as first:
+        if '""' not in span:
+            raise DecodeError(str(first)) from first
+    # Quotes doubled by a CSV writer but never un-doubled by a reader. Only now is
+    # "" rewritten, so empty strings in well-formed payloads are left alone
+    try:
+        return loads(span.replace('""', '"'))
+    except ValueError as e:
+        raise DecodeError(str(e)) from e
+
+
+def decode_items(payload):
+    """
+    The entries in a payload as a list; a single object becomes a one-item list.
+    Raises DecodeError.
+    """
+    data = decode(payload)
+    if isinstance(data, dict):
+        return [data]
+    if not isinstance(data, list):
+        raise DecodeError(f"expected a JSON array or object, got {type(data).__name__}")
+    return data
+
+
+def iter_rows(csv_path, field=FIELD, where=None):
+    """
+    Stream a scraped CSV, yielding (row, items, error) per row: the row dict, its
+    decoded entries (None if the payload couldn't be decoded or is empty), and
+    the DecodeError if there was one. Rows are read one at a time. With `where`,
+    only rows for which where(row) is true are decoded and yielded.
+    """
+    csv.field_size_limit(sys.maxsize)
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if where is not None and not where(row):
+                continue
+            payload = (row.get(field) or "").strip()
+            if not payload:
+                yield row, None, None
+                continue
+            try:
+                yield row, decode_items(payload), None
+            except DecodeError as e:
+                yield row, None, e
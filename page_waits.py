@@ -0,0 +1,118 @@
+import time
+from collections import defaultdict
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Per-profile wait strategies
+#   strategy: "stable"  - #mainContent is present and unchanged for `stable_polls` polls
+#             "changed" - #mainContent differs from the previous slide, then is stable
+#   timeout:  give up after this many seconds
+#   poll:     seconds between checks
+PROFILES = {
+    "main_content": {"strategy": "stable", "timeout": 10, "poll": 0.1, "stable_polls": 2},
+    "carousel": {"strategy": "changed", "timeout": 5, "poll": 0.1, "stable_polls": 2},
+}
+
+
+def main_content_html(driver):
+    """
+    Current innerHTML of #mainContent, or None if it isn't in the DOM yet.
+    """
+    try:
+        return driver.find_element(By.ID, "mainContent").get_attribute("innerHTML")
+    except (NoSuchElementException, StaleElementReferenceException):
+        return None
+
+
+class WaitStats:
+    """
+    Records how long each wait actually took, per profile.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.timeouts = defaultdict(int)
+
+    def record(self, profile, seconds, timed_out):
+        self.durations[profile].append(seconds)
+        if timed_out:
+            self.timeouts[profile] += 1
+
+    def summary(self):
+        lines = []
+        for profile, durations in self.durations.items():
+            total = sum(durations)
+            lines.append(
+                f"{profile}: {len(durations)} waits, avg {total / len(durations):.2f}s, "
+                f"max {max(durations):.2f}s, total {total:.1f}s, {self.timeouts[profile]} timeouts"
+            )
+        return "\n".join(lines)
+
+
+class _ContentReady:
+    """
+    WebDriverWait condition: #mainContent is present (and differs from `previous`
+    when given) and has not changed for `stable_polls` consecutive polls.
+    """
+
+    def __init__(self, previous, stable_polls):
+        self.previous = previous
+        self.stable_polls = stable_polls
+        self.last = None
+        self.unchanged = 0
+
+    def __call__(self, driver):
+        if driver.execute_script("return document.readyState") != "complete":
+            return False
+
+        html = main_content_html(driver)
+        if html is None or (self.previous is not None and html == self.previous):
+            self.last = None
+            self.unchanged = 0
+            return False
+
+        if html == self.last:
+            self.unchanged += 1
+        else:
+            self.last = html
+            self.unchanged = 0
+        return self.unchanged >= self.stable_polls
+
+
+class PageWaiter:
+    """
+    Readiness-based replacement for fixed sleeps after driver.get() and carousel clicks.
+    """
+
+    def __init__(self, profiles=None):
+        self.profiles = dict(PROFILES)
+        if profiles:
+            self.profiles.update(profiles)
+        self.stats = WaitStats()
+
+    def _wait(self, driver, profile, previous=None):
+        settings = self.profiles[profile]
+        condition = _ContentReady(previous if settings["strategy"] == "changed" else None, settings["stable_polls"])
+
+        start = time.monotonic()
+        timed_out = False
+        try:
+            WebDriverWait(driver, settings["timeout"], poll_frequency=settings["poll"]).until(condition)
+        except TimeoutException:
+            timed_out = True
+        self.stats.record(profile, time.monotonic() - start, timed_out)
+        return not timed_out
+
+    def wait_for_main_content(self, driver, profile="main_content"):
+        """
+        Block until #mainContent is present and stable. Returns False on timeout.
+        """
+        return self._wait(driver, profile)
+
+    def wait_for_slide_change(self, driver, previous_html, profile="carousel"):
+        """
+        Block until #mainContent differs from `previous_html` and is stable. Returns False on timeout.
+        """
+        return self._wait(driver, profile, previous=previous_html)
@@ -0,0 +1,85 @@
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml_extractor
+
+
+class ParsePool:
+    """
+    Multi-core parse/extract stage.
+
+    Raw HTML goes to `parse(content, url)` in a pool of worker processes, and the
+    results come back in input order. At most `max_in_flight` pages are between
+    fetched and handed back at any time, so a fast fetch stage can't run ahead of
+    the parsers and pile pages up in memory.
+
+    With workers=0 everything runs in-process with the same ordering and bounds;
+    `parse` then doesn't need to be picklable.
+    """
+
+    def __init__(self, parse=lxml_extractor.extract_page, workers=None, max_in_flight=None):
+        self.parse = parse
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_in_flight = max_in_flight or max(4, 4 * self.workers)
+        self.executor = ProcessPoolExecutor(self.workers) if self.workers else None
+
+    def map(self, pages):
+        """
+        Parse an iterable of (content, url) pairs, e.g. an archived corpus.
+        Yields results in input order and reads ahead at most max_in_flight pages.
+        """
+        window = deque()
+        for content, url in pages:
+            if self.executor:
+                window.append(self.executor.submit(self.parse, content, url))
+            else:
+                window.append(self.parse(content, url))
+            if len(window) >= self.max_in_flight:
+                yield self._result(window.popleft())
+        while window:
+            yield self._result(window.popleft())
+
+    def _result(self, item):
+        return item.result() if self.executor else item
+
+    async def _fetch_and_parse(self, fetch, url):
+        content = await fetch(url)
+        if not content:
+            return url, content, None
+        try:
+            if self.executor:
+                loop = asyncio.get_running_loop()
+                return url, content, await loop.run_in_executor(self.executor, self.parse, content, url)
+            return url, content, self.parse(content, url)
+        except Exception as e:
+            # One page the extractor can't handle must not stop the pages still in flight
+            print(f"Error parsing page {url}: {e!r}")
+            return url, content, None
+
+    async def map_async(self, urls, fetch):
+        """
+        Fetch and parse `urls`, yielding (url, content, result) in input order.
+        A sliding window of max_in_flight pages provides the backpressure: the
+        next fetch only starts once the oldest page has been consumed.
+        content (and result) are None for pages that could not be fetched, and
+        result alone is None for pages whose parse raised.
+        """
+        window = deque()
+        for url in urls:
+            window.append(asyncio.ensure_future(self._fetch_and_parse(fetch, url)))
+            if len(window) >= self.max_in_flight:
+                yield await window.popleft()
+        while window:
+            yield await window.popleft()
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
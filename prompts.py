@@ -0,0 +1,142 @@
+"""
+Prompts shared by the scrapers, question generation and the batch mode.
+
+The extraction prompts get #mainContent as compacted by html_pruner, where red
+spans are rewritten to <red>...</red> (html_pruner.RED_MARKER); each prompt says so.
+"""
+
+# get-main-content.py
+MAIN_CONTENT_EXTRACTION = """
+            This is the html file of a website that probably contains one or multiple mnemonics. For each mnemonic, your task is to find:
+            - The main term being taught (think of being the front of a flashcard)
+            - The definition or defining features of the term IF APPLICABLE (back of a flashcard)
+            - The mnemonic used to remember it, which is usually a full sentence with the term and/or definitions in red.
+            - An image to aid in the memory of the mnemonic IF APPLICABLE
+            - Key words that rhyme or sound similar to the term which can be used to remember it. These are usually in red. Note that sometimes part of the keyword is highlighted in red, make sure that the keyword is always a full English word
+            Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+
+            If there is no mnemonic, return an empty "items" array.
+
+            Respond with a JSON object {"items": [...]}, where each item is an object with:
+                - "term": The term being remembered
+                - "definition": If applicable, a definition of the term
+                - "mnemonic": the mnemonic used to remember the term and definition if applicable
+                - "image": Link to image source used to remember mnemonic if applicable
+                - "keywords": key words that sound similar to the term or definition that are used in the mnemonic if applicable"""
+
+# get-vocab-mnemonics.py
+VOCAB_EXTRACTION = """
+            This is the html file of a website that contains one or multiple mnemonics for remembering words from a different language. For each mnemonic, your task is to find:
+            - The main term being taught in the foreign language
+            - The definition of the term in English
+            - The mnemonic used to remember it, which is usually a full sentence with the term and/or definitions in red.
+            - An image to aid in the memory of the mnemonic IF APPLICABLE
+            - Key words that rhyme or sound similar to the term which can be used to remember it. These are usually in red. Note that sometimes part of the keyword is highlighted in red, make sure that the keyword is always a full English word
+            Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+
+            Respond with a JSON object {"items": [...]}, where each item is an object with:
+                - "term": The term being remembered
+                - "definition": The definition of the term
+                - "mnemonic": the mnemonic used to remember the term and definition if applicable
+                - "image": Link to image source used to remember mnemonic if applicable
+                - "keywords": key words that sound similar to the term or definition that are used in the mnemonic if applicable"""
+
+# get-name-mnemonics.py
+NAME_EXTRACTION = """
+                This is the HTML content of a webpage that contains multiple mnemonics for names. Each page consists of a list of names starting with the same letter. 
+                For each name, there is a corresponding mnemonic. 
+                Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+
+                Your task is to extract every name–mnemonic pair from the page.
+
+                Respond with a JSON object {"items": [...]}, where each item is an object with:
+                - "name": the name
+                - "mnemonic": the mnemonic used to remember it
+
+                Example format:
+                {"items": [
+                { "name": "NAME", "mnemonic": "A light ice cube every day" },
+                { "name": "Aaron", "mnemonic": "Aardvarks Always Run On Nightshift" }
+                ]}
+
+                Only return the JSON object—do not include explanations or other text.
+                ."""
+
+# get-elements-mnemonic.py
+ELEMENT_EXTRACTION = """
+            This is the html file of a website that contains a mnemonic. Your task is to find:
+            - The main term being taught 
+            - The definition or defining features of the term
+            - The mnemonic used to remember it, which is usually a full sentence with the term and/or definitions in red.
+            - An image to aid in the memory of the mnemonic IF APPLICABLE
+            - Key words that rhyme or sound similar to the term which can be used to remember it. These are usually in red. Note that sometimes part of the keyword is highlighted in red, make sure that the keyword is always a full English word
+            Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+
+            If there is no mnemonic, return an empty "items" array.
+
+            Respond with a JSON object {"items": [...]}, where each item is an object with:
+                - "term": The term being remembered
+                - "definition": If applicable, a definition of the term
+                - "mnemonic": the mnemonic used to remember the term and definition if applicable
+                - "image": Link to image source used to remember mnemonic if applicable
+                - "keywords": key words that sound similar to the term or definition that are used in the mnemonic if applicable"""
+
+# get-trees-mnemonics.py
+TREE_EXTRACTION = """
+                This is the HTML content of a webpage that contains mnemonics for trees. These mnemonics are somewhat complex. 
+                Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+               
+
+                Your task is to extract every tree the mnemonic is about, the defining features of the tree, and the mnemonic that ties them together.
+                Respond with a JSON object {"items": [...]}, one item per tree, in this format:
+                {"items": [{ "concept": "...", "definition": "...", "mnemonic": "..." }]}"""
+
+# get-multiple-mnemonics.py
+TERM_EXTRACTION = """
+                This is the HTML content of a webpage that contains multiple mnemonics.
+                Text shown in red on the page is wrapped in <red>...</red>; it usually marks the mnemonic and its keywords.
+            
+                Respond with a JSON object {"items": [...]}, where each item is an object with:
+                - "term": The term being remembered
+                - "definition": If applicable, a definition of the term
+                - "mnemonic": the mnemonic used to remember the term and definition if applicable
+
+                Example format:
+                {"items": [{ "term": "...", "definition": "...", "mnemonic": "..." }]}
+               
+
+                Only return the JSON object—do not include explanations or other text.
+                ."""
+
+# Appended to an extraction prompt to correct the items that failed validation
+REASK_INSTRUCTIONS = """
+Some items extracted from this page were incomplete or invalid. After the page content comes a JSON list
+of those items, each with the problems found. Re-read the page and return exactly one corrected item for
+each of them, in the same order. Only return these items, not the rest of the page.
+"""
+
+# question.py: FlashcardProcessor.generate_question
+QUESTION_INSTRUCTIONS = """
+            Given an element and its symbol, generate an appropriate question where the definition would be the answer. The term should be present in the question. Imagine the question being the front of a flashcard, with the definition being on the back, where the mnemonic is used to remember the answer to the question.
+
+            Examples:
+            - "What is the chemical symbol for Argon?"
+            """
+
+# Batch variant of the generate_question prompt
+BATCH_QUESTION_INSTRUCTIONS = """
+Given a JSON list of flashcard items, each with an "id", a "term", its "definition" and optionally a "mnemonic", generate for every item an appropriate question where the definition would be the answer. The term should be present in the question. Imagine the question being the front of a flashcard, with the definition being on the back, where the mnemonic is used to remember the answer to the question.
+
+Examples:
+- "What is the chemical symbol for Argon?"
+
+Respond only with a JSON object mapping each item's id to its question, e.g. {"0": "What is the chemical symbol for Argon?", "1": "..."}
+"""
+
+
+def question_input(term, definition, mnemonic=""):
+    return f"""
+Term: "{term}"
+Definition: "{definition}"
+{f'Mnemonic: "{mnemonic}"' if mnemonic else ''}
+"""
@@ -1,91 +1,105 @@
+import asyncio
 import csv
+import itertools
 import json
-from typing import List, Dict, Any
-import time
+import sys
+from collections import deque
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import requests
+from llm_cache import LLMCache, cache_key
+from llm_client import LLMExecutor, LLMError
+from question_batch import QuestionBatcher
+from question_templates import TemplateEngine
+from extraction_schema import canonical, entry_id
+from mnemonic_json import DecodeError, decode
+from prompts import QUESTION_INSTRUCTIONS, BATCH_QUESTION_INSTRUCTIONS, question_input
 
 load_dotenv()
-api_key = os.getenv("API_KEY")
-client = OpenAI(
-    # This is the default and can be omitted
-    api_key=api_key
-)
 
 class FlashcardProcessor:
-    def __init__(self, client=None):
+    def __init__(self, llm=None, batch=True, ask=None):
         """
-        Initialize the processor with your client
+        Initialize the processor with an LLMExecutor.
+        With batch=True, questions are requested many entries at a time.
+        `ask(term, definition, mnemonic)`, a coroutine, replaces the LLM calls
+        altogether (batch_mode.py collects and answers questions this way); no
+        LLMExecutor is needed then.
         """
-        if client is None:
-            raise ValueError("Client must be provided for API calls")
-        self.client = client
+        if llm is None and ask is None:
+            raise ValueError("LLMExecutor must be provided for API calls")
+        self.llm = llm
+        # (term, error) for every question that could not be generated
+        self.failures = []
+        # Entries that already had a question
+        self.skipped = 0
+        # While process_csv_file runs: every answer as it arrives (an LLMCache), so an
+        # interrupted run never pays for the same question twice
+        self.answers = None
+        self._asking = {}
+        self.batcher = QuestionBatcher(llm, BATCH_QUESTION_INSTRUCTIONS, fallback=self.generate_question) if batch and ask is None else None
+        self.templates = TemplateEngine()
+        self.ask = ask or (self.batcher.question if self.batcher else self.generate_question)
     
-    def generate_question(self, term: str, definition: str, mnemonic: str = "") -> str:
+    async def generate_question(self, term: str, definition: str, mnemonic: str = "") -> str:
         """
-        Generate an appropriate question for the given term and definition using LLM
+        Generate an appropriate question for the given term and definition using LLM.
+        Raises LLMError if the request fails after retries.
         """
-        input_data = f"""
-Term: "{term}"
-Definition: "{definition}"
-{f'Mnemonic: "{mnemonic}"' if mnemonic else ''}
-"""
+        input_data = question_input(term, definition, mnemonic)
 
-        try:
-            response = self.client.responses.create(
-                model="gpt-4o",
-                instructions=f"""
-                Given an element and its symbol, generate an appropriate question where the definition would be the answer. The term should be present in the question. Imagine the question being the front of a flashcard, with the definition being on the back, where the mnemonic is used to remember the answer to the question.
-
-                Examples:
-                - "What is the chemical symbol for Argon?"
-                """,
-                input=input_data,
-            )
-            
-            question = response.output_text.strip()
-            # Remove quotes if the LLM added them
-            if question.startswith('"') and question.endswith('"'):
-                question = question[1:-1]
-            print(question)
-            return question
-            
-        except Exception as e:
-            print(f"Error generating question for term '{term}': {e}")
-            # Fallback question
-            return f"What is {term}?"
+        output = await self.llm.complete(
+            instructions=QUESTION_INSTRUCTIONS,
+            input=input_data,
+            model="gpt-4o",
+        )
+
+        question = output.strip()
+        # Remove quotes if the LLM added them
+        if question.startswith('"') and question.endswith('"'):
+            question = question[1:-1]
+        print(question)
+        return question
     
-    def process_json_entry(self, json_str: str) -> str:
+    async def _question(self, term, definition, mnemonic=""):
+        """
+        self.ask, through the answer journal when there is one. Identical entries
+        asked at the same time share one request.
+        """
+        if self.answers is None:
+            return await self.ask(term, definition, mnemonic)
+        key = cache_key("question", QUESTION_INSTRUCTIONS, question_input(term, definition, mnemonic))
+        question = self.answers.get(key)
+        if question is not None:
+            return question
+        if key not in self._asking:
+            self._asking[key] = asyncio.ensure_future(self.ask(term, definition, mnemonic))
+        try:
+            question = await asyncio.shield(self._asking[key])
+        finally:
+            self._asking.pop(key, None)
+        self.answers.put(key, "question", question)
+        return question
+
+    def process_json_entry(self, json_str: str, url: str = None) -> str:
         """
         Process a single JSON string and add questions to each entry
         """
+        return asyncio.run(self.process_json_entry_async(json_str, url))
+
+    async def process_json_entry_async(self, json_str: str, url: str = None) -> str:
+        """
+        Process a single JSON string and add questions to each entry.
+        Templates are tried first (`url` gives the subject); the remaining
+        entries' questions are generated concurrently.
+        """
         # Check if json_str is empty or None
         if not json_str or json_str.strip() == '':
             print("Warning: Empty JSON string found, skipping...")
             return json_str
         
         try:
-            # Clean the JSON string - remove any leading/trailing whitespace
-            cleaned_json = json_str.strip()
-            
-            # Remove markdown code block formatting if present
-            if cleaned_json.startswith('```json'):
-                # Remove ```json from the beginning
-                cleaned_json = cleaned_json[7:].strip()
-                
-            if cleaned_json.endswith('```'):
-                # Remove ``` from the end
-                cleaned_json = cleaned_json[:-3].strip()
-            
-            # Check if it starts with expected JSON characters after cleaning
-            if not (cleaned_json.startswith('[') or cleaned_json.startswith('{')):
-                print(f"Warning: JSON doesn't start with [ or {{, content: {cleaned_json[:100]}...")
-                return json_str
-            
-            # Parse the JSON
-            entries = json.loads(cleaned_json)
+            # Fenced, bare or doubled-quote JSON, decoded once
+            entries = decode(json_str)
             
             # Handle case where entries is not a list
             if not isinstance(entries, list):
@@ -93,39 +107,60 @@ Definition: "{definition}"
                 return json_str
             
             # Process each entry
+            pending = []
             for i, entry in enumerate(entries):
                 if not isinstance(entry, dict):
                     print(f"Warning: Entry {i} is not a dictionary, skipping...")
                     continue
+
+                # Rows scraped before ids existed get theirs here, so the questions CSV carries them
+                if url and not entry.get('id'):
+                    entry = entries[i] = {"id": entry_id(url, entry), **entry}
                     
+                # Answered by an earlier (interrupted) run: never asked again
+                if entry.get('question'):
+                    self.skipped += 1
+                    continue
+
                 term = entry.get('term', '')
                 definition = entry.get('definition', '')
                 mnemonic = entry.get('mnemonic', '')
+
+                # Entries that follow a known pattern (elements, capitals, names, ...) are templated locally
+                question = self.templates.question_for(entry, url)
+                if question:
+                    entry['question'] = question
+                    continue
                 
                 # Skip if no term
                 if not term:
                     print(f"Warning: Entry {i} has no term, skipping...")
                     continue
                 
-                # Skip if no definition (like the "Alberto (first name)" entry)
-                if not definition or definition is None:
-                    # For name-only entries, create a simple question
-                    entry['question'] = f"What is the first name associated with {term.split('(')[0].strip()}?"
-                else:
-                    # Generate question using LLM
-                    question = self.generate_question(term, definition, mnemonic)
-                    entry['question'] = question
-                
-                print(f"  Processed: {term}")
-                
-                # Small delay to avoid rate limiting
-                time.sleep(0.1)
+                # Skip if no definition
+                if not definition:
+                    print(f"Warning: Entry {i} has no definition, skipping...")
+                    continue
+
+                # Generate question using LLM
+                pending.append((entry, self._question(term, definition, mnemonic)))
+
+            results = await asyncio.gather(*(question for _, question in pending), return_exceptions=True)
+            for (entry, _), question in zip(pending, results):
+                if isinstance(question, LLMError):
+                    # Reported instead of replaced by a generic question; the entry is left without one
+                    print(f"  ❌ Question generation failed for {entry['term']}: {question}")
+                    self.failures.append((entry['term'], str(question)))
+                    continue
+                if isinstance(question, BaseException):
+                    raise question
+                entry['question'] = question
+                print(f"  Processed: {entry['term']}")
             
-            # Return the updated JSON with markdown formatting preserved
-            updated_json = json.dumps(entries, indent=4)  # Use 4 spaces like original
-            return f"```json\n{updated_json}\n```"
+            # Stored in the same compact, unfenced form as the extraction output
+            return canonical(entries)
             
-        except json.JSONDecodeError as e:
+        except DecodeError as e:
             print(f"Error parsing JSON: {e}")
             print(f"Problematic JSON content (first 200 chars): {json_str[:200]}")
             return json_str  # Return original if parsing fails
@@ -133,71 +168,174 @@ Definition: "{definition}"
             print(f"Error processing entry: {e}")
             return json_str
     
-    def process_csv_file(self, input_file: str, output_file: str):
+    async def process_row(self, row_num: int, row: list, total_rows: int = None):
         """
-        Process the entire CSV file
+        Process one CSV row. Returns (new_row, changed), where changed is None for
+        rows that were kept as-is without trying.
         """
-        processed_rows = []
+        print(f"Processing row {row_num}/{total_rows}..." if total_rows else f"Processing row {row_num}...")
+        
+        if len(row) < 2:
+            # Keep row as-is if it doesn't have the expected format
+            print(f"  Row {row_num}: Insufficient columns, keeping as-is")
+            return row, None
+
+        url = row[0]
+        concept_and_mnemonic = row[1]
+        
+        # Check if second column is empty
+        if not concept_and_mnemonic or concept_and_mnemonic.strip() == '':
+            print(f"  Row {row_num}: Empty concept_and_mnemonic, keeping as-is")
+            return row, None
+        
+        # Process the JSON in the second column
+        updated_json = await self.process_json_entry_async(concept_and_mnemonic, url)
+        
+        # Check if processing was successful (JSON changed)
+        changed = updated_json != concept_and_mnemonic
+        if changed:
+            print(f"  Row {row_num}: Successfully processed")
+        else:
+            print(f"  Row {row_num}: No changes made (likely error)")
+        
+        # Create new row with updated JSON
+        return [url, updated_json] + row[2:], changed
+
+    def process_csv_file(self, input_file: str, output_file: str, window: int = 100):
+        """
+        Process the entire CSV file, streaming.
+
+        Up to `window` rows are processed concurrently and each one is written, in
+        input order, as soon as it and the rows before it are done, to
+        `output_file`.partial; `output_file`.checkpoint records how many rows are
+        on disk. If the run is interrupted, the next one picks up the finished rows
+        from the partial file: their entries that have a question are kept and not
+        asked again, and only the missing ones are generated. Answers are also kept
+        in `output_file`.answers.db the moment they arrive, so questions of rows
+        that were still in flight aren't paid for twice. The output is moved into
+        place when every row has been written.
+        """
+        partial = output_file + ".partial"
+        checkpoint = output_file + ".checkpoint"
+        journal = output_file + ".answers.db"
         total_rows = 0
         processed_count = 0
         error_count = 0
-        
-        try:
-            # First pass: count total rows
-            with open(input_file, 'r', encoding='utf-8') as file:
-                total_rows = sum(1 for _ in csv.reader(file))
-            
-            # Second pass: process rows
-            with open(input_file, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                
-                for row_num, row in enumerate(reader, 1):
-                    print(f"Processing row {row_num}/{total_rows}...")
-                    
-                    if len(row) >= 2:
-                        url = row[0]
-                        concept_and_mnemonic = row[1]
-                        
-                        # Check if second column is empty
-                        if not concept_and_mnemonic or concept_and_mnemonic.strip() == '':
-                            print(f"  Row {row_num}: Empty concept_and_mnemonic, keeping as-is")
-                            processed_rows.append(row)
-                            continue
-                        
-                        # Process the JSON in the second column
-                        updated_json = self.process_json_entry(concept_and_mnemonic)
-                        
-                        # Check if processing was successful (JSON changed)
-                        if updated_json != concept_and_mnemonic:
-                            processed_count += 1
-                            print(f"  Row {row_num}: Successfully processed")
-                        else:
-                            error_count += 1
-                            print(f"  Row {row_num}: No changes made (likely error)")
-                        
-                        # Create new row with updated JSON
-                        new_row = [url, updated_json] + row[2:] if len(row) > 2 else [url, updated_json]
-                        processed_rows.append(new_row)
+        resumed_count = 0
+
+        previous = partial + ".prev"
+        done = self._resume_rows(checkpoint, input_file, partial, previous)
+        if done:
+            print(f"Resuming: {done} rows already written")
+
+        csv.field_size_limit(sys.maxsize)
+
+        async def process_rows(reader, resumed, writer, out):
+            nonlocal total_rows, processed_count, error_count, resumed_count
+            in_flight = deque()
+
+            async def finish():
+                nonlocal processed_count, error_count, resumed_count
+                new_row, changed, was_resumed = await in_flight.popleft()
+                writer.writerow(new_row)
+                out.flush()
+                os.fsync(out.fileno())
+                self._save_checkpoint(checkpoint, input_file, total_rows - len(in_flight), done)
+                if changed is True:
+                    processed_count += 1
+                elif changed is False:
+                    if was_resumed:
+                        resumed_count += 1
                     else:
-                        # Keep row as-is if it doesn't have the expected format
-                        print(f"  Row {row_num}: Insufficient columns, keeping as-is")
-                        processed_rows.append(row)
-            
-            # Write the processed data to output file
-            with open(output_file, 'w', encoding='utf-8', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerows(processed_rows)
-            
+                        error_count += 1
+
+            async def run(row_num, row, was_resumed):
+                new_row, changed = await self.process_row(row_num, row)
+                return new_row, changed, was_resumed
+
+            for row_num, row in enumerate(reader, 1):
+                total_rows = row_num
+                # Finished rows come from the last run's output, with their questions
+                previous_row = next(resumed, None) if resumed is not None else None
+                was_resumed = previous_row is not None
+                in_flight.append(asyncio.ensure_future(run(row_num, previous_row if was_resumed else row, was_resumed)))
+                if len(in_flight) >= window:
+                    await finish()
+            while in_flight:
+                await finish()
+
+        self.answers = LLMCache(journal)
+        try:
+            with open(input_file, 'r', encoding='utf-8', newline='') as file, \
+                    open(partial, 'w', encoding='utf-8', newline='') as out:
+                resumed_file = open(previous, 'r', encoding='utf-8', newline='') if done else None
+                try:
+                    resumed = itertools.islice(csv.reader(resumed_file), done) if done else None
+                    asyncio.run(process_rows(csv.reader(file), resumed, csv.writer(out), out))
+                finally:
+                    if resumed_file:
+                        resumed_file.close()
+
+            # Every row is written: the output replaces any older one in one step
+            os.replace(partial, output_file)
+            self.answers.close()
+            self.answers = None
+            for path in (checkpoint, previous, journal, journal + "-wal", journal + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
             print(f"\nProcessing complete!")
             print(f"Total rows: {total_rows}")
             print(f"Successfully processed: {processed_count}")
+            if resumed_count:
+                print(f"Resumed from the last run: {resumed_count}")
             print(f"Errors/skipped: {error_count}")
+            if self.skipped:
+                print(f"Entries that already had a question: {self.skipped}")
+            if self.failures:
+                print(f"Questions that could not be generated: {len(self.failures)}")
+                for term, error in self.failures:
+                    print(f"  - {term}: {error}")
             print(f"Output saved to {output_file}")
             
         except FileNotFoundError:
             print(f"Input file '{input_file}' not found.")
         except Exception as e:
             print(f"Error processing CSV file: {e}")
+            if os.path.exists(checkpoint):
+                print(f"Progress saved to {partial}; run again to resume")
+        finally:
+            if self.answers is not None:
+                self.answers.close()
+                self.answers = None
+
+    @staticmethod
+    def _resume_rows(checkpoint, input_file, partial, previous):
+        """
+        How many finished rows an interrupted run on the same input left, now in
+        `previous`; 0 to start over.
+        """
+        try:
+            with open(checkpoint, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        if state.get("input") != os.path.abspath(input_file):
+            return 0
+        rows, resumed = state.get("rows", 0), state.get("resumed", 0)
+        if resumed > rows and os.path.exists(previous):
+            # That run was itself resuming and stopped early: its source still has more
+            return resumed
+        if rows and os.path.exists(partial):
+            os.replace(partial, previous)
+            return rows
+        return 0
+
+    @staticmethod
+    def _save_checkpoint(checkpoint, input_file, rows, resumed):
+        with open(checkpoint + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump({"input": os.path.abspath(input_file), "rows": rows, "resumed": resumed}, file)
+        os.replace(checkpoint + ".tmp", checkpoint)
 
 
 # Usage example
@@ -205,17 +343,20 @@ def main():
     """
     Example usage of the FlashcardProcessor
     """
-    # Initialize your client here
-    # client = YourClientClass()  # Replace with your actual client
-    
-    # Initialize processor with your client
-    processor = FlashcardProcessor(client)
-    
-    # Process the CSV file
-    input_file = "mammoth_memory_elements.csv"  # Your input CSV file
-    output_file = "elements_questions.csv"  # Output file
-    
-    processor.process_csv_file(input_file, output_file)
+    # Questions are generated concurrently within the executor's RPM/TPM budget. It is
+    # built here rather than on import, so importing this module starts no thread
+    with LLMExecutor(api_key=os.getenv("API_KEY")) as llm:
+        processor = FlashcardProcessor(llm)
+
+        # Process the CSV file
+        input_file = "mammoth_memory_elements.csv"  # Your input CSV file
+        output_file = "elements_questions.csv"  # Output file
+
+        processor.process_csv_file(input_file, output_file)
+        print(processor.templates.summary())
+        if processor.batcher:
+            print(processor.batcher.summary())
+        print(llm.summary())
     
     print("Please configure your client before running the processor")
 
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import re
+from collections import Counter
+
+from html_pruner import count_tokens
+from llm_client import LLMError
+
+
+def parse_answers(output):
+    """
+    The {id: question} map from a batch response, or None if the response isn't one.
+    A list of {"id": ..., "question": ...} objects is accepted too.
+    """
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", output.strip(), flags=re.IGNORECASE)
+    try:
+        answers = json.loads(cleaned)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(answers, list):
+        answers = {str(a.get("id")): a.get("question") for a in answers if isinstance(a, dict)}
+    if not isinstance(answers, dict):
+        return None
+    return {str(key): value for key, value in answers.items()}
+
+
+def clean_question(question):
+    question = question.strip()
+    # Remove quotes if the LLM added them
+    if question.startswith('"') and question.endswith('"'):
+        question = question[1:-1]
+    return question
+
+
+class QuestionBatcher:
+    """
+    Micro-batches question requests into multi-entry LLM calls.
+
+    Callers await question() per entry as before. Entries queued within `max_wait`
+    seconds are sent together, as a JSON list with per-batch ids, and the model
+    answers with a JSON map of id -> question. A batch closes at `max_items`
+    entries or `max_tokens` input tokens. If a response is malformed or the request
+    fails, the batch is split in half and retried. An entry that is still missing
+    from the answers, or a single entry that fails, goes through `fallback` (the
+    one-entry generate_question).
+    """
+
+    def __init__(self, llm, instructions, fallback, model="gpt-4o", max_items=25, max_tokens=3000, max_wait=0.05):
+        self.llm = llm
+        self.instructions = instructions
+        self.fallback = fallback
+        self.model = model
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self.stats = Counter()
+
+        self._pending = []
+        self._pending_tokens = 0
+        self._timer = None
+        self._tasks = set()
+
+    async def question(self, term, definition, mnemonic=""):
+        loop = asyncio.get_running_loop()
+        item = {"term": term, "definition": definition, "mnemonic": mnemonic or ""}
+        future = loop.create_future()
+        tokens = count_tokens(json.dumps(item, ensure_ascii=False), self.model)
+
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+        self._pending.append((item, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            # Keep a reference until the task is done
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _ask(self, batch):
+        payload = [dict(item, id=str(i)) for i, (item, _) in enumerate(batch)]
+        output = await self.llm.complete(self.instructions, json.dumps(payload, ensure_ascii=False), model=self.model)
+        self.stats["requests"] += 1
+        return parse_answers(output)
+
+    async def _run(self, batch):
+        if len(batch) == 1:
+            await self._fall_back(batch)
+            return
+        try:
+            answers = await self._ask(batch)
+        except LLMError as e:
+            print(f"⚠️ Batch of {len(batch)} failed ({e}), splitting")
+            answers = None
+        if answers is None:
+            self.stats["splits"] += 1
+            middle = len(batch) // 2
+            await asyncio.gather(self._run(batch[:middle]), self._run(batch[middle:]))
+            return
+
+        missing = []
+        for i, (item, future) in enumerate(batch):
+            question = answers.get(str(i))
+            if isinstance(question, str) and question.strip():
+                self.stats["batched"] += 1
+                future.set_result(clean_question(question))
+            else:
+                missing.append((item, future))
+        if missing:
+            await self._fall_back(missing)
+
+    async def _fall_back(self, batch):
+        async def one(item, future):
+            self.stats["single"] += 1
+            try:
+                future.set_result(await self.fallback(item["term"], item["definition"], item["mnemonic"]))
+            except Exception as e:
+                future.set_exception(e)
+
+        await asyncio.gather(*(one(item, future) for item, future in batch))
+
+    def summary(self):
+        return (f"Question batching: {self.stats['batched']} questions from {self.stats['requests']} batch requests, "
+                f"{self.stats['single']} single requests, {self.stats['splits']} splits")
@@ -0,0 +1,165 @@
+import difflib
+import re
+from collections import Counter
+
+from category_split import extract_subject_from_url
+
+
+def display_term(term):
+    # "Accelerando (or accel.)" -> "Accelerando"
+    return term.split('(')[0].strip()
+
+
+def word_count(text):
+    return len(text.split()) if isinstance(text, str) else 0
+
+
+class QuestionTemplate:
+    """
+    A fixed question pattern for one kind of entry.
+
+    It applies when the entry's subject (from its page URL) and URL match, the
+    entry has the `fields` it needs, and the optional `check(entry)` passes.
+    `question` is formatted with the entry's fields, plus `display_term` and
+    anything `extra(entry)` returns.
+    """
+
+    def __init__(self, name, question, subject=None, url_contains=None, fields=("term", "definition"),
+                 check=None, extra=None):
+        self.name = name
+        self.question = question
+        self.subject = subject
+        self.url_contains = url_contains
+        self.fields = fields
+        self.check = check
+        self.extra = extra
+
+    def matches(self, entry, subject, url):
+        if self.subject is not None and subject != self.subject:
+            return False
+        if self.url_contains is not None and self.url_contains not in (url or ""):
+            return False
+        # Only string fields are matched; a dict definition (a table on the page) goes to the LLM
+        if not all(isinstance(entry.get(field), str) and entry[field].strip() for field in self.fields):
+            return False
+        return self.check is None or self.check(entry)
+
+    def render(self, entry):
+        values = dict(entry)
+        if entry.get("term"):
+            values["display_term"] = display_term(entry["term"])
+        if self.extra:
+            values.update(self.extra(entry))
+        return self.question.format(**values)
+
+
+CAPITAL_PATTERNS = [
+    # "Nepal's capital", "Nepal's capital is Kathmandu", "Cambodia's capital: Phnom Penh"
+    re.compile(r"^(?:the\s+)?(?P<country>[^'’:]+?)['’]s?\s+capital(?:\s+city)?(?:\s+is\b.*|\s*:.*|\.)?$", re.IGNORECASE),
+    # "Capital of Chad", "The capital city of Papua New Guinea.", "The capital of Bolivia is Sucre."
+    re.compile(r"^(?:the\s+)?capital(?:\s+city)?\s+of\s+(?:the\s+US\s+state\s+)?(?P<country>[^,;:]+?)"
+               r"(?:\s+is\b.*|\.)?$", re.IGNORECASE),
+]
+
+
+def capital_country(entry):
+    """
+    The country whose capital `entry` is about, parsed from its term or definition,
+    or None. The term alone is never taken as the country: it is often the
+    capital itself ("Cayenne", "N'Djamena").
+    """
+    for field in ("term", "definition"):
+        text = entry.get(field)
+        if not isinstance(text, str):
+            continue
+        for pattern in CAPITAL_PATTERNS:
+            match = pattern.match(text.strip())
+            if not match:
+                continue
+            country = match.group("country").strip()
+            if len(country.split()) > 5 or re.search(r"\s[-–—]\s", country):
+                # "Nevada – Nevada's capital is Carson City": not a clean name
+                continue
+            if field == "definition":
+                return _spelled_as_term(country, entry.get("term"))
+            return country
+    return None
+
+
+def _spelled_as_term(country, term):
+    # Definitions misspell names ("British Virgin Island's capital"); a term that is
+    # the same name spelled properly is used instead
+    if not isinstance(term, str) or re.search(r"[-–—(]|capital", term, re.IGNORECASE):
+        return country
+    term = term.strip()
+    similar = difflib.SequenceMatcher(None, country.lower(), re.sub(r"^the\s+", "", term, flags=re.IGNORECASE).lower())
+    return term if similar.ratio() >= 0.85 else country
+
+
+# Pages of the names section (memory/remembering-names/...)
+NAMES_PAGES = "remembering-names"
+
+# Checked in order; the first match wins
+TEMPLATES = [
+    QuestionTemplate(
+        "element_symbol", "What is the chemical symbol for {term}?",
+        subject="chemistry", url_contains="periodic-table",
+        check=lambda entry: re.search(r"\bsymbol\b", entry["definition"], re.IGNORECASE) is not None),
+    QuestionTemplate(
+        "capital", "What is the capital of {country}?",
+        subject="geography", check=lambda entry: capital_country(entry) is not None,
+        extra=lambda entry: {"country": capital_country(entry)}),
+    QuestionTemplate(
+        "music_term", 'What does "{display_term}" mean in music?',
+        subject="music", url_contains="music-vocabulary",
+        check=lambda entry: word_count(entry["definition"]) <= 8),
+    QuestionTemplate(
+        "vocabulary", 'What does "{display_term}" mean in English?',
+        subject="languages",
+        check=lambda entry: word_count(entry["definition"]) <= 6 and word_count(entry["term"]) <= 4),
+    # Name lists (get-name-mnemonics.py) only have a name and its mnemonic
+    QuestionTemplate(
+        "first_name", "What is the first name associated with {name}?",
+        subject="memory", url_contains=NAMES_PAGES, fields=("name",)),
+    # Term without a definition on a names page, e.g. "Alberto (first name)"; elsewhere
+    # ("January", a king) a missing definition says nothing about the entry being a name
+    QuestionTemplate(
+        "name_only", "What is the first name associated with {display_term}?",
+        subject="memory", url_contains=NAMES_PAGES,
+        fields=("term",), check=lambda entry: not entry.get("definition")),
+]
+
+
+class TemplateEngine:
+    """
+    Generates questions locally for entries that follow a known pattern, so only
+    the rest need the LLM.
+    """
+
+    def __init__(self, templates=TEMPLATES):
+        self.templates = templates
+        self.stats = Counter()
+
+    def question_for(self, entry, url=None):
+        """
+        The templated question for `entry` (from the page at `url`), or None if no template applies.
+        """
+        subject = extract_subject_from_url(url) if url else None
+        for template in self.templates:
+            try:
+                if not template.matches(entry, subject, url):
+                    continue
+                question = template.render(entry)
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+                # An entry a template can't handle is left to the LLM rather than failing its row
+                print(f"Warning: {template.name} template failed for {str(entry.get('term'))[:50]}: {e}")
+                continue
+            self.stats[template.name] += 1
+            return question
+        self.stats["no_template"] += 1
+        return None
+
+    def summary(self):
+        templated = sum(count for name, count in self.stats.items() if name != "no_template")
+        details = ", ".join(f"{name} {count}" for name, count in self.stats.most_common() if name != "no_template")
+        return f"Templates: {templated} questions ({details}), {self.stats['no_template']} entries left for the LLM"
@@ -0,0 +1,224 @@
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def _to_text(value):
+    # Lists and dicts are stored as JSON in the text-only backends
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class RecordSink:
+    """
+    Long-lived, thread-safe record writer with batched flushes.
+
+    Records are buffered and written every `batch_size` records or `flush_interval`
+    seconds. Each flush is a checkpoint: the data is written, fsynced, and only then
+    are the `on_saved` callbacks of the flushed records run, so callers can mark
+    progress (e.g. in CrawlState) without ever getting ahead of the data on disk.
+    """
+
+    def __init__(self, path, fields, batch_size=50, flush_interval=5.0):
+        self.path = path
+        self.fields = list(fields)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+
+        self._buffer = []
+        self._callbacks = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._open()
+
+    def write(self, record, on_saved=None):
+        with self._lock:
+            self._buffer.append({field: record.get(field) for field in self.fields})
+            if on_saved:
+                self._callbacks.append(on_saved)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def defer(self, callback):
+        """
+        Run `callback` after the next flush, in order with the records written before it.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def _flush_locked(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._sync()
+            self.written += len(self._buffer)
+            self._buffer = []
+        callbacks, self._callbacks = self._callbacks, []
+        self._last_flush = time.monotonic()
+        for callback in callbacks:
+            callback()
+
+    def checkpoint(self):
+        """
+        Write and fsync everything buffered so far.
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Backend hooks
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def _sync(self):
+        pass
+
+    def _close(self):
+        pass
+
+
+class _FileSink(RecordSink):
+    mode = 'a'
+
+    def _open(self):
+        self.file = open(self.path, self.mode, newline='', encoding='utf-8')
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _close(self):
+        self.file.close()
+
+
+class CsvSink(_FileSink):
+    """
+    Appends to a CSV in the same layout the pandas to_csv(mode='a') calls produced.
+    The header is written once, when the file is new or empty.
+    """
+
+    def _open(self):
+        super()._open()
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fields, lineterminator='\n')
+        if self.file.tell() == 0:
+            self.writer.writeheader()
+
+    def _write_batch(self, rows):
+        self.writer.writerows(rows)
+
+
+class JsonlSink(_FileSink):
+    def _write_batch(self, rows):
+        self.file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+
+
+class SqliteSink(RecordSink):
+    def _open(self):
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        columns = ", ".join(f'"{field}" TEXT' for field in self.fields)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, {columns})")
+        placeholders = ", ".join("?" for _ in self.fields)
+        quoted = ", ".join(f'"{field}"' for field in self.fields)
+        self.insert_sql = f"INSERT INTO records ({quoted}) VALUES ({placeholders})"
+
+    def _write_batch(self, rows):
+        self.conn.executemany(self.insert_sql, [[_to_text(row[field]) for field in self.fields] for row in rows])
+        self.conn.commit()
+
+    def _close(self):
+        self.conn.close()
+
+
+class ParquetSink(RecordSink):
+    """
+    Writes one Parquet row group per flushed batch. Requires pyarrow.
+    Parquet files can't be appended to, so an existing file is replaced.
+    """
+
+    def _open(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([(field, pa.string()) for field in self.fields])
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+
+    def _write_batch(self, rows):
+        columns = {field: [_to_text(row[field]) for row in rows] for field in self.fields}
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def _close(self):
+        self.writer.close()
+
+
+BACKENDS = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "sqlite": SqliteSink,
+    "parquet": ParquetSink,
+}
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".parquet": "parquet",
+}
+
+
+def open_sink(path, fields, backend=None, **kwargs):
+    """
+    Open a sink, picking the backend from the file extension unless `backend` is given.
+    """
+    if backend is None:
+        backend = EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+    return BACKENDS[backend](path, fields, **kwargs)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_sink(path, fields, backend=None, **kwargs):
+    """
+    One open sink per output file for the whole process, shared by every scraper
+    writing to it. Shared sinks are flushed and closed at exit.
+    """
+    key = os.path.abspath(path)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = open_sink(path, fields, backend, **kwargs)
+        return _shared[key]
+
+
+def close_shared_sinks():
+    with _shared_lock:
+        for sink in _shared.values():
+            sink.close()
+        _shared.clear()
+
+
+atexit.register(close_shared_sinks)
@@ -0,0 +1,150 @@
+import re
+from collections import Counter
+
+from extraction_schema import canonical, with_ids
+
+# Mammoth Memory marks the mnemonic text with red spans; black spans nested inside
+# them are plain text that was wrapped by the editor
+RED = "#ff0000"
+BLACK = "#000000"
+MNEMONIC_TAGS = ["img", "p", "figcaption"]
+TITLE_SEPARATOR = re.compile(r"\s[–-]\s")
+
+
+def _styled_span(color):
+    return lambda el: el.name == "span" and color in el.get("style", "").replace(" ", "").lower()
+
+
+is_red_span = _styled_span(RED)
+is_black_span = _styled_span(BLACK)
+
+
+def heading_term(soup):
+    """
+    Term and definition from the first <h1>, e.g. "Proton – a positive particle".
+    Without a separator, the next sibling of the heading is taken as the definition.
+    """
+    h1_tag = soup.find('h1')
+    if not h1_tag:
+        return None, None
+    h1_text = h1_tag.get_text().strip().replace('\xa0', ' ')
+    parts = TITLE_SEPARATOR.split(h1_text, 1)
+    if len(parts) == 2:
+        return parts[0].strip(), parts[1].strip()
+    sibling = h1_tag.find_next_sibling()
+    return h1_text, (sibling.get_text().strip() or None) if sibling else None
+
+
+def full_word(fragment, text):
+    """
+    Sometimes only part of a word is red ("<red>pro</red>fessional"); keywords are whole words.
+    """
+    if not fragment:
+        return fragment
+    match = re.search(r"\w*" + re.escape(fragment) + r"\w*", text)
+    return match.group(0) if match else fragment
+
+
+def extract_items(main_content):
+    """
+    Mnemonics in page order, following the same conventions as auto-scraper.py:
+    a <p>/<figcaption> containing red spans is a mnemonic, paired with the image
+    before it, and only the first mnemonic after each image is taken.
+    """
+    items = []
+    image = None
+    found_after_img = False
+
+    for tag in main_content.find_all(MNEMONIC_TAGS):
+        if tag.name == "img":
+            image = tag.get('src') or image
+            found_after_img = False
+            continue
+        if found_after_img:
+            continue
+
+        red_spans = tag.find_all(is_red_span)
+        text = tag.get_text().strip()
+        if not red_spans or "NOTE" in text:
+            continue
+
+        keywords = []
+        for span in red_spans:
+            keyword = full_word(span.get_text().strip().strip('.,;:!?"\''), text)
+            if keyword and "NOTE" not in keyword and not span.find(is_black_span) and keyword not in keywords:
+                keywords.append(keyword)
+
+        items.append({
+            "term": None,
+            "definition": None,
+            "mnemonic": text,
+            "image": image,
+            "keywords": keywords,
+        })
+        if image:
+            found_after_img = True
+    return items
+
+
+def confidence(items):
+    """
+    0..1 estimate of how likely the rule-based result matches what the LLM would return.
+    """
+    if not items:
+        return 0.0
+    if len(items) > 1:
+        # Several mnemonics on one page: the term of each one isn't in a fixed place
+        return 0.3
+    item = items[0]
+    score = 1.0
+    if not item["term"]:
+        score -= 0.5
+    if not item["keywords"]:
+        score -= 0.3
+    if not item["definition"]:
+        score -= 0.1
+    return round(max(score, 0.0), 2)
+
+
+def extract_rules(soup):
+    """
+    Deterministic extraction in the LLM's term/definition/mnemonic/image/keywords schema.
+    Returns (items, confidence).
+    """
+    main_content = soup.find("div", id="mainContent")
+    if main_content is None:
+        return [], 0.0
+    items = extract_items(main_content)
+    if len(items) == 1:
+        items[0]["term"], items[0]["definition"] = heading_term(soup)
+    return items, confidence(items)
+
+
+def to_llm_format(items, url=None):
+    # Same canonical JSON the structured LLM extraction stores, so the rest of the pipeline can't tell them apart.
+    # With the page's url every entry gets its stable id
+    return canonical(with_ids(url, items) if url else items)
+
+
+class RuleExtractor:
+    """
+    Rule-based extraction first; pages scoring below `threshold` go to the LLM.
+    """
+
+    def __init__(self, threshold=0.7):
+        self.threshold = threshold
+        self.stats = Counter()
+
+    def extract(self, soup, url, llm_fallback):
+        items, score = extract_rules(soup)
+        if score >= self.threshold:
+            self.stats["rules"] += 1
+            print(f"📏 Extracted {url} with rules (confidence {score})")
+            return to_llm_format(items, url)
+        self.stats["llm"] += 1
+        print(f"🤖 Low rule confidence ({score}) for {url}, using LLM")
+        return llm_fallback()
+
+    def summary(self):
+        total = self.stats["rules"] + self.stats["llm"]
+        return f"Extraction: {self.stats['rules']} of {total} pages by rules, {self.stats['llm']} by LLM"
@@ -0,0 +1,7 @@
+import os
+import sys
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+# The modules live at the repository root, next to the scripts; the test helpers here
+sys.path.insert(0, os.path.dirname(TESTS))
+sys.path.insert(0, TESTS)
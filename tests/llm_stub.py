@@ -0,0 +1,184 @@
+"""
+A local stand-in for the OpenAI responses API, for testing LLMExecutor without
+network access or an API key.
+
+POST /v1/responses answers "echo: <input>" with a fixed usage of 42 tokens,
+streamed as server-sent events when asked. With a JSON-schema text format the
+answer is one schema-valid item instead. `fail` is a list of HTTP status
+codes returned, one per request, before requests succeed again (429s carry
+Retry-After). A streamed input containing "TRUNCATE" is cut off halfway,
+without a response.completed event.
+
+The Batch API is there too: /v1/files uploads and downloads, and /v1/batches,
+which reports a batch in_progress on the first retrieve and completed, with
+an output file (and an error file for `fail_ids`), on the next.
+"""
+import itertools
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USAGE = {"input_tokens": 30, "output_tokens": 12, "total_tokens": 42,
+         "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}}
+
+
+def answer(body):
+    text_format = (body.get("text") or {}).get("format") or {}
+    if text_format.get("type") != "json_schema":
+        return f"echo: {body['input']}"
+    fields = text_format["schema"]["properties"]["items"]["items"]["properties"]
+    tag = str(body["input"])[:20]
+    item = {field: [] if spec.get("type") == "array" else f"{field} of {tag}" for field, spec in fields.items()}
+    return json.dumps({"items": [item]})
+
+
+def response_object(model, text):
+    return {
+        "id": "resp_stub", "object": "response", "created_at": 0, "model": model, "status": "completed",
+        "parallel_tool_calls": True, "tool_choice": "auto", "tools": [],
+        "output": [{"type": "message", "id": "msg_stub", "role": "assistant", "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+        "usage": USAGE,
+    }
+
+
+class StubServer:
+    def __init__(self):
+        self.fail = []
+        self.fail_ids = set()
+        self.requests = []
+        self.files = {}
+        self.batches = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, obj, status=200, headers=None):
+                body = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                match = re.match(r"/v1/files/([^/]+)/content", self.path)
+                if match:
+                    content = stub.files[match.group(1)]
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    return self.wfile.write(content)
+                batch = stub.batches[re.match(r"/v1/batches/([^/?]+)", self.path).group(1)]
+                stub._advance(batch)
+                self._send_json(stub._batch_object(batch))
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.path.startswith("/v1/files"):
+                    return self._send_json(stub._upload(self.headers["Content-Type"], data))
+                body = json.loads(data)
+                if self.path.startswith("/v1/batches"):
+                    return self._send_json(stub._create_batch(body))
+                with stub._lock:
+                    stub.requests.append(body)
+                    status = stub.fail.pop(0) if stub.fail else None
+                if status is not None:
+                    error = {"error": {"message": f"stub {status}", "type": "stub", "code": None}}
+                    return self._send_json(error, status, {"retry-after": "0.01"} if status == 429 else None)
+                text = answer(body)
+                if body.get("stream"):
+                    return self._stream(body, text)
+                self._send_json(response_object(body["model"], text))
+
+            def _stream(self, body, text):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                truncate = "TRUNCATE" in body["input"]
+                pieces = [text[i:i + 5] for i in range(0, len(text), 5)]
+                for n, piece in enumerate(pieces):
+                    if truncate and n >= len(pieces) // 2:
+                        self.wfile.flush()
+                        return
+                    self._event({"type": "response.output_text.delta", "item_id": "msg_stub", "output_index": 0,
+                                 "content_index": 0, "delta": piece, "sequence_number": n, "logprobs": []})
+                self._event({"type": "response.completed", "response": response_object(body["model"], text),
+                             "sequence_number": len(pieces)})
+
+            def _event(self, event):
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _new_id(self, prefix):
+        return f"{prefix}-{next(self._ids)}"
+
+    def _upload(self, content_type, data):
+        boundary = content_type.split("boundary=")[1].encode()
+        content = b""
+        for part in data.split(b"--" + boundary):
+            if b'name="file"' in part:
+                content = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+        file_id = self._new_id("file")
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": 0,
+                "filename": "batch.jsonl", "purpose": "batch", "status": "processed"}
+
+    def _create_batch(self, body):
+        lines = self.files[body["input_file_id"]].decode().splitlines()
+        batch = {"id": self._new_id("batch"), "input": body["input_file_id"], "status": "validating",
+                 "total": len(lines), "metadata": body.get("metadata")}
+        self.batches[batch["id"]] = batch
+        return self._batch_object(batch)
+
+    def _advance(self, batch):
+        if batch["status"] == "validating":
+            batch["status"] = "in_progress"
+            return
+        if batch["status"] != "in_progress":
+            return
+        outputs, errors = [], []
+        for line in self.files[batch["input"]].decode().splitlines():
+            request = json.loads(line)
+            if request["custom_id"] in self.fail_ids:
+                errors.append({"id": "req", "custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "server_error", "message": "stub failure"}})
+                continue
+            body = response_object(request["body"]["model"], answer(request["body"]))
+            outputs.append({"id": "req", "custom_id": request["custom_id"], "error": None,
+                            "response": {"status_code": 200, "request_id": "req", "body": body}})
+        batch["output"] = self._new_id("file")
+        self.files[batch["output"]] = "".join(json.dumps(record) + "\n" for record in outputs).encode()
+        if errors:
+            batch["error"] = self._new_id("file")
+            self.files[batch["error"]] = "".join(json.dumps(record) + "\n" for record in errors).encode()
+        batch["completed"], batch["failed"], batch["status"] = len(outputs), len(errors), "completed"
+
+    @staticmethod
+    def _batch_object(batch):
+        return {"id": batch["id"], "object": "batch", "endpoint": "/v1/responses", "input_file_id": batch["input"],
+                "completion_window": "24h", "status": batch["status"], "created_at": 0,
+                "output_file_id": batch.get("output"), "error_file_id": batch.get("error"),
+                "request_counts": {"total": batch["total"], "completed": batch.get("completed", 0),
+                                   "failed": batch.get("failed", 0)},
+                "metadata": batch.get("metadata")}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,53 @@
+"""
+MnemonicScraper.scrape_frontier over prefetched pages: a page whose parse
+raises is marked failed and the rest of the frontier is still scraped.
+"""
+import asyncio
+import csv
+import importlib.util
+import os
+
+import pytest
+
+from crawl_state import DONE, FAILED, CrawlState
+from discovery import BASE_URL, Frontier
+from record_sink import close_shared_sinks
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = os.path.join(ROOT, "tests", "fixtures", "pages")
+
+
+@pytest.fixture
+def auto_scraper():
+    spec = importlib.util.spec_from_file_location("auto_scraper", os.path.join(ROOT, "auto-scraper.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_parse_error_marks_only_that_page_failed(auto_scraper, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(os.path.join(PAGES, "simple.html"), encoding='utf-8') as f:
+        html = f.read()
+    urls = [f"{BASE_URL}/chemistry/page-{i}.html" for i in range(3)]
+    frontier = Frontier()
+    for url in urls:
+        frontier.add(url, html)
+
+    state = CrawlState(":memory:")
+    scraper = auto_scraper.MnemonicScraper(None, fetcher=object(), state=state)
+    parse_page = scraper.parse_page
+
+    def parse(content, url):
+        if url == urls[1]:
+            raise ValueError("not enough values to unpack")
+        return parse_page(content, url)
+
+    scraper.parse_page = parse
+    data = asyncio.run(scraper.scrape_frontier(frontier))
+    close_shared_sinks()
+
+    assert [row["url"] for row in data] == [urls[0], urls[2]]
+    assert [state.status(url) for url in urls] == [DONE, FAILED, DONE]
+    with open(tmp_path / "mammoth_memory_auto_data.csv", newline='', encoding='utf-8') as f:
+        assert len(list(csv.DictReader(f))) == 2
@@ -0,0 +1,158 @@
+"""
+batch_mode.py end to end against the local stub server (tests/llm_stub.py):
+submit, poll and ingest, for question and extraction jobs.
+"""
+import csv
+import json
+import os
+import sys
+
+import pytest
+from openai import OpenAI
+
+from llm_stub import StubServer
+
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def batch_mode(tmp_path, monkeypatch):
+    import batch_mode
+    from llm_cache import LLMCache
+
+    monkeypatch.setattr(batch_mode, "BATCH_DIR", str(tmp_path / "batches"))
+    monkeypatch.setattr(batch_mode, "REGISTRY", str(tmp_path / "batches" / "batches.json"))
+    monkeypatch.setattr(batch_mode, "LLMCache", lambda: LLMCache(str(tmp_path / "cache.db")))
+    return batch_mode
+
+
+@pytest.fixture
+def client(stub):
+    return OpenAI(api_key="test", base_url=stub.url)
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "concept_and_mnemonic"])
+        writer.writerows(rows)
+
+
+def read_entries(path):
+    csv.field_size_limit(sys.maxsize)
+    from mnemonic_json import decode
+    with open(path, newline='', encoding='utf-8') as f:
+        return [entry for row in list(csv.reader(f))[1:] for entry in decode(row[1])]
+
+
+def question_rows(count):
+    entries = [{"term": f"Term {i}", "definition": f"Definition of term {i}", "mnemonic": f"Mnemonic {i}"}
+               for i in range(count)]
+    # Two entries per row, on a subject without question templates
+    return [[f"https://mammothmemory.net/physics/page-{i}.html", json.dumps(entries[i:i + 2])]
+            for i in range(0, count, 2)]
+
+
+def test_questions_split_over_several_batches(batch_mode, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_mode, "MAX_REQUESTS", 2)
+    input_file, output_file = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_csv(input_file, question_rows(5))
+
+    batch_ids = batch_mode.prepare_questions(client, str(input_file), str(output_file))
+    assert len(batch_ids) == 3
+    registry = batch_mode.load_registry()
+    assert len({registry[batch_id]["job_id"] for batch_id in batch_ids}) == 1
+
+    # First poll: still running, nothing written
+    assert batch_mode.poll(client) == 3
+    assert not output_file.exists()
+
+    assert batch_mode.poll(client) == 0
+    entries = read_entries(output_file)
+    assert len(entries) == 5
+    # The answers of every batch are in the output, not only the last one's
+    assert all(entry["question"].startswith("echo: ") for entry in entries)
+    assert all(job["ingested"] for job in batch_mode.load_registry().values())
+
+    # Stored in the canonical form, like the extraction output
+    from extraction_schema import canonical
+    with open(output_file, newline='', encoding='utf-8') as f:
+        fields = [row[1] for row in list(csv.reader(f))[1:]]
+    assert fields == [canonical(json.loads(field)) for field in fields]
+    assert not any(field.startswith("```") for field in fields)
+
+
+def test_failed_questions_are_left_out(batch_mode, client, stub, tmp_path):
+    input_file, output_file = tmp_path / "in.csv", tmp_path / "out.csv"
+    write_csv(input_file, question_rows(4))
+    stub.fail_ids = {batch_mode.question_id("Term 1", "Definition of term 1", "Mnemonic 1")}
+
+    batch_mode.prepare_questions(client, str(input_file), str(output_file))
+    batch_mode.poll(client, wait=True, interval=0)
+
+    questions = {entry["term"]: entry.get("question") for entry in read_entries(output_file)}
+    assert questions.pop("Term 1") is None
+    assert all(questions.values())
+
+
+def test_extraction(batch_mode, client, tmp_path):
+    output = tmp_path / "mnemonics.csv"
+    batch_ids = batch_mode.prepare_extraction(client, PAGES, output=str(output))
+    assert batch_ids
+    submitted = sum(job["requests"] for job in batch_mode.load_registry().values())
+
+    batch_mode.poll(client, wait=True, interval=0)
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    batched = [row for row in rows if "term of " in row["concept_and_mnemonic"]]
+    assert len(batched) >= submitted
+    for row in batched:
+        (item,) = json.loads(row["concept_and_mnemonic"])
+        assert item["id"] and item["mnemonic"]
+
+    # A rerun answers the same pages from the LLM cache: nothing left to batch
+    assert batch_mode.prepare_extraction(client, PAGES, output=str(tmp_path / "again.csv")) == []
+
+
+def test_extraction_by_chunk(batch_mode, client, tmp_path, monkeypatch):
+    # Small chunks so the fixture pages split, and small batches so a page's chunks straddle them
+    monkeypatch.setattr(batch_mode, "CHUNK_TOKENS", 40)
+    monkeypatch.setattr(batch_mode, "MAX_REQUESTS", 3)
+    output = tmp_path / "mnemonics.csv"
+    batch_ids = batch_mode.prepare_extraction(client, PAGES, output=str(output))
+    assert len(batch_ids) > 1
+    registry = batch_mode.load_registry()
+    with open(next(iter(registry.values()))["pages"], encoding='utf-8') as f:
+        pages = json.load(f)
+    assert any(len(page["keys"]) > 1 for page in pages)
+
+    batch_mode.poll(client, wait=True, interval=0)
+    with open(output, newline='', encoding='utf-8') as f:
+        rows = {row["url"]: row["concept_and_mnemonic"] for row in csv.DictReader(f)}
+    assert all(page["url"] in rows for page in pages)
+
+    # A synchronous run with the same chunk size finds every chunk in the cache
+    from bs4 import BeautifulSoup
+    from bench_extractors import load_corpus
+    from extraction_schema import MNEMONIC
+    from html_chunker import ChunkedExtractor
+    from html_pruner import HtmlPruner
+    from prompts import MAIN_CONTENT_EXTRACTION
+
+    llm_cache = batch_mode.LLMCache()
+    chunked = ChunkedExtractor(llm_cache, llm=None, max_tokens=40, schema=MNEMONIC)
+    batched = {page["url"] for page in pages}
+    for _, url, html in load_corpus(PAGES):
+        if url not in batched:
+            continue
+        main_content = BeautifulSoup(html, "html.parser").find("div", id="mainContent")
+        input = HtmlPruner().prune(main_content, url)
+        assert chunked.complete(MAIN_CONTENT_EXTRACTION, input, url) == rows[url]
+    assert llm_cache.misses == 0
+    llm_cache.close()
@@ -0,0 +1,93 @@
+"""
+BrowserPool slot bookkeeping, with a fake browser in place of Chrome.
+"""
+import threading
+
+import pytest
+
+import browser_pool
+
+
+class FakeBrowser:
+    fail_next = 0
+
+    def __init__(self, options):
+        if FakeBrowser.fail_next:
+            FakeBrowser.fail_next -= 1
+            raise RuntimeError("chrome failed to start")
+        self.pages = 0
+        self.broken = False
+        self.quit_called = False
+
+    def open_tab(self):
+        pass
+
+    def close_tab(self):
+        pass
+
+    def memory_mb(self):
+        return None
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture(autouse=True)
+def fake_chrome(monkeypatch):
+    FakeBrowser.fail_next = 0
+    monkeypatch.setattr(browser_pool, "PooledBrowser", FakeBrowser)
+
+
+def test_recycle_replaces_the_browser():
+    pool = browser_pool.BrowserPool(size=1, max_pages=1, options=object())
+    with pool.tab() as browser:
+        browser.pages = 1
+    with pool.tab() as replacement:
+        assert replacement is not browser
+    assert browser.quit_called
+    assert pool._all == [replacement] and pool.recycled == 1
+
+
+def test_failed_replacement_frees_the_slot():
+    pool = browser_pool.BrowserPool(size=1, max_pages=1, options=object())
+    with pool.tab() as browser:
+        browser.pages = 1
+        FakeBrowser.fail_next = 1
+    # The quit browser is gone and its slot is free again
+    assert pool._all == []
+    with pool.tab() as replacement:
+        assert replacement is not browser
+    assert pool._all == [replacement]
+
+
+def test_waiting_walker_gets_a_freed_slot():
+    pool = browser_pool.BrowserPool(size=1, max_pages=1, options=object())
+    leased = threading.Event()
+    results = []
+
+    def walker():
+        leased.wait()
+        with pool.tab() as browser:
+            results.append(browser)
+
+    with pool.tab() as browser:
+        thread = threading.Thread(target=walker, daemon=True)
+        thread.start()
+        leased.set()
+        # The walker blocks on the full pool; this browser's replacement then fails to start
+        thread.join(0.2)
+        browser.pages = 1
+        FakeBrowser.fail_next = 1
+    thread.join(5)
+    assert not thread.is_alive()
+    assert results and results[0] is not browser
+
+
+def test_cold_pool_start_failure_frees_the_slot():
+    pool = browser_pool.BrowserPool(size=1, options=object(), warm=False)
+    FakeBrowser.fail_next = 1
+    with pytest.raises(RuntimeError):
+        with pool.tab():
+            pass
+    with pool.tab() as browser:
+        assert pool._all == [browser]
@@ -0,0 +1,80 @@
+"""
+category_split.py against tests/fixtures/split: mnemonics.csv and the output
+the original, load-everything category_split.py wrote for it (expected/).
+The fixture entries already carry their ids, so they pass through unchanged.
+"""
+import gzip
+import json
+import os
+
+import pytest
+
+import category_split
+from extraction_schema import entry_id
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "split")
+CSV = os.path.join(FIXTURES, "mnemonics.csv")
+EXPECTED = os.path.join(FIXTURES, "expected")
+SUBJECTS = ["chemistry", "music", "geography"]
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_split_is_byte_identical_to_the_baseline(tmp_path):
+    categories = tmp_path / "categories"
+    counts = category_split.split_csv(CSV, str(categories))
+    assert counts == {"chemistry": 3, "music": 2, "geography": 2}
+    names = sorted(os.listdir(os.path.join(EXPECTED, "categories")))
+    assert sorted(os.listdir(categories)) == names
+    for name in names:
+        assert read_bytes(categories / name) == read_bytes(os.path.join(EXPECTED, "categories", name)), name
+
+
+def test_combined_array_is_byte_identical_to_the_baseline(tmp_path):
+    output = tmp_path / "mnemonics_converted.json"
+    category_split.csv_to_json_array(CSV, str(output))
+    assert read_bytes(output) == read_bytes(os.path.join(EXPECTED, "mnemonics_converted.json"))
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "jsonl.gz"])
+def test_json_lines_hold_the_same_items(tmp_path, fmt):
+    categories = tmp_path / "categories"
+    category_split.split_csv(CSV, str(categories), fmt=fmt)
+    opener = gzip.open if fmt.endswith(".gz") else open
+    for subject in SUBJECTS:
+        with opener(categories / f"{subject}.{fmt}", 'rt', encoding='utf-8') as f:
+            items = [json.loads(line) for line in f]
+        with open(os.path.join(EXPECTED, "categories", f"{subject}.json"), encoding='utf-8') as f:
+            assert items == json.load(f)
+    with opener(categories / f"all_subjects.{fmt}", 'rt', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    with open(os.path.join(EXPECTED, "categories", "all_subjects.json"), encoding='utf-8') as f:
+        expected = json.load(f)
+    assert lines == [{"subject": subject, "item": item} for subject, items in expected.items() for item in items]
+
+
+def test_rows_without_ids_get_them(tmp_path):
+    url = "https://mammothmemory.net/chemistry/atomic-structure/protons/protons.html"
+    entry = {"term": "Proton", "mnemonic": "A PRO footballer"}
+    path = tmp_path / "old.csv"
+    path.write_text(f'url,concept_and_mnemonic\n{url},"{json.dumps([entry]).replace(chr(34), chr(34) * 2)}"\n',
+                    encoding='utf-8')
+    category_split.split_csv(str(path), str(tmp_path / "categories"))
+    with open(tmp_path / "categories" / "chemistry.json", encoding='utf-8') as f:
+        assert json.load(f) == [{"id": entry_id(url, entry), **entry}]
+
+
+def test_failed_run_keeps_the_previous_files(tmp_path, monkeypatch):
+    categories = tmp_path / "categories"
+    category_split.split_csv(CSV, str(categories))
+    before = {name: read_bytes(categories / name) for name in os.listdir(categories)}
+
+    def broken(url, items):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(category_split, "with_ids", broken)
+    assert category_split.split_csv(CSV, str(categories)) is None
+    assert {name: read_bytes(categories / name) for name in os.listdir(categories)} == before
@@ -0,0 +1,35 @@
+"""
+CrawlState resume points, including chains seeded from an old output CSV.
+"""
+import csv
+
+from crawl_state import CrawlState
+
+START = "https://mammothmemory.net/chemistry/atomic-structure/protons/protons.html"
+SECOND = "https://mammothmemory.net/chemistry/atomic-structure/electrons/electrons.html"
+
+
+def test_new_chain_starts_at_its_first_page():
+    state = CrawlState(":memory:")
+    assert state.resume_point(START) == (START, 0)
+
+
+def test_partly_walked_chain_resumes_after_the_last_done_page():
+    state = CrawlState(":memory:")
+    state.mark_done(START, START, 0, SECOND)
+    assert state.resume_point(START) == (SECOND, 1)
+    state.mark_done(SECOND, START, 1, None)
+    assert state.resume_point(START) is None
+
+
+def test_seeded_start_counts_as_walked(tmp_path):
+    path = tmp_path / "old.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "concept_and_mnemonic"])
+        writer.writerow([START, "[]"])
+    state = CrawlState(":memory:")
+    assert state.seed_from_csv(str(path)) == 1
+    assert state.resume_point(START) is None
+    # Chains the old CSV never reached are still pending
+    assert state.resume_point(SECOND) == (SECOND, 0)
@@ -0,0 +1,61 @@
+"""
+discover() and Frontier against an in-memory site.
+"""
+import asyncio
+
+from discovery import BASE_URL, Frontier, discover
+
+
+def content_page(next_url=None):
+    next_link = f'<div class="page-next"><a href="{next_url}">next</a></div>' if next_url else ""
+    return f'<html><body><div id="mainContent"><p>text</p></div>{next_link}</body></html>'
+
+
+class FakeFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    async def fetch_all(self, urls):
+        self.fetched.extend(urls)
+        return [self.pages.get(url) for url in urls]
+
+
+def chain(length):
+    urls = [f"{BASE_URL}/art/page-{i}.html" for i in range(length)]
+    pages = {url: content_page(urls[i + 1] if i + 1 < length else None) for i, url in enumerate(urls)}
+    return urls, pages
+
+
+def test_walks_the_whole_chain():
+    urls, pages = chain(5)
+    frontier = asyncio.run(discover(urls[:1], FakeFetcher(pages)))
+    assert frontier.urls() == urls
+    assert frontier.unexplored == 0
+
+
+def test_max_pages_is_reported(capsys):
+    urls, pages = chain(5)
+    seeds = urls[:1] + [f"{BASE_URL}/art/other-{i}.html" for i in range(3)]
+    fetcher = FakeFetcher(pages)
+    frontier = asyncio.run(discover(seeds, fetcher, max_pages=2))
+    assert len(fetcher.fetched) == 2
+    # Two seeds were cut from the first level and the chain's next page was queued
+    assert frontier.unexplored == 3
+    assert "max_pages=2" in capsys.readouterr().out
+
+
+def test_html_is_capped():
+    urls, pages = chain(5)
+    frontier = asyncio.run(discover(urls[:1], FakeFetcher(pages), max_html=2))
+    assert len(frontier) == 5
+    assert list(frontier.html) == urls[:2]
+
+
+def test_take_html_hands_over_the_pages():
+    frontier = Frontier()
+    frontier.add(f"{BASE_URL}/art/a.html", "<html></html>")
+    html = frontier.take_html()
+    assert list(html) == [f"{BASE_URL}/art/a.html"]
+    assert frontier.html == {}
+    assert frontier.pop_html(f"{BASE_URL}/art/a.html") is None
@@ -0,0 +1,67 @@
+"""
+The lxml extractor must give the same (data, next_url) as the original
+BeautifulSoup one on every fixture page. The fixtures include the markup
+libxml2 restructures (block elements inside <p>, nested <p>), which
+lxml_extractor hands to bs4_extractor.
+"""
+import json
+import os
+
+import pytest
+
+pytest.importorskip("lxml")
+
+import bs4_extractor
+import lxml_extractor
+
+PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pages")
+
+
+def load_pages():
+    pages = []
+    with open(os.path.join(PAGES, "manifest.json"), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for name, url in sorted(manifest.items()):
+        with open(os.path.join(PAGES, name), encoding='utf-8') as f:
+            pages.append(pytest.param(f.read(), url, id=name))
+    return pages
+
+
+@pytest.mark.parametrize("html, url", load_pages())
+def test_same_output_as_bs4(html, url):
+    expected = bs4_extractor.extract_page(html, url)
+    assert json.dumps(lxml_extractor.extract_page(html, url), ensure_ascii=False) == \
+        json.dumps(expected, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("html, url", load_pages())
+def test_restructured_pages_are_detected(html, url):
+    # Every page where libxml2's own tree gives a different result must be sent to bs4
+    doc = lxml_extractor.parse(html)
+    lxml_only = lxml_extractor.extract(doc, url), lxml_extractor.next_page_url(doc, url)
+    if lxml_only != bs4_extractor.extract_page(html, url):
+        assert lxml_extractor.restructured_by_lxml(html)
+
+
+def test_restructured_by_lxml():
+    assert lxml_extractor.restructured_by_lxml("<p>a<div>b</div></p>")
+    assert lxml_extractor.restructured_by_lxml("<p>a<p>b</p></p>")
+    assert lxml_extractor.restructured_by_lxml("<p>a<hr>b</p>")
+    # Closed by the enclosing element's end tag, in both parsers
+    assert not lxml_extractor.restructured_by_lxml("<div><p>a</div><div>b</div>")
+    assert not lxml_extractor.restructured_by_lxml("<p><span>a</span><br>b</p><div><img src='x'></div>")
+
+
+def test_hyphen_heading_takes_the_next_tag():
+    with open(os.path.join(PAGES, "hyphen-heading.html"), encoding='utf-8') as f:
+        data, _ = lxml_extractor.extract_page(f.read(), "https://mammothmemory.net/chemistry/eth.html")
+    assert data["word"] == "Eth-"
+    assert data["definition"].startswith("Molecules with the prefix")
+
+
+def test_split_heading():
+    assert bs4_extractor.split_heading("Proton – a positively charged particle") == \
+        ("Proton", "a positively charged particle")
+    assert bs4_extractor.split_heading("Anode - the positive electrode") == ("Anode", "the positive electrode")
+    for heading in ("Eth-", "X-ray", "Compounds ending in -ide"):
+        assert bs4_extractor.split_heading(heading) is None
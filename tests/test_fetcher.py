@@ -0,0 +1,100 @@
+"""
+AsyncFetcher's blocking get() path from several threads, against a local HTTP server.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import AsyncFetcher
+
+
+class SlowServer(ThreadingHTTPServer):
+    daemon_threads = True
+    delay = 0.1
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SlowHandler)
+        self.starts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.starts.append(time.monotonic())
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = SlowServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_from_threads(fetcher, urls, threads=4):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(fetcher.get, urls))
+
+
+def test_threads_keep_min_interval(server):
+    urls = [f"{server.url}/page-{i}" for i in range(8)]
+    with AsyncFetcher(per_host=8, min_interval=0.05) as fetcher:
+        bodies = get_from_threads(fetcher, urls)
+    assert bodies == [f"/page-{i}" for i in range(8)]
+    starts = sorted(server.starts)
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # A little slack for the time between the fetcher's start and the server seeing it
+    assert min(gaps) > 0.04
+
+
+def test_threads_respect_per_host(server):
+    urls = [f"{server.url}/page-{i}" for i in range(8)]
+    with AsyncFetcher(per_host=2, min_interval=0) as fetcher:
+        get_from_threads(fetcher, urls)
+    assert server.max_in_flight == 2
+
+
+def test_fetch_counts_from_threads(server):
+    urls = [f"{server.url}/same"] * 40
+    with AsyncFetcher(concurrency=8, per_host=8, min_interval=0) as fetcher:
+        get_from_threads(fetcher, urls, threads=8)
+        assert fetcher.fetch_counts[urls[0]] == 40
+
+
+def test_loop_and_threads_share_per_host(server):
+    async_urls = [f"{server.url}/async-{i}" for i in range(8)]
+    thread_urls = [f"{server.url}/thread-{i}" for i in range(8)]
+    with AsyncFetcher(concurrency=8, per_host=2, min_interval=0) as fetcher:
+        loop_thread = threading.Thread(target=lambda: fetcher.get_all(async_urls), daemon=True)
+        loop_thread.start()
+        get_from_threads(fetcher, thread_urls)
+        loop_thread.join(10)
+    assert not loop_thread.is_alive()
+    assert len(server.starts) == 16
+    assert server.max_in_flight == 2
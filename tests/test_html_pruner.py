@@ -0,0 +1,14 @@
+"""
+prune_html's compact markup.
+"""
+from html_pruner import prune_html
+
+
+def test_red_spans_become_red_markers():
+    html = '<div id="mainContent"><p>A <span style="color: #FF0000;">PRO</span> footballer</p></div>'
+    assert prune_html(html) == "<div><p>A <red>PRO</red> footballer</p></div>"
+
+
+def test_image_src_is_escaped():
+    html = '<div id="mainContent"><img src="/images/a&quot;b.jpg?x=1&amp;y=2"></div>'
+    assert prune_html(html) == '<div><img src="/images/a&quot;b.jpg?x=1&amp;y=2"></div>'
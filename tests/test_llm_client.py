@@ -0,0 +1,136 @@
+"""
+LLMExecutor against the local stub server (tests/llm_stub.py): retries and
+backoff, the RPM/TPM budgets, and streaming.
+"""
+import asyncio
+import time
+
+import pytest
+
+from llm_client import LLMError, LLMExecutor, TokenBucket
+from llm_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def make_executor(stub, **kwargs):
+    return LLMExecutor(api_key="test", base_url=stub.url, **kwargs)
+
+
+def record_acquires(executor):
+    """
+    Amounts taken from the RPM and TPM buckets, in order.
+    """
+    taken = {"rpm": [], "tpm": []}
+    for name, bucket in (("rpm", executor._rpm), ("tpm", executor._tpm)):
+        acquire = bucket.acquire
+
+        async def recording(amount=1, acquire=acquire, name=name):
+            taken[name].append(amount)
+            await acquire(amount)
+
+        bucket.acquire = recording
+    return taken
+
+
+def test_complete(stub):
+    with make_executor(stub) as llm:
+        assert llm.complete_blocking("Answer.", "hello") == "echo: hello"
+        assert llm.tokens_used == 42
+    assert stub.requests[0]["instructions"] == "Answer."
+
+
+def test_retries_rate_limits_and_server_errors(stub):
+    stub.fail = [429, 500, 429]
+    with make_executor(stub) as llm:
+        assert llm.complete_blocking("Answer.", "hello") == "echo: hello"
+        assert llm.retries == 3
+        assert llm.failed == 0
+    assert len(stub.requests) == 4
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.fail = [503] * 3
+    with make_executor(stub, max_retries=2) as llm:
+        with pytest.raises(LLMError):
+            llm.complete_blocking("Answer.", "hello")
+        assert llm.failed == 1
+    assert len(stub.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    stub.fail = [400]
+    with make_executor(stub) as llm:
+        with pytest.raises(LLMError):
+            llm.complete_blocking("Answer.", "hello")
+        assert llm.retries == 0
+    assert len(stub.requests) == 1
+
+
+def test_every_attempt_is_charged_to_both_budgets(stub):
+    stub.fail = [429, 429]
+    with make_executor(stub, expected_output_tokens=100) as llm:
+        taken = record_acquires(llm)
+        llm.complete_blocking("Answer.", "hello")
+    assert len(taken["rpm"]) == 3
+    assert len(taken["tpm"]) == 3
+    assert len(set(taken["tpm"])) == 1 and taken["tpm"][0] > 100
+
+
+def test_tpm_correction_uses_reported_usage(stub):
+    with make_executor(stub, tpm=60000, expected_output_tokens=1000) as llm:
+        llm.complete_blocking("Answer.", "hello")
+        # The estimate (over 1000) was charged, then corrected to the 42 tokens used
+        assert llm._tpm.tokens > 60000 - 100
+
+
+def test_rpm_budget_paces_requests(stub):
+    with make_executor(stub, rpm=600) as llm:
+        # Start from an empty bucket: 10 requests per second
+        asyncio.run_coroutine_threadsafe(llm._rpm.acquire(600), llm._loop).result()
+        start = time.monotonic()
+        for i in range(3):
+            llm.complete_blocking("Answer.", str(i))
+        assert time.monotonic() - start >= 0.25
+
+
+def test_token_bucket_waits_for_refill():
+    async def run():
+        bucket = TokenBucket(600)
+        await bucket.acquire(600)
+        start = time.monotonic()
+        await bucket.acquire(5)
+        return time.monotonic() - start
+
+    assert 0.4 <= asyncio.run(run()) < 1.5
+
+
+def test_streaming(stub):
+    pieces = []
+    with make_executor(stub) as llm:
+        output = llm.complete_blocking("Answer.", "a longer input to stream", on_delta=pieces.append)
+    assert output == "echo: a longer input to stream"
+    assert len(pieces) > 1 and "".join(pieces) == output
+
+
+def test_truncated_stream_fails_without_retry(stub):
+    pieces = []
+    with make_executor(stub) as llm:
+        with pytest.raises(LLMError, match="before the response completed"):
+            llm.complete_blocking("Answer.", "TRUNCATE this one", on_delta=pieces.append)
+        # Text was already delivered, so repeating the request would repeat it
+        assert llm.retries == 0
+    assert pieces and len(stub.requests) == 1
+
+
+def test_stream_retried_before_any_text(stub):
+    stub.fail = [429]
+    pieces = []
+    with make_executor(stub) as llm:
+        assert llm.complete_blocking("Answer.", "hello", on_delta=pieces.append) == "echo: hello"
+        assert llm.retries == 1
+    assert "".join(pieces) == "echo: hello"
@@ -0,0 +1,58 @@
+"""
+decode() and iter_rows() over every shape the concept_and_mnemonic column has had.
+"""
+import csv
+import json
+
+import pytest
+
+from mnemonic_json import DecodeError, decode, decode_items, iter_rows
+
+ITEMS = [{"term": "Proton", "definition": "", "mnemonic": "A PRO footballer", "keywords": ["pro"]}]
+
+
+@pytest.mark.parametrize("payload", [
+    # Fenced, with indentation, as the scrapers first wrote it
+    "```json\n" + json.dumps(ITEMS, indent=4) + "\n```",
+    # Fenced with prose around it
+    "Here are the mnemonics:\n```json\n" + json.dumps(ITEMS) + "\n```\nLet me know!",
+    # Bare compact JSON from structured outputs
+    json.dumps(ITEMS, separators=(",", ":")),
+    # Quotes doubled by a CSV round trip done by hand
+    json.dumps(ITEMS).replace('"', '""'),
+    "```json\n" + json.dumps(ITEMS).replace('"', '""') + "\n```",
+])
+def test_decode_shapes(payload):
+    assert decode(payload) == ITEMS
+
+
+def test_empty_strings_survive():
+    # "" inside well-formed JSON is an empty string, not a doubled quote
+    assert decode('[{"term": "", "mnemonic": "x"}]') == [{"term": "", "mnemonic": "x"}]
+
+
+def test_single_object_becomes_a_list():
+    assert decode_items(json.dumps(ITEMS[0])) == ITEMS
+
+
+@pytest.mark.parametrize("payload", ["", "   ", "no json here", "```json\n[{\"term\": \n```", "42"])
+def test_undecodable(payload):
+    with pytest.raises(DecodeError):
+        decode_items(payload)
+
+
+def test_iter_rows(tmp_path):
+    path = tmp_path / "rows.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["url", "concept_and_mnemonic"])
+        writer.writerow(["https://mammothmemory.net/a.html", "```json\n" + json.dumps(ITEMS) + "\n```"])
+        writer.writerow(["https://mammothmemory.net/b.html", ""])
+        writer.writerow(["https://mammothmemory.net/c.html", "not json"])
+        writer.writerow(["https://mammothmemory.net/d.html", json.dumps(ITEMS)])
+
+    rows = list(iter_rows(str(path)))
+    assert [items for _, items, _ in rows] == [ITEMS, None, None, ITEMS]
+    assert [error is not None for _, _, error in rows] == [False, False, True, False]
+    kept = [row["url"] for row, _, _ in iter_rows(str(path), where=lambda row: row["url"].endswith("d.html"))]
+    assert kept == ["https://mammothmemory.net/d.html"]
@@ -0,0 +1,30 @@
+"""
+ParsePool.map_async keeps going when the parse of one page raises.
+"""
+import asyncio
+
+from parse_pool import ParsePool
+
+
+def parse(content, url):
+    if content == "bad":
+        raise ValueError("not enough values to unpack")
+    return content.upper(), None
+
+
+def test_parse_error_is_per_page(capsys):
+    pages = {"a": "first", "b": "bad", "c": "third"}
+
+    async def fetch(url):
+        return pages[url]
+
+    async def run():
+        with ParsePool(parse, workers=0, max_in_flight=2) as pool:
+            return [item async for item in pool.map_async(list(pages), fetch)]
+
+    assert asyncio.run(run()) == [
+        ("a", "first", ("FIRST", None)),
+        ("b", "bad", None),
+        ("c", "third", ("THIRD", None)),
+    ]
+    assert "Error parsing page b" in capsys.readouterr().out
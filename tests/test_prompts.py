@@ -0,0 +1,27 @@
+"""
+The extraction prompts must ask for what the strict structured-output schema
+(extraction_schema.ItemSchema) accepts: an object with an "items" array.
+"""
+import pytest
+
+import prompts
+
+EXTRACTION_PROMPTS = sorted(name for name in vars(prompts) if name.endswith("_EXTRACTION"))
+
+
+def test_every_script_prompt_is_here():
+    assert EXTRACTION_PROMPTS == ["ELEMENT_EXTRACTION", "MAIN_CONTENT_EXTRACTION", "NAME_EXTRACTION",
+                                  "TERM_EXTRACTION", "TREE_EXTRACTION", "VOCAB_EXTRACTION"]
+
+
+@pytest.mark.parametrize("name", EXTRACTION_PROMPTS)
+def test_prompt_matches_the_schema(name):
+    prompt = getattr(prompts, name)
+    assert '{"items": [' in prompt
+    assert "JSON array" not in prompt
+
+
+@pytest.mark.parametrize("name", EXTRACTION_PROMPTS)
+def test_prompt_explains_the_red_marker(name):
+    from html_pruner import RED_MARKER
+    assert f"<{RED_MARKER}>...</{RED_MARKER}>" in getattr(prompts, name)
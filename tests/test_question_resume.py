@@ -0,0 +1,115 @@
+"""
+FlashcardProcessor.process_csv_file interrupted mid-run and resumed: rows are
+written once each and in order, and no question already in the answer journal
+is asked again.
+"""
+import csv
+import json
+import os
+
+import pytest
+
+from llm_cache import LLMCache, cache_key
+from mnemonic_json import decode
+from prompts import QUESTION_INSTRUCTIONS, question_input
+from question import FlashcardProcessor
+
+ROWS = 30
+
+
+class Crash(BaseException):
+    """
+    Like a KeyboardInterrupt: not caught by the per-row error handling.
+    """
+
+
+def entry(i):
+    return {"term": f"Term {i}", "definition": f"Definition {i}", "mnemonic": f"Mnemonic {i}"}
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "in.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        # One entry per row, on a subject without question templates
+        writer.writerows([f"https://mammothmemory.net/physics/page-{i}.html", json.dumps([entry(i)])]
+                         for i in range(ROWS))
+    return str(path)
+
+
+def asker(asked, crash_at=None):
+    async def ask(term, definition, mnemonic=""):
+        asked.append(term)
+        if crash_at is not None and len(asked) == crash_at:
+            raise Crash()
+        return f"What is {term}?"
+    return ask
+
+
+def run(input_file, output_file, asked, crash_at=None):
+    processor = FlashcardProcessor(batch=False, ask=asker(asked, crash_at))
+    processor.process_csv_file(input_file, output_file, window=5)
+
+
+def journaled(output_file):
+    """
+    The terms whose answers are in the answer journal.
+    """
+    journal = LLMCache(output_file + ".answers.db")
+    try:
+        return {entry(i)["term"] for i in range(ROWS)
+                if journal.get(cache_key("question", QUESTION_INSTRUCTIONS, question_input(**entry(i)))) is not None}
+    finally:
+        journal.close()
+
+
+def read_output(output_file):
+    with open(output_file, newline='', encoding='utf-8') as f:
+        return [(row[0], decode(row[1])) for row in csv.reader(f)]
+
+
+def check_output(output_file):
+    rows = read_output(output_file)
+    assert [url for url, _ in rows] == [f"https://mammothmemory.net/physics/page-{i}.html" for i in range(ROWS)]
+    assert [items[0]["question"] for _, items in rows] == [f"What is Term {i}?" for i in range(ROWS)]
+    for name in (".partial", ".partial.prev", ".checkpoint", ".answers.db"):
+        assert not os.path.exists(output_file + name)
+
+
+def test_crash_then_resume(input_file, tmp_path):
+    output_file = str(tmp_path / "out.csv")
+    first = []
+    with pytest.raises(Crash):
+        run(input_file, output_file, first, crash_at=17)
+    assert not os.path.exists(output_file)
+    saved = journaled(output_file)
+    assert saved
+
+    second = []
+    run(input_file, output_file, second)
+    assert not saved & set(second)
+    assert len(first) + len(second) < 2 * ROWS
+    # The question that crashed was never answered, so it is asked again
+    assert first[16] in second
+    assert set(first) | set(second) == {entry(i)["term"] for i in range(ROWS)}
+    check_output(output_file)
+
+
+def test_crash_while_resuming(input_file, tmp_path):
+    output_file = str(tmp_path / "out.csv")
+    with pytest.raises(Crash):
+        run(input_file, output_file, [], crash_at=10)
+    saved = journaled(output_file)
+
+    # The resumed run crashes too, before it has rewritten every row it resumed
+    second = []
+    with pytest.raises(Crash):
+        run(input_file, output_file, second, crash_at=3)
+    assert not saved & set(second)
+    saved |= journaled(output_file)
+
+    third = []
+    run(input_file, output_file, third)
+    assert not saved & set(third)
+    check_output(output_file)
@@ -0,0 +1,64 @@
+"""
+Which entries question_templates answers locally, and which are left for the LLM.
+"""
+import asyncio
+import json
+
+import pytest
+
+from question_templates import TemplateEngine
+
+NAMES_URL = "https://mammothmemory.net/memory/remembering-names/remembering-names/a-to-z-of-names.html"
+MONTH_URL = "https://mammothmemory.net/memory/remembering-months-and-signs-of-the-zodiac/remembering-months/january.html"
+CHEMISTRY_URL = "https://mammothmemory.net/chemistry/periodic-table/titanium.html"
+HISTORY_URL = "https://mammothmemory.net/history/kings-and-queens/henry-viii.html"
+
+
+def test_names_are_templated_on_names_pages():
+    engine = TemplateEngine()
+    assert engine.question_for({"name": "Adam", "mnemonic": "Adam Bomb"}, NAMES_URL) == \
+        "What is the first name associated with Adam?"
+    assert engine.question_for({"term": "Alberto (first name)", "definition": None}, NAMES_URL) == \
+        "What is the first name associated with Alberto?"
+
+
+@pytest.mark.parametrize("entry, url", [
+    ({"term": "January", "definition": None, "mnemonic": "January – Janitor"}, MONTH_URL),
+    ({"term": "Titanium", "definition": "", "mnemonic": "Tight Titan"}, CHEMISTRY_URL),
+    ({"term": "Henry VIII", "mnemonic": "Hen with eight wives"}, HISTORY_URL),
+    ({"name": "Adam", "mnemonic": "Adam Bomb"}, HISTORY_URL),
+    ({"name": "Adam", "mnemonic": "Adam Bomb"}, None),
+])
+def test_names_are_not_templated_elsewhere(entry, url):
+    assert TemplateEngine().question_for(entry, url) is None
+
+
+def test_non_name_entries_go_to_the_llm():
+    from question import FlashcardProcessor
+
+    asked = []
+
+    async def ask(term, definition, mnemonic=""):
+        asked.append(term)
+        return f"What is {term}?"
+
+    processor = FlashcardProcessor(batch=False, ask=ask)
+    entries = [
+        {"term": "Henry VIII", "definition": "King of England from 1509 to 1547", "mnemonic": "Hen with eight wives"},
+        {"term": "Alberto (first name)", "definition": "", "mnemonic": "Al Berto"},
+    ]
+    output = json.loads(asyncio.run(processor.process_json_entry_async(json.dumps(entries), HISTORY_URL)))
+    assert asked == ["Henry VIII"]
+    assert output[0]["question"] == "What is Henry VIII?"
+    # No definition to ask about, and not on a names page
+    assert "question" not in output[1]
+
+
+def test_importing_question_starts_no_executor():
+    import importlib
+    import threading
+
+    import question
+
+    importlib.reload(question)
+    assert not any(thread.name == "llm-executor" for thread in threading.enumerate())
@@ -0,0 +1,100 @@
+"""
+update_categories: only subjects whose source rows changed are rebuilt, and the
+result always equals a full split of the same CSV.
+"""
+import csv
+import os
+import shutil
+
+import category_split
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "split")
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+
+def snapshot(categories):
+    """
+    {file name: (inode, bytes)}; a rewritten file is a new inode, since every write ends in os.replace
+    """
+    result = {}
+    for name in sorted(os.listdir(categories)):
+        if name.startswith('.'):
+            continue
+        path = os.path.join(categories, name)
+        with open(path, 'rb') as f:
+            result[name] = (os.stat(path).st_ino, f.read())
+    return result
+
+
+def full_split(csv_path, tmp_path):
+    categories = tmp_path / "full"
+    shutil.rmtree(categories, ignore_errors=True)
+    category_split.split_csv(str(csv_path), str(categories))
+    return {name: data for name, (_, data) in snapshot(categories).items()}
+
+
+def test_incremental_rebuild(tmp_path, monkeypatch):
+    csv_path = tmp_path / "mnemonics.csv"
+    shutil.copy(os.path.join(FIXTURES, "mnemonics.csv"), csv_path)
+    categories = str(tmp_path / "categories")
+    rebuilt = []
+    split_csv = category_split.split_csv
+
+    def recording(*args, subjects=None, **kwargs):
+        rebuilt.append(sorted(subjects) if subjects is not None else None)
+        return split_csv(*args, subjects=subjects, **kwargs)
+
+    monkeypatch.setattr(category_split, "split_csv", recording)
+
+    # First run: no manifest, every subject is built; history's only row doesn't decode, so it gets no file
+    category_split.update_categories(str(csv_path), categories)
+    assert rebuilt == [["chemistry", "geography", "history", "music"]]
+    assert "history.json" not in os.listdir(categories)
+    first = snapshot(categories)
+    assert {name: data for name, (_, data) in first.items()} == full_split(csv_path, tmp_path)
+
+    # Nothing changed: nothing is rewritten
+    rebuilt.clear()
+    category_split.update_categories(str(csv_path), categories)
+    assert rebuilt == [] and snapshot(categories) == first
+
+    # One music row changes: only music.json (and all_subjects.json) are rewritten
+    rows = read_rows(csv_path)
+    adagio = next(i for i, row in enumerate(rows) if row[0].endswith("adagio.html"))
+    rows[adagio][1] = rows[adagio][1].replace("walks slowly", "walks very slowly")
+    write_rows(csv_path, rows)
+    rebuilt.clear()
+    category_split.update_categories(str(csv_path), categories)
+    assert rebuilt == [["music"]]
+    second = snapshot(categories)
+    assert {name for name in first if first[name] != second[name]} == {"music.json", "all_subjects.json"}
+    assert b"walks very slowly" in second["music.json"][1]
+    assert {name: data for name, (_, data) in second.items()} == full_split(csv_path, tmp_path)
+
+    # Every geography row goes: its file is removed, nothing is rebuilt
+    write_rows(csv_path, [row for row in rows if "/geography/" not in row[0]])
+    rebuilt.clear()
+    category_split.update_categories(str(csv_path), categories)
+    assert rebuilt == []
+    third = snapshot(categories)
+    assert "geography.json" not in third
+    assert third["chemistry.json"] == second["chemistry.json"] and third["music.json"] == second["music.json"]
+    assert {name: data for name, (_, data) in third.items()} == full_split(csv_path, tmp_path)
+
+
+def test_format_change_rebuilds_everything(tmp_path):
+    csv_path = os.path.join(FIXTURES, "mnemonics.csv")
+    categories = str(tmp_path / "categories")
+    category_split.update_categories(csv_path, categories)
+    category_split.update_categories(csv_path, categories, fmt="jsonl")
+    names = set(os.listdir(categories))
+    assert {"chemistry.jsonl", "music.jsonl", "geography.jsonl", "all_subjects.jsonl"} <= names